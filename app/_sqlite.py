@@ -0,0 +1,58 @@
+"""SQLite helpers shared by the modules that persist epoch-ms timestamps."""
+
+import logging
+import sqlite3
+import time
+from typing import Iterable, Mapping
+
+logger = logging.getLogger(__name__)
+
+# ISO-8601 text (read as UTC) -> integer milliseconds since the epoch
+_TEXT_TO_EPOCH_MS = "CAST(ROUND((julianday({column}, 'utc') - 2440587.5) * 86400000) AS INTEGER)"
+
+
+def now_ms() -> int:
+    """Current wall-clock time in integer milliseconds since the epoch."""
+    return time.time_ns() // 1_000_000
+
+
+def migrate_text_timestamps(
+    db: sqlite3.Connection,
+    schemas: Mapping[str, str],
+    timestamp_columns: Mapping[str, Iterable[str]],
+    also_rebuild: Iterable[str] = (),
+) -> None:
+    """Rebuild tables whose timestamp columns still hold ISO-8601 text.
+
+    Each table in ``schemas`` is recreated from its ``{table}`` template and
+    its rows copied over, converting the TEXT columns listed in
+    ``timestamp_columns`` to epoch ms. Tables in ``also_rebuild`` are
+    recreated even without text timestamps (e.g. to pick up new constraints).
+    """
+    also_rebuild = set(also_rebuild)
+    rebuild = {}
+    for table in schemas:
+        ts_columns = set(timestamp_columns.get(table, ()))
+        columns = db.execute(f"PRAGMA table_info({table})").fetchall()
+        text_ts = {c[1] for c in columns if c[1] in ts_columns and c[2] == "TEXT"}
+        if text_ts or (columns and table in also_rebuild):
+            rebuild[table] = [(c[1], (
+                _TEXT_TO_EPOCH_MS.format(column=c[1]) if c[1] in text_ts else c[1]
+            )) for c in columns]
+    if not rebuild:
+        return
+
+    logger.info("Rebuilding legacy tables: %s", ", ".join(rebuild))
+    foreign_keys = db.execute("PRAGMA foreign_keys").fetchone()[0]
+    script = ["PRAGMA foreign_keys=OFF;", "BEGIN;"]
+    for table, columns in rebuild.items():
+        names = ", ".join(name for name, _ in columns)
+        exprs = ", ".join(expr for _, expr in columns)
+        script += [
+            schemas[table].format(table=f"{table}_new"),
+            f"INSERT INTO {table}_new ({names}) SELECT {exprs} FROM {table};",
+            f"DROP TABLE {table};",
+            f"ALTER TABLE {table}_new RENAME TO {table};",
+        ]
+    script += ["COMMIT;", f"PRAGMA foreign_keys={'ON' if foreign_keys else 'OFF'};"]
+    db.executescript("\n".join(script))
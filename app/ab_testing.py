@@ -13,17 +13,84 @@ Features:
 """
 
 import math
+import secrets
 import sqlite3
 import logging
 from dataclasses import dataclass, field
-from datetime import datetime
 from enum import Enum
+from itertools import groupby
 from pathlib import Path
 from typing import Optional
 
+from ._sqlite import migrate_text_timestamps, now_ms
+
 logger = logging.getLogger(__name__)
 
 
+_STATUS_EMOJI = {
+    "draft": "📝", "running": "🔬", "paused": "⏸️",
+    "completed": "✅", "cancelled": "🚫",
+}
+
+_SCHEMAS = {
+    "experiments": """
+        CREATE TABLE IF NOT EXISTS {table} (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            platform TEXT NOT NULL,
+            primary_metric TEXT DEFAULT 'engagement_rate',
+            status TEXT DEFAULT 'draft',
+            min_sample_size INTEGER DEFAULT 100,
+            confidence_threshold REAL DEFAULT 95.0,
+            created_at INTEGER NOT NULL,
+            started_at INTEGER,
+            completed_at INTEGER,
+            notes TEXT DEFAULT ''
+        );
+    """,
+    "variants": """
+        CREATE TABLE IF NOT EXISTS {table} (
+            id TEXT PRIMARY KEY,
+            experiment_id TEXT NOT NULL,
+            name TEXT NOT NULL,
+            variant_type TEXT NOT NULL,
+            content TEXT DEFAULT '',
+            is_control INTEGER DEFAULT 0,
+            sample_size INTEGER DEFAULT 0,
+            FOREIGN KEY (experiment_id) REFERENCES experiments(id) ON DELETE CASCADE
+        );
+    """,
+    "variant_metrics": """
+        CREATE TABLE IF NOT EXISTS {table} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            variant_id TEXT NOT NULL,
+            metric_type TEXT NOT NULL,
+            value REAL NOT NULL,
+            recorded_at INTEGER NOT NULL,
+            post_id TEXT DEFAULT '',
+            FOREIGN KEY (variant_id) REFERENCES variants(id) ON DELETE CASCADE
+        );
+    """,
+}
+
+_INSERT_METRIC_SQL = (
+    "INSERT INTO variant_metrics (variant_id, metric_type, value, recorded_at, post_id) "
+    "VALUES (?, ?, ?, ?, ?)"
+)
+
+_RESULTS_CACHE_KEY_SQL = (
+    "SELECT COUNT(DISTINCT v.id), COUNT(m.id), MAX(m.id) "
+    "FROM variants v LEFT JOIN variant_metrics m ON m.variant_id=v.id "
+    "WHERE v.experiment_id=?"
+)
+
+# Timestamp columns, stored as integer milliseconds since the epoch
+_TIMESTAMP_COLUMNS = {
+    "experiments": ("created_at", "started_at", "completed_at"),
+    "variant_metrics": ("recorded_at",),
+}
+
+
 class ExperimentStatus(str, Enum):
     DRAFT = "draft"
     RUNNING = "running"
@@ -66,13 +133,24 @@ class Variant:
     sample_size: int = 0
     is_control: bool = False
 
-    def add_metric(self, metric: MetricType, value: float):
-        key = metric.value
-        if key not in self.metrics:
-            self.metrics[key] = 0.0
-        # Running average
-        old_total = self.metrics[key] * max(self.sample_size - 1, 0)
-        self.metrics[key] = (old_total + value) / max(self.sample_size, 1)
+    def add_metric(self, metric: MetricType, value: float, n: Optional[int] = None):
+        """Fold ``value`` into the running mean as the ``n``-th sample.
+
+        ``n`` defaults to the current ``sample_size``; the caller is
+        responsible for incrementing it.
+        """
+        n = n or self.sample_size or 1
+        cur = self.metrics.get(metric.value, 0.0)
+        self.metrics[metric.value] = cur + (value - cur) / n
+
+    def add_observation(self, values: dict[MetricType, float]):
+        """Count one new sample and fold all of its metric values in."""
+        self.sample_size += 1
+        n = self.sample_size
+        metrics = self.metrics
+        for metric, value in values.items():
+            cur = metrics.get(metric.value, 0.0)
+            metrics[metric.value] = cur + (value - cur) / n
 
     def get_metric(self, metric: MetricType) -> float:
         return self.metrics.get(metric.value, 0.0)
@@ -93,90 +171,98 @@ class ExperimentResult:
     recommendations: list[str] = field(default_factory=list)
 
     def summary(self) -> str:
-        lines = [
-            f"🧪 实验结果: {self.experiment_name}",
-            f"📊 主指标: {self.primary_metric.value}",
-            "",
-        ]
         if self.is_significant and self.winner_id:
-            lines.append(f"🏆 赢家: {self.winner_name}")
-            lines.append(f"📈 提升: +{self.lift_percent:.1f}%")
-            lines.append(f"🎯 置信度: {self.confidence:.1f}%")
+            verdict = [
+                f"🏆 赢家: {self.winner_name}",
+                f"📈 提升: +{self.lift_percent:.1f}%",
+                f"🎯 置信度: {self.confidence:.1f}%",
+            ]
         else:
-            lines.append("⚠️ 结果不显著 — 需要更多数据")
-            lines.append(f"当前置信度: {self.confidence:.1f}% (需 ≥95%)")
+            verdict = [
+                "⚠️ 结果不显著 — 需要更多数据",
+                f"当前置信度: {self.confidence:.1f}% (需 ≥95%)",
+            ]
 
-        lines.append("")
-        lines.append("📋 各变体表现:")
+        variant_lines = []
         for vr in self.variant_results:
-            ctrl = " (control)" if vr.get("is_control") else ""
-            lines.append(
-                f"  {'🔵' if vr.get('is_control') else '🔴'} {vr['name']}{ctrl}: "
+            is_control = vr.get("is_control")
+            variant_lines.append(
+                f"  {'🔵' if is_control else '🔴'} {vr['name']}"
+                f"{' (control)' if is_control else ''}: "
                 f"{vr.get('metric_value', 0):.2f} (n={vr.get('sample_size', 0)})"
             )
 
-        if self.recommendations:
-            lines.append("")
-            lines.append("💡 建议:")
-            for r in self.recommendations:
-                lines.append(f"  • {r}")
+        rec_lines = (
+            ["", "💡 建议:", *(f"  • {r}" for r in self.recommendations)]
+            if self.recommendations else []
+        )
 
-        return "\n".join(lines)
+        return "\n".join([
+            f"🧪 实验结果: {self.experiment_name}",
+            f"📊 主指标: {self.primary_metric.value}",
+            "",
+            *verdict,
+            "",
+            "📋 各变体表现:",
+            *variant_lines,
+            *rec_lines,
+        ])
 
 
 class ABTestEngine:
     """A/B Testing engine with SQLite persistence."""
 
-    def __init__(self, db_path: str = "data/ab_tests.db"):
+    def __init__(self, db_path: str = "data/ab_tests.db", metric_batch_size: int = 1):
         Path(db_path).parent.mkdir(parents=True, exist_ok=True)
-        self.db = sqlite3.connect(db_path)
+        self.db = sqlite3.connect(db_path, cached_statements=256)
         self.db.row_factory = sqlite3.Row
+        # WAL + synchronous=NORMAL: commits no longer fsync the main file
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("PRAGMA temp_store=MEMORY")
+        self.db.execute("PRAGMA cache_size=-65536")
+        self.db.execute("PRAGMA mmap_size=268435456")
+        self.db.execute("PRAGMA foreign_keys=ON")
+        # record_metric() buffers observations and writes them in one
+        # transaction once this many are pending (1 = write immediately).
+        self.metric_batch_size = max(1, metric_batch_size)
+        self._pending_metrics: list[tuple[str, MetricType, float, str]] = []
+        self._results_cache: dict[str, tuple[tuple, ExperimentResult]] = {}
         self._init_tables()
+        self._insert_cursor = self.db.cursor()
 
     def _init_tables(self):
+        self.db.executescript("".join(
+            schema.format(table=table) for table, schema in _SCHEMAS.items()
+        ))
+        self._migrate_legacy_tables()
         self.db.executescript("""
-            CREATE TABLE IF NOT EXISTS experiments (
-                id TEXT PRIMARY KEY,
-                name TEXT NOT NULL,
-                platform TEXT NOT NULL,
-                primary_metric TEXT DEFAULT 'engagement_rate',
-                status TEXT DEFAULT 'draft',
-                min_sample_size INTEGER DEFAULT 100,
-                confidence_threshold REAL DEFAULT 95.0,
-                created_at TEXT NOT NULL,
-                started_at TEXT,
-                completed_at TEXT,
-                notes TEXT DEFAULT ''
-            );
-
-            CREATE TABLE IF NOT EXISTS variants (
-                id TEXT PRIMARY KEY,
-                experiment_id TEXT NOT NULL,
-                name TEXT NOT NULL,
-                variant_type TEXT NOT NULL,
-                content TEXT DEFAULT '',
-                is_control INTEGER DEFAULT 0,
-                sample_size INTEGER DEFAULT 0,
-                FOREIGN KEY (experiment_id) REFERENCES experiments(id)
-            );
-
-            CREATE TABLE IF NOT EXISTS variant_metrics (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                variant_id TEXT NOT NULL,
-                metric_type TEXT NOT NULL,
-                value REAL NOT NULL,
-                recorded_at TEXT NOT NULL,
-                post_id TEXT DEFAULT '',
-                FOREIGN KEY (variant_id) REFERENCES variants(id)
-            );
-
             CREATE INDEX IF NOT EXISTS idx_variants_experiment
                 ON variants(experiment_id);
-            CREATE INDEX IF NOT EXISTS idx_metrics_variant
-                ON variant_metrics(variant_id, metric_type);
+            DROP INDEX IF EXISTS idx_metrics_variant;
+            CREATE INDEX IF NOT EXISTS idx_metrics_variant_cov
+                ON variant_metrics(variant_id, metric_type, value);
+            CREATE TRIGGER IF NOT EXISTS trg_bump_sample_size
+                AFTER INSERT ON variant_metrics
+            BEGIN
+                UPDATE variants SET sample_size = sample_size + 1 WHERE id = NEW.variant_id;
+            END;
         """)
         self.db.commit()
 
+    def _migrate_legacy_tables(self):
+        """Rebuild tables created by older versions of the schema.
+
+        Older databases lack ON DELETE CASCADE on the variant foreign keys
+        and store timestamps as ISO-8601 text; both are upgraded in place.
+        """
+        no_cascade = [
+            table for table in _SCHEMAS
+            if any(fk["on_delete"] != "CASCADE"
+                   for fk in self.db.execute(f"PRAGMA foreign_key_list({table})"))
+        ]
+        migrate_text_timestamps(self.db, _SCHEMAS, _TIMESTAMP_COLUMNS, also_rebuild=no_cascade)
+
     def create_experiment(
         self,
         name: str,
@@ -187,8 +273,7 @@ class ABTestEngine:
         notes: str = "",
     ) -> str:
         """Create a new A/B test experiment."""
-        import hashlib
-        exp_id = hashlib.md5(f"{name}{datetime.now().isoformat()}".encode()).hexdigest()[:12]
+        exp_id = secrets.token_hex(6)
 
         self.db.execute(
             "INSERT INTO experiments (id, name, platform, primary_metric, "
@@ -196,7 +281,7 @@ class ABTestEngine:
             "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
             (exp_id, name, platform, primary_metric.value,
              min_sample_size, confidence_threshold,
-             datetime.now().isoformat(), notes)
+             now_ms(), notes)
         )
         self.db.commit()
         return exp_id
@@ -210,10 +295,7 @@ class ABTestEngine:
         is_control: bool = False,
     ) -> str:
         """Add a variant to an experiment."""
-        import hashlib
-        var_id = hashlib.md5(
-            f"{experiment_id}{name}{datetime.now().isoformat()}".encode()
-        ).hexdigest()[:12]
+        var_id = secrets.token_hex(6)
 
         self.db.execute(
             "INSERT INTO variants (id, experiment_id, name, variant_type, content, is_control) "
@@ -225,26 +307,21 @@ class ABTestEngine:
 
     def start_experiment(self, experiment_id: str) -> str:
         """Start an experiment."""
-        variants = self.db.execute(
-            "SELECT COUNT(*) as cnt FROM variants WHERE experiment_id=?",
+        row = self.db.execute(
+            "SELECT COUNT(*) AS total, COALESCE(SUM(is_control), 0) AS controls "
+            "FROM variants WHERE experiment_id=?",
             (experiment_id,)
         ).fetchone()
 
-        if not variants or variants["cnt"] < 2:
+        if row["total"] < 2:
             return "❌ 至少需要2个变体才能开始实验"
 
-        control = self.db.execute(
-            "SELECT COUNT(*) as cnt FROM variants "
-            "WHERE experiment_id=? AND is_control=1",
-            (experiment_id,)
-        ).fetchone()
-
-        if not control or control["cnt"] == 0:
+        if row["controls"] == 0:
             return "❌ 需要指定一个控制组(control)"
 
         self.db.execute(
             "UPDATE experiments SET status=?, started_at=? WHERE id=?",
-            (ExperimentStatus.RUNNING.value, datetime.now().isoformat(), experiment_id)
+            (ExperimentStatus.RUNNING.value, now_ms(), experiment_id)
         )
         self.db.commit()
         return f"✅ 实验 {experiment_id} 已开始运行"
@@ -256,21 +333,50 @@ class ABTestEngine:
         value: float,
         post_id: str = "",
     ):
-        """Record a metric observation for a variant."""
-        self.db.execute(
-            "INSERT INTO variant_metrics (variant_id, metric_type, value, recorded_at, post_id) "
-            "VALUES (?, ?, ?, ?, ?)",
-            (variant_id, metric.value, value, datetime.now().isoformat(), post_id)
-        )
-        # Update sample size
-        self.db.execute(
-            "UPDATE variants SET sample_size = sample_size + 1 WHERE id=?",
-            (variant_id,)
-        )
-        self.db.commit()
+        """Record a metric observation for a variant.
+
+        Observations are queued and flushed once ``metric_batch_size``
+        are pending; call ``flush()`` to force a write.
+        """
+        self._pending_metrics.append((variant_id, metric, value, post_id))
+        if len(self._pending_metrics) >= self.metric_batch_size:
+            self.flush()
+
+    def record_metrics_bulk(self, rows: list[tuple[str, MetricType, float, str]]) -> int:
+        """Record many (variant_id, metric, value, post_id) rows in one transaction."""
+        if not rows:
+            return 0
+        now = now_ms()
+        # variants.sample_size is bumped by the trg_bump_sample_size trigger
+        with self.db:
+            self._insert_cursor.executemany(
+                _INSERT_METRIC_SQL,
+                [(vid, metric.value, value, now, post_id) for vid, metric, value, post_id in rows]
+            )
+        return len(rows)
+
+    def flush(self) -> int:
+        """Write any buffered metric observations to the database."""
+        pending, self._pending_metrics = self._pending_metrics, []
+        return self.record_metrics_bulk(pending)
 
     def get_results(self, experiment_id: str) -> ExperimentResult:
-        """Analyze experiment results with statistical testing."""
+        """Analyze experiment results with statistical testing.
+
+        Results are memoized until the experiment's variants or recorded
+        metrics change.
+        """
+        self.flush()
+        key = tuple(self.db.execute(_RESULTS_CACHE_KEY_SQL, (experiment_id,)).fetchone())
+        cached = self._results_cache.get(experiment_id)
+        if cached and cached[0] == key:
+            return cached[1]
+
+        result = self._compute_results(experiment_id)
+        self._results_cache[experiment_id] = (key, result)
+        return result
+
+    def _compute_results(self, experiment_id: str) -> ExperimentResult:
         exp = self.db.execute(
             "SELECT * FROM experiments WHERE id=?", (experiment_id,)
         ).fetchone()
@@ -290,42 +396,36 @@ class ABTestEngine:
         primary_metric = MetricType(exp["primary_metric"])
         confidence_threshold = exp["confidence_threshold"]
 
-        # Get variants and their metrics
-        variants = self.db.execute(
-            "SELECT * FROM variants WHERE experiment_id=? ORDER BY is_control DESC",
-            (experiment_id,)
+        # Aggregate every variant's primary metric in one pass, kept as
+        # parallel columns (control first) until the result is rendered
+        rows = self.db.execute(
+            "SELECT v.id, v.name, v.is_control, "
+            "COALESCE(AVG(m.value), 0), COUNT(m.value) "
+            "FROM variants v "
+            "LEFT JOIN variant_metrics m ON m.variant_id=v.id AND m.metric_type=? "
+            "WHERE v.experiment_id=? "
+            "GROUP BY v.id ORDER BY v.is_control DESC",
+            (primary_metric.value, experiment_id)
         ).fetchall()
-
-        variant_data = []
-        control_data = None
-
-        for v in variants:
-            metrics = self.db.execute(
-                "SELECT AVG(value) as avg_val, COUNT(*) as cnt "
-                "FROM variant_metrics WHERE variant_id=? AND metric_type=?",
-                (v["id"], primary_metric.value)
-            ).fetchone()
-
-            all_values = self.db.execute(
-                "SELECT value FROM variant_metrics "
-                "WHERE variant_id=? AND metric_type=? ORDER BY recorded_at",
-                (v["id"], primary_metric.value)
-            ).fetchall()
-
-            vd = {
-                "id": v["id"],
-                "name": v["name"],
-                "is_control": bool(v["is_control"]),
-                "metric_value": metrics["avg_val"] or 0,
-                "sample_size": metrics["cnt"] or 0,
-                "values": [r["value"] for r in all_values],
-            }
-            variant_data.append(vd)
-
-            if v["is_control"]:
-                control_data = vd
-
-        if not control_data or not variant_data:
+        ids, names, controls, values, sizes = zip(*rows) if rows else ((),) * 5
+        confidences = [None] * len(ids)
+
+        def _variant_results() -> list[dict]:
+            results = []
+            for i in range(len(ids)):
+                vd = {
+                    "id": ids[i],
+                    "name": names[i],
+                    "is_control": bool(controls[i]),
+                    "metric_value": values[i],
+                    "sample_size": sizes[i],
+                }
+                if confidences[i] is not None:
+                    vd["confidence"] = confidences[i]
+                results.append(vd)
+            return results
+
+        if not ids or not controls[0]:
             return ExperimentResult(
                 experiment_id=experiment_id,
                 experiment_name=exp["name"],
@@ -335,37 +435,41 @@ class ABTestEngine:
                 confidence=0,
                 is_significant=False,
                 lift_percent=0,
-                variant_results=variant_data,
+                variant_results=_variant_results(),
             )
 
-        # Find best non-control variant
-        non_control = [v for v in variant_data if not v["is_control"]]
-        if not non_control:
-            best = control_data
-        else:
-            best = max(non_control, key=lambda v: v["metric_value"])
+        # Control sorts first; every later index is a test arm
+        ctrl = 0
+        arms = [i for i in range(len(ids)) if not controls[i]]
+        best = max(arms, key=values.__getitem__) if arms else ctrl
 
-        # Statistical significance test (z-test for proportions)
+        # Statistical significance test (z-test for proportions): every
+        # arm is tested against control, Holm-corrected across arms
         confidence = 0.0
         is_significant = False
         lift = 0.0
 
-        if control_data["sample_size"] > 0 and best["sample_size"] > 0:
-            lift = _calculate_lift(control_data["metric_value"], best["metric_value"])
-            confidence = _z_test_confidence(
-                control_data["metric_value"],
-                control_data["sample_size"],
-                best["metric_value"],
-                best["sample_size"],
-            )
+        if sizes[ctrl] > 0 and arms:
+            arm_confidences = _holm_adjust(_z_test_confidence_batch(
+                values[ctrl], sizes[ctrl], [(values[i], sizes[i]) for i in arms],
+            ))
+            for i, arm_confidence in zip(arms, arm_confidences):
+                confidences[i] = arm_confidence
+
+        if sizes[ctrl] > 0 and sizes[best] > 0:
+            lift = _calculate_lift(values[ctrl], values[best])
+            confidence = confidences[best] or 0.0
             is_significant = confidence >= confidence_threshold
 
         # If control is actually the best, check that
-        winner_data = best
-        if control_data["metric_value"] > best["metric_value"]:
-            winner_data = control_data
+        winner = best
+        if values[ctrl] > values[best]:
+            winner = ctrl
             lift = 0  # Control won, no lift
 
+        variant_data = _variant_results()
+        control_data = variant_data[ctrl]
+
         # Recommendations
         recommendations = _generate_recommendations(
             variant_data, control_data, is_significant, primary_metric
@@ -374,8 +478,8 @@ class ABTestEngine:
         return ExperimentResult(
             experiment_id=experiment_id,
             experiment_name=exp["name"],
-            winner_id=winner_data["id"] if is_significant else None,
-            winner_name=winner_data["name"] if is_significant else None,
+            winner_id=ids[winner] if is_significant else None,
+            winner_name=names[winner] if is_significant else None,
             primary_metric=primary_metric,
             confidence=confidence,
             is_significant=is_significant,
@@ -384,61 +488,98 @@ class ABTestEngine:
             recommendations=recommendations,
         )
 
-    def list_experiments(self, status: Optional[ExperimentStatus] = None) -> str:
-        """List experiments with optional status filter."""
-        if status:
-            rows = self.db.execute(
-                "SELECT * FROM experiments WHERE status=? ORDER BY created_at DESC",
-                (status.value,)
-            ).fetchall()
-        else:
-            rows = self.db.execute(
-                "SELECT * FROM experiments ORDER BY created_at DESC LIMIT 20"
-            ).fetchall()
+    def list_experiments(
+        self,
+        status: Optional[ExperimentStatus] = None,
+        limit: int = 20,
+        offset: int = 0,
+    ) -> str:
+        """List experiments with optional status filter, newest first."""
+        status_value = status.value if status else None
+        cursor = self.db.execute(
+            "SELECT id, name, platform, status FROM experiments "
+            "WHERE (? IS NULL OR status=?) ORDER BY created_at DESC LIMIT ? OFFSET ?",
+            (status_value, status_value, limit, offset)
+        )
+        rows = [
+            f"  {_STATUS_EMOJI.get(st, '❓')} [{exp_id}] {name} ({platform}) — {st}"
+            for exp_id, name, platform, st in cursor
+        ]
 
         if not rows:
             return "🧪 暂无实验\n\n使用 /ab_create <名称> <平台> 创建新实验"
 
-        status_emoji = {
-            "draft": "📝", "running": "🔬", "paused": "⏸️",
-            "completed": "✅", "cancelled": "🚫",
-        }
-        lines = [f"🧪 实验列表 ({len(rows)}个)\n"]
-        for r in rows:
-            emoji = status_emoji.get(r["status"], "❓")
-            lines.append(
-                f"  {emoji} [{r['id']}] {r['name']} ({r['platform']}) — {r['status']}"
-            )
-        return "\n".join(lines)
+        return f"🧪 实验列表 ({len(rows)}个)\n\n" + "\n".join(rows)
+
+    def scan_significance(
+        self, status: Optional[ExperimentStatus] = ExperimentStatus.RUNNING
+    ) -> list[dict]:
+        """Check significance of the best arm for many experiments at once.
+
+        All variant aggregates come from a single GROUP BY; each experiment's
+        arms are then tested against its control in one batch.
+        """
+        self.flush()
+        status_value = status.value if status else None
+        rows = self.db.execute(
+            "SELECT e.id AS experiment_id, e.confidence_threshold, "
+            "v.id, v.is_control, AVG(m.value) AS avg_val, COUNT(m.value) AS cnt "
+            "FROM experiments e "
+            "JOIN variants v ON v.experiment_id=e.id "
+            "LEFT JOIN variant_metrics m "
+            "ON m.variant_id=v.id AND m.metric_type=e.primary_metric "
+            "WHERE (? IS NULL OR e.status=?) "
+            "GROUP BY v.id ORDER BY e.id",
+            (status_value, status_value)
+        ).fetchall()
+
+        results = []
+        for exp_id, group in groupby(rows, key=lambda r: r["experiment_id"]):
+            group = list(group)
+            control = next((r for r in group if r["is_control"]), None)
+            arms = [r for r in group if not r["is_control"]]
+            if control is None or not arms:
+                continue
+
+            control_value = control["avg_val"] or 0
+            confidences = _holm_adjust(_z_test_confidence_batch(
+                control_value, control["cnt"],
+                [(r["avg_val"] or 0, r["cnt"]) for r in arms],
+            ))
+            best_idx = max(range(len(arms)), key=lambda i: arms[i]["avg_val"] or 0)
+            best = arms[best_idx]
+            results.append({
+                "experiment_id": exp_id,
+                "best_variant_id": best["id"],
+                "confidence": confidences[best_idx],
+                "lift_percent": _calculate_lift(control_value, best["avg_val"] or 0),
+                "is_significant": confidences[best_idx] >= control["confidence_threshold"],
+            })
+        return results
 
     def complete_experiment(self, experiment_id: str) -> ExperimentResult:
         """Mark experiment as completed and return final results."""
         self.db.execute(
             "UPDATE experiments SET status=?, completed_at=? WHERE id=?",
-            (ExperimentStatus.COMPLETED.value, datetime.now().isoformat(), experiment_id)
+            (ExperimentStatus.COMPLETED.value, now_ms(), experiment_id)
         )
         self.db.commit()
         return self.get_results(experiment_id)
 
     def delete_experiment(self, experiment_id: str) -> str:
         """Delete an experiment and all associated data."""
-        # Get variant IDs first
-        variants = self.db.execute(
-            "SELECT id FROM variants WHERE experiment_id=?", (experiment_id,)
-        ).fetchall()
-
-        for v in variants:
-            self.db.execute("DELETE FROM variant_metrics WHERE variant_id=?", (v["id"],))
-
-        self.db.execute("DELETE FROM variants WHERE experiment_id=?", (experiment_id,))
-        cur = self.db.execute("DELETE FROM experiments WHERE id=?", (experiment_id,))
-        self.db.commit()
+        self.flush()
+        self._results_cache.pop(experiment_id, None)
+        # Variants and their metrics go with it via ON DELETE CASCADE
+        with self.db:
+            cur = self.db.execute("DELETE FROM experiments WHERE id=?", (experiment_id,))
 
         if cur.rowcount:
             return f"✅ 实验 {experiment_id} 已删除"
         return f"⚠️ 未找到实验 {experiment_id}"
 
     def close(self):
+        self.flush()
         self.db.close()
 
 
@@ -449,67 +590,63 @@ def _calculate_lift(control_value: float, test_value: float) -> float:
     return ((test_value - control_value) / control_value) * 100
 
 
-def _z_test_confidence(
+def _z_test_confidence_batch(
     control_rate: float,
     control_n: int,
-    test_rate: float,
-    test_n: int,
-) -> float:
-    """Perform z-test for two proportions and return confidence level.
+    arms: list[tuple[float, int]],
+) -> list[float]:
+    """Two-proportion z-test of many (rate, n) arms against one control.
+
+    Rates are on a 0-100 scale. Each arm gets the two-sided confidence
+    P(|Z| < z) = erf(z / sqrt(2)) as a percentage, capped at 99.99, or 0.0
+    when either side has fewer than 2 samples.
 
-    Treats rates as proportions (0-100 scale → 0-1 scale).
+    Control-side terms are computed once instead of per arm, and the
+    z-to-confidence step is inlined so the loop body makes no Python calls
+    besides ``sqrt``/``erf``.
     """
-    if control_n < 2 or test_n < 2:
-        return 0.0
+    if control_n < 2:
+        return [0.0] * len(arms)
 
-    # Convert percentage rates to proportions
+    sqrt = math.sqrt
+    erf = math.erf
     p1 = min(control_rate / 100.0, 1.0)
-    p2 = min(test_rate / 100.0, 1.0)
+    p1_total = p1 * control_n
+    inv_control_n = 1 / control_n
+
+    results = []
+    append = results.append
+    for test_rate, test_n in arms:
+        if test_n < 2:
+            append(0.0)
+            continue
+        p2 = min(test_rate / 100.0, 1.0)
+        p_pool = (p1_total + p2 * test_n) / (control_n + test_n)
+        if p_pool <= 0 or p_pool >= 1:
+            append(0.0)
+            continue
+        # erf(z / sqrt(2)) with z = |p2 - p1| / se, folded into one sqrt
+        se_sqrt2 = sqrt(2.0 * p_pool * (1 - p_pool) * (inv_control_n + 1 / test_n))
+        if se_sqrt2 <= 0:
+            append(0.0)
+            continue
+        append(min(99.99, erf(abs(p2 - p1) / se_sqrt2) * 100.0))
+    return results
 
-    # Pooled proportion
-    p_pool = (p1 * control_n + p2 * test_n) / (control_n + test_n)
 
-    if p_pool <= 0 or p_pool >= 1:
-        return 0.0
+def _holm_adjust(confidences: list[float]) -> list[float]:
+    """Apply the Holm-Bonferroni correction to per-arm confidence levels."""
+    m = len(confidences)
+    if m <= 1:
+        return list(confidences)
 
-    # Standard error
-    se = math.sqrt(p_pool * (1 - p_pool) * (1/control_n + 1/test_n))
-    if se <= 0:
-        return 0.0
-
-    # Z-score
-    z = abs(p2 - p1) / se
-
-    # Convert z-score to confidence (approximate)
-    # Using standard normal CDF approximation
-    confidence = _z_to_confidence(z)
-    return confidence
-
-
-def _z_to_confidence(z: float) -> float:
-    """Approximate conversion of z-score to confidence percentage."""
-    # Common z-score to confidence mappings
-    if z >= 3.29:
-        return 99.9
-    elif z >= 2.576:
-        return 99.0
-    elif z >= 2.326:
-        return 98.0
-    elif z >= 1.96:
-        return 95.0
-    elif z >= 1.645:
-        return 90.0
-    elif z >= 1.28:
-        return 80.0
-    elif z >= 1.036:
-        return 70.0
-    elif z >= 0.842:
-        return 60.0
-    elif z >= 0.674:
-        return 50.0
-    else:
-        # Linear interpolation below 50%
-        return max(0.0, z / 0.674 * 50.0)
+    p_values = [1.0 - c / 100.0 for c in confidences]
+    adjusted = [0.0] * m
+    running_max = 0.0
+    for rank, i in enumerate(sorted(range(m), key=p_values.__getitem__)):
+        running_max = max(running_max, min(1.0, (m - rank) * p_values[i]))
+        adjusted[i] = (1.0 - running_max) * 100.0
+    return adjusted
 
 
 def _generate_recommendations(
@@ -533,15 +670,20 @@ def _generate_recommendations(
         else:
             recs.append("差异不显著 — 两个变体表现类似, 选择成本更低的方案")
 
-    # Check if any variant significantly underperforms
-    for v in variant_data:
-        if v["is_control"]:
-            continue
-        if control_data["metric_value"] > 0:
-            diff = (v["metric_value"] - control_data["metric_value"]) / control_data["metric_value"]
-            if diff < -0.2:
+    # Flag arms more than 20% below or 50% above control. The relative
+    # thresholds become absolute bounds once, so only flagged arms pay for
+    # the diff computation and formatting.
+    ctrl = control_data["metric_value"]
+    if ctrl > 0:
+        low, high = ctrl * 0.8, ctrl * 1.5
+        for v in variant_data:
+            value = v["metric_value"]
+            if v["is_control"] or low <= value <= high:
+                continue
+            diff = (value - ctrl) / ctrl
+            if value < low:
                 recs.append(f"变体 '{v['name']}' 表现明显低于控制组 ({diff*100:.1f}%), 考虑停用")
-            elif diff > 0.5:
+            else:
                 recs.append(f"变体 '{v['name']}' 表现优异 (+{diff*100:.1f}%), 建议全量采用")
 
     # Metric-specific suggestions
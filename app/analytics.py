@@ -3,69 +3,129 @@
 import json
 import sqlite3
 import logging
-from datetime import datetime, timedelta
 from typing import Optional
 from pathlib import Path
 
+from ._sqlite import migrate_text_timestamps, now_ms
+
 logger = logging.getLogger(__name__)
 
+_SCHEMAS = {
+    "tracked_accounts": """
+        CREATE TABLE IF NOT EXISTS {table} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            platform TEXT NOT NULL,
+            username TEXT NOT NULL,
+            added_at INTEGER NOT NULL,
+            notes TEXT DEFAULT '',
+            UNIQUE(platform, username)
+        );
+    """,
+    "snapshots": """
+        CREATE TABLE IF NOT EXISTS {table} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            platform TEXT NOT NULL,
+            username TEXT NOT NULL,
+            followers INTEGER DEFAULT 0,
+            posts INTEGER DEFAULT 0,
+            engagement_rate REAL DEFAULT 0,
+            extra_json TEXT DEFAULT '{{}}',
+            captured_at INTEGER NOT NULL
+        );
+    """,
+    "post_metrics": """
+        CREATE TABLE IF NOT EXISTS {table} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            platform TEXT NOT NULL,
+            post_id TEXT NOT NULL,
+            likes INTEGER DEFAULT 0,
+            comments INTEGER DEFAULT 0,
+            shares INTEGER DEFAULT 0,
+            views INTEGER DEFAULT 0,
+            captured_at INTEGER NOT NULL,
+            UNIQUE(platform, post_id, captured_at)
+        );
+    """,
+}
+
+# Timestamp column per table, stored as integer milliseconds since the epoch
+_TIMESTAMP_COLUMNS = {
+    "tracked_accounts": ("added_at",),
+    "snapshots": ("captured_at",),
+    "post_metrics": ("captured_at",),
+}
+
+
+_EMPTY_JSON = "{}"
+
+_TRACK_SQL = (
+    "INSERT OR IGNORE INTO tracked_accounts (platform, username, added_at, notes) "
+    "VALUES (?, ?, ?, ?)"
+)
+
+_INSERT_SNAPSHOT_SQL = (
+    "INSERT INTO snapshots (platform, username, followers, posts, "
+    "engagement_rate, extra_json, captured_at) VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+
+
+def _dump_extra(extra: Optional[dict]) -> str:
+    if not extra:
+        return _EMPTY_JSON
+    return json.dumps(extra, separators=(",", ":"))
+
 
 class Analytics:
     """Track competitors and store engagement metrics."""
 
     def __init__(self, db_path: str = "data/analytics.db"):
         Path(db_path).parent.mkdir(parents=True, exist_ok=True)
-        self.db = sqlite3.connect(db_path)
+        self.db = sqlite3.connect(db_path, cached_statements=256)
         self.db.row_factory = sqlite3.Row
+        # WAL + synchronous=NORMAL: commits no longer fsync the main file
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("PRAGMA temp_store=MEMORY")
+        self.db.execute("PRAGMA cache_size=-65536")
+        self.db.execute("PRAGMA mmap_size=268435456")
         self._init_tables()
+        self._insert_cursor = self.db.cursor()
 
     def _init_tables(self):
+        self.db.executescript("".join(
+            schema.format(table=table) for table, schema in _SCHEMAS.items()
+        ))
+        migrate_text_timestamps(self.db, _SCHEMAS, _TIMESTAMP_COLUMNS)
         self.db.executescript("""
-            CREATE TABLE IF NOT EXISTS tracked_accounts (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                platform TEXT NOT NULL,
-                username TEXT NOT NULL,
-                added_at TEXT NOT NULL,
-                notes TEXT DEFAULT '',
-                UNIQUE(platform, username)
-            );
-            CREATE TABLE IF NOT EXISTS snapshots (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                platform TEXT NOT NULL,
-                username TEXT NOT NULL,
-                followers INTEGER DEFAULT 0,
-                posts INTEGER DEFAULT 0,
-                engagement_rate REAL DEFAULT 0,
-                extra_json TEXT DEFAULT '{}',
-                captured_at TEXT NOT NULL
-            );
-            CREATE TABLE IF NOT EXISTS post_metrics (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                platform TEXT NOT NULL,
-                post_id TEXT NOT NULL,
-                likes INTEGER DEFAULT 0,
-                comments INTEGER DEFAULT 0,
-                shares INTEGER DEFAULT 0,
-                views INTEGER DEFAULT 0,
-                captured_at TEXT NOT NULL,
-                UNIQUE(platform, post_id, captured_at)
-            );
+            DROP INDEX IF EXISTS idx_snap_platform_user_time;
+            CREATE INDEX IF NOT EXISTS idx_snapshots_pu_time
+                ON snapshots(platform, username, captured_at, followers, posts);
         """)
         self.db.commit()
 
     def track(self, platform: str, username: str, notes: str = "") -> str:
         try:
-            self.db.execute(
-                "INSERT OR IGNORE INTO tracked_accounts (platform, username, added_at, notes) "
-                "VALUES (?, ?, ?, ?)",
-                (platform.lower(), username.lower(), datetime.now().isoformat(), notes)
-            )
-            self.db.commit()
+            self.track_bulk([(platform, username, notes)])
             return f"✅ 已追踪 {platform} @{username}"
         except Exception as e:
             logger.error("Track error: %s", e)
             return f"❌ 追踪失败: {e}"
 
+    def track_bulk(self, accounts: list[tuple[str, str, str]]) -> int:
+        """Track many (platform, username, notes) accounts in one transaction.
+
+        Returns the number of newly tracked accounts; existing ones are ignored.
+        """
+        now = now_ms()
+        with self.db:
+            cur = self._insert_cursor
+            cur.executemany(
+                _TRACK_SQL,
+                [(platform.lower(), username.lower(), now, notes)
+                 for platform, username, notes in accounts]
+            )
+        return cur.rowcount
+
     def untrack(self, platform: str, username: str) -> str:
         cur = self.db.execute(
             "DELETE FROM tracked_accounts WHERE platform=? AND username=?",
@@ -76,39 +136,61 @@ class Analytics:
             return f"✅ 已取消追踪 {platform} @{username}"
         return f"⚠️ 未找到 {platform} @{username}"
 
-    def list_tracked(self) -> str:
-        rows = self.db.execute(
-            "SELECT platform, username, added_at, notes FROM tracked_accounts ORDER BY platform, username"
-        ).fetchall()
+    def list_tracked(self, limit: Optional[int] = None, offset: int = 0) -> str:
+        cursor = self.db.execute(
+            "SELECT platform, username, notes FROM tracked_accounts "
+            "ORDER BY platform, username LIMIT ? OFFSET ?",
+            (-1 if limit is None else limit, offset)
+        )
+        platform_emoji = {"ig": "📸", "tw": "🐦", "tt": "🎵"}
+        rows = [
+            f"  {platform_emoji.get(platform, '📊')} {platform} @{username}"
+            f"{f' — {notes}' if notes else ''}"
+            for platform, username, notes in cursor
+        ]
         if not rows:
             return "📋 暂无追踪账号\n\n使用 /track <ig|tw|tt> <用户名> 添加"
-        lines = [f"📋 追踪列表 ({len(rows)}个)\n"]
-        platform_emoji = {"ig": "📸", "tw": "🐦", "tt": "🎵"}
-        for r in rows:
-            emoji = platform_emoji.get(r["platform"], "📊")
-            note = f" — {r['notes']}" if r["notes"] else ""
-            lines.append(f"  {emoji} {r['platform']} @{r['username']}{note}")
-        return "\n".join(lines)
+        return f"📋 追踪列表 ({len(rows)}个)\n\n" + "\n".join(rows)
 
     def save_snapshot(self, platform: str, username: str,
                       followers: int = 0, posts: int = 0,
                       engagement_rate: float = 0, extra: Optional[dict] = None):
-        self.db.execute(
-            "INSERT INTO snapshots (platform, username, followers, posts, "
-            "engagement_rate, extra_json, captured_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        self._insert_cursor.execute(
+            _INSERT_SNAPSHOT_SQL,
             (platform, username, followers, posts, engagement_rate,
-             json.dumps(extra or {}), datetime.now().isoformat())
+             _dump_extra(extra), now_ms())
         )
         self.db.commit()
 
+    def save_snapshots_bulk(self, snapshots: list[tuple]) -> int:
+        """Insert many snapshots in one transaction.
+
+        Each item is (platform, username, followers, posts, engagement_rate,
+        extra), matching the arguments of save_snapshot().
+        """
+        now = now_ms()
+        rows = [
+            (platform, username, followers, posts, engagement_rate, _dump_extra(extra), now)
+            for platform, username, followers, posts, engagement_rate, extra in snapshots
+        ]
+        with self.db:
+            self._insert_cursor.executemany(_INSERT_SNAPSHOT_SQL, rows)
+        return len(rows)
+
     def get_growth(self, platform: str, username: str, days: int = 7) -> str:
-        since = (datetime.now() - timedelta(days=days)).isoformat()
+        since = now_ms() - days * 86_400_000
+        # Only the first and last snapshot in the window are needed
         rows = self.db.execute(
-            "SELECT followers, posts, captured_at FROM snapshots "
-            "WHERE platform=? AND username=? AND captured_at>=? ORDER BY captured_at",
+            "SELECT followers, posts, captured_at, cnt FROM ("
+            "  SELECT followers, posts, captured_at,"
+            "    ROW_NUMBER() OVER (ORDER BY captured_at, id) AS rn,"
+            "    ROW_NUMBER() OVER (ORDER BY captured_at DESC, id DESC) AS rr,"
+            "    COUNT(*) OVER () AS cnt"
+            "  FROM snapshots WHERE platform=? AND username=? AND captured_at>=?"
+            ") WHERE rn=1 OR rr=1 ORDER BY rn",
             (platform, username, since)
         ).fetchall()
-        if len(rows) < 2:
+        if not rows or rows[0]["cnt"] < 2:
             return f"📊 @{username} 数据不足 (需要至少2次快照)"
         first, last = rows[0], rows[-1]
         f_diff = last["followers"] - first["followers"]
@@ -118,7 +200,7 @@ class Analytics:
             f"📊 @{username} {days}天增长\n\n"
             f"👥 粉丝: {last['followers']:,} ({sign}{f_diff:,})\n"
             f"📝 帖子: {last['posts']:,} (+{p_diff})\n"
-            f"📅 数据点: {len(rows)}个"
+            f"📅 数据点: {rows[0]['cnt']}个"
         )
 
     def close(self):
@@ -13,9 +13,12 @@ Features:
 - SQLite persistence for segment tracking
 """
 
+import hashlib
+import heapq
 import json
 import sqlite3
 import logging
+import time
 from collections import Counter, defaultdict
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
@@ -25,6 +28,117 @@ from pathlib import Path
 logger = logging.getLogger(__name__)
 
 
+_UPSERT_FOLLOWER_SQL = (
+    "INSERT OR REPLACE INTO followers "
+    "(id, user_id, username, platform, followed_at, last_active, "
+    "total_interactions, likes_given, comments_given, shares_given, saves_given, "
+    "active_hours, preferred_content_json, language, country, device, updated_at) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+# Tier and lifecycle stage are derived inside SQLite on every insert; this
+# trigger is the only implementation of the classification rules.
+# Timestamps are cut to their naive "YYYY-MM-DDTHH:MM:SS" part and compared
+# against local time.
+_CLASSIFY_TRIGGER_SQL = """
+    CREATE TRIGGER IF NOT EXISTS trg_followers_classify
+        AFTER INSERT ON followers
+    BEGIN
+        UPDATE followers SET (engagement_tier, lifecycle_stage) = (
+            SELECT
+                CASE
+                    WHEN active_days > 90 THEN 'churned'
+                    WHEN active_days > 30 THEN 'dormant'
+                    WHEN score >= 50 THEN 'superfan'
+                    WHEN score >= 20 THEN 'active'
+                    WHEN score >= 5 THEN 'casual'
+                    ELSE 'passive'
+                END,
+                CASE
+                    WHEN follow_days IS NULL THEN 'established'
+                    WHEN follow_days < 7 THEN 'new_follower'
+                    WHEN follow_days < 30 THEN 'onboarding'
+                    WHEN follow_days < 180 THEN 'established'
+                    WHEN active_days > 14 THEN 'at_risk'
+                    ELSE 'loyal'
+                END
+            FROM (SELECT
+                COALESCE(CAST(julianday('now', 'localtime')
+                    - julianday(substr(NEW.last_active, 1, 19)) AS INTEGER), 999) AS active_days,
+                CAST(julianday('now', 'localtime')
+                    - julianday(substr(NEW.followed_at, 1, 19)) AS INTEGER) AS follow_days,
+                NEW.likes_given + 3.0 * NEW.comments_given
+                    + 5.0 * NEW.shares_given + 2.0 * NEW.saves_given AS score)
+        )
+        WHERE rowid = NEW.rowid;
+    END;
+"""
+
+# Secondary indexes on followers, rebuilt around large bulk imports
+_FOLLOWER_INDEXES = {
+    "idx_followers_platform":
+        "CREATE INDEX IF NOT EXISTS idx_followers_platform ON followers(platform)",
+    "idx_followers_tier":
+        "CREATE INDEX IF NOT EXISTS idx_followers_tier ON followers(engagement_tier)",
+    "idx_followers_interactions":
+        "CREATE INDEX IF NOT EXISTS idx_followers_interactions "
+        "ON followers(platform, engagement_tier, total_interactions)",
+    "idx_followers_platform_interactions":
+        "CREATE INDEX IF NOT EXISTS idx_followers_platform_interactions "
+        "ON followers(platform, total_interactions)",
+}
+_CREATE_FOLLOWER_INDEXES_SQL = ";\n".join(_FOLLOWER_INDEXES.values()) + ";"
+
+_BULK_INDEX_REBUILD_THRESHOLD = 1000
+
+# Follower fields returned by find_lookalikes()
+_LOOKALIKE_COLUMNS = (
+    "id, user_id, username, platform, followed_at, last_active, "
+    "total_interactions, likes_given, comments_given, shares_given, saves_given, "
+    "active_hours, preferred_content_json, language, country, device, "
+    "engagement_tier, lifecycle_stage, updated_at"
+)
+
+# Length of the ranked lists reported in AudienceInsights
+_TOP_N = 10
+
+# Tiers with a dedicated <tier>_count column on audience_snapshots
+_SNAPSHOT_TIERS = ("superfan", "active", "casual", "passive", "dormant", "churned")
+
+_INSERT_SNAPSHOT_SQL = (
+    "INSERT INTO audience_snapshots "
+    "(platform, total_followers, segment_counts_json, "
+    + "".join(f"{tier}_count, " for tier in _SNAPSHOT_TIERS)
+    + "captured_at) VALUES (?, ?, ?, "
+    + "?, " * len(_SNAPSHOT_TIERS)
+    + "?)"
+)
+
+_INSERT_ACTIVE_HOUR_SQL = (
+    "INSERT INTO follower_active_hours (follower_id, hour) VALUES (?, ?)"
+)
+
+_INSERT_PREFERRED_CONTENT_SQL = (
+    "INSERT INTO follower_preferred_content (follower_id, content) VALUES (?, ?)"
+)
+
+_DELETE_ACTIVE_HOURS_SQL = "DELETE FROM follower_active_hours WHERE follower_id=?"
+
+_DELETE_PREFERRED_CONTENT_SQL = "DELETE FROM follower_preferred_content WHERE follower_id=?"
+
+_HOURLY_ENGAGEMENT_SQL = (
+    "SELECT h.hour, AVG(COALESCE(f.total_interactions, 0)) "
+    "FROM follower_active_hours h JOIN followers f ON f.id=h.follower_id "
+    "WHERE f.platform=? GROUP BY h.hour ORDER BY 2 DESC, MIN(h.rowid) LIMIT ?"
+)
+
+_CONTENT_ENGAGEMENT_SQL = (
+    "SELECT c.content, AVG(COALESCE(f.total_interactions, 0)) "
+    "FROM follower_preferred_content c JOIN followers f ON f.id=c.follower_id "
+    "WHERE f.platform=? GROUP BY c.content ORDER BY 2 DESC, MIN(c.rowid) LIMIT ?"
+)
+
+
 class SegmentType(str, Enum):
     ENGAGEMENT = "engagement"       # By engagement level
     BEHAVIOR = "behavior"           # By behavior pattern
@@ -61,7 +175,7 @@ TIER_THRESHOLDS = {
 }
 
 
-@dataclass
+@dataclass(slots=True)
 class FollowerProfile:
     """Profile of a single follower."""
     user_id: str
@@ -94,16 +208,10 @@ class FollowerProfile:
 
     @property
     def days_since_active(self) -> int:
-        if not self.last_active:
-            return 999
-        try:
-            last = datetime.fromisoformat(self.last_active.replace("Z", "+00:00"))
-            return (datetime.now() - last.replace(tzinfo=None)).days
-        except (ValueError, AttributeError):
-            return 999
+        return _days_since(self.last_active, datetime.now())
 
 
-@dataclass
+@dataclass(slots=True)
 class AudienceSegment:
     """A segment of the audience."""
     id: str
@@ -190,13 +298,72 @@ class AudienceInsights:
         return "\n".join(lines)
 
 
+_RECS_TEMPLATES = {
+    "superfan": (
+        "🌟 超级粉丝策略 ({n}人)\n\n"
+        "1. 📌 专属内容 — 提前预览、幕后花絮\n"
+        "2. 🎤 UGC共创 — 邀请参与内容创作\n"
+        "3. 🏆 认可奖励 — 点名感谢、专属称号\n"
+        "4. 💬 深度互动 — 回复每条评论\n"
+        "5. 🎁 专属福利 — 限量商品、提前购"
+    ),
+    "active": (
+        "🔥 活跃粉丝策略 ({n}人)\n\n"
+        "1. 📊 投票互动 — Story投票、问答\n"
+        "2. 🔄 分享激励 — 分享有奖\n"
+        "3. 📚 系列内容 — 连载型内容保持粘性\n"
+        "4. 🤝 社群感 — 打造归属感\n"
+        "5. 📈 进阶引导 — 向superfan转化"
+    ),
+    "casual": (
+        "👤 普通粉丝策略 ({n}人)\n\n"
+        "1. 🎣 强Hook — 前3秒/前2行抓住注意力\n"
+        "2. 📱 短内容 — 易消化的快速内容\n"
+        "3. ❓ 提问式 — 降低互动门槛\n"
+        "4. 🎵 趋势跟风 — 追热点、用热门BGM\n"
+        "5. ⏰ 精准时间 — 在其活跃时段发布"
+    ),
+    "passive": (
+        "😶 潜水粉丝策略 ({n}人)\n\n"
+        "1. 💥 争议观点 — 引发讨论欲望\n"
+        "2. 🎬 视频优先 — 视频比图文更易触达\n"
+        "3. 🏷️ 标签互动 — @提及唤醒\n"
+        "4. 🎯 精准推送 — 根据兴趣定向\n"
+        "5. 📣 付费触达 — 适当广告投放"
+    ),
+    "dormant": (
+        "💤 沉睡粉丝策略 ({n}人)\n\n"
+        "1. 🔔 唤醒活动 — '好久不见'专题\n"
+        "2. 🎁 限时福利 — 优惠码/抽奖激活\n"
+        "3. 📊 调研问卷 — 了解沉睡原因\n"
+        "4. ✂️ 清理考虑 — 严重影响互动率时清理\n"
+        "5. 🔄 内容转型 — 可能是内容不再匹配"
+    ),
+}
+
+
 class AudienceEngine:
     """Audience analysis engine with SQLite persistence."""
 
-    def __init__(self, db_path: str = "data/audience.db"):
+    def __init__(
+        self,
+        db_path: str = "data/audience.db",
+        snapshot_batch_size: int = 1,
+        insights_ttl: float = 60.0,
+    ):
         Path(db_path).parent.mkdir(parents=True, exist_ok=True)
-        self.db = sqlite3.connect(db_path)
+        self.db = sqlite3.connect(db_path, cached_statements=256)
         self.db.row_factory = sqlite3.Row
+        # WAL + synchronous=NORMAL: commits no longer fsync the main file
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("PRAGMA temp_store=MEMORY")
+        self.db.execute("PRAGMA cache_size=-65536")
+        self.db.execute("PRAGMA mmap_size=268435456")
+        self.snapshot_batch_size = max(1, snapshot_batch_size)
+        self._pending_snapshots: list[tuple] = []
+        self.insights_ttl = insights_ttl
+        self._insights_cache: dict[str, tuple[float, AudienceInsights]] = {}
         self._init_tables()
 
     def _init_tables(self):
@@ -213,7 +380,7 @@ class AudienceEngine:
                 comments_given INTEGER DEFAULT 0,
                 shares_given INTEGER DEFAULT 0,
                 saves_given INTEGER DEFAULT 0,
-                active_hours_json TEXT DEFAULT '[]',
+                active_hours BLOB DEFAULT x'',     -- one byte per hour (0-23)
                 preferred_content_json TEXT DEFAULT '[]',
                 language TEXT DEFAULT '',
                 country TEXT DEFAULT '',
@@ -248,103 +415,200 @@ class AudienceEngine:
                 platform TEXT NOT NULL,
                 total_followers INTEGER NOT NULL,
                 segment_counts_json TEXT DEFAULT '{}',
+                superfan_count INTEGER DEFAULT 0,
+                active_count INTEGER DEFAULT 0,
+                casual_count INTEGER DEFAULT 0,
+                passive_count INTEGER DEFAULT 0,
+                dormant_count INTEGER DEFAULT 0,
+                churned_count INTEGER DEFAULT 0,
                 insights_json TEXT DEFAULT '{}',
                 captured_at TEXT NOT NULL
             );
+            CREATE INDEX IF NOT EXISTS idx_snapshots_platform_time
+                ON audience_snapshots(platform, captured_at);
+
+            CREATE TABLE IF NOT EXISTS follower_active_hours (
+                follower_id TEXT NOT NULL,
+                hour INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS follower_preferred_content (
+                follower_id TEXT NOT NULL,
+                content TEXT NOT NULL
+            );
 
-            CREATE INDEX IF NOT EXISTS idx_followers_platform
-                ON followers(platform);
-            CREATE INDEX IF NOT EXISTS idx_followers_tier
-                ON followers(engagement_tier);
+            CREATE INDEX IF NOT EXISTS idx_active_hours_follower
+                ON follower_active_hours(follower_id);
+            CREATE INDEX IF NOT EXISTS idx_active_hours_hour
+                ON follower_active_hours(hour);
+            CREATE INDEX IF NOT EXISTS idx_preferred_content_follower
+                ON follower_preferred_content(follower_id);
+            CREATE INDEX IF NOT EXISTS idx_preferred_content_content
+                ON follower_preferred_content(content);
         """)
+        self.db.executescript(_CREATE_FOLLOWER_INDEXES_SQL + _CLASSIFY_TRIGGER_SQL)
+        self._migrate_active_hours_blob()
+        self._migrate_snapshot_tier_columns()
         self.db.commit()
 
+    def _migrate_snapshot_tier_columns(self):
+        """Add per-tier count columns to legacy snapshots, filled from JSON."""
+        columns = {c["name"] for c in self.db.execute("PRAGMA table_info(audience_snapshots)")}
+        missing = [t for t in _SNAPSHOT_TIERS if f"{t}_count" not in columns]
+        if not missing:
+            return
+
+        logger.info("Adding snapshot tier columns: %s", ", ".join(missing))
+        with self.db:
+            for tier in missing:
+                self.db.execute(
+                    f"ALTER TABLE audience_snapshots ADD COLUMN {tier}_count INTEGER DEFAULT 0"
+                )
+            self.db.execute(
+                "UPDATE audience_snapshots SET "
+                + ", ".join(
+                    f"{t}_count=COALESCE(json_extract(segment_counts_json, '$.{t}'), 0)"
+                    for t in missing
+                )
+                + " WHERE json_valid(segment_counts_json)"
+            )
+
+    def _migrate_active_hours_blob(self):
+        """Convert the legacy active_hours_json text column to a byte BLOB."""
+        columns = {c["name"] for c in self.db.execute("PRAGMA table_info(followers)")}
+        if "active_hours_json" not in columns:
+            return
+
+        logger.info("Migrating followers.active_hours_json to BLOB")
+        self._backfill_child_tables()
+        rows = []
+        for follower_id, raw in self.db.execute(
+            "SELECT id, active_hours_json FROM followers"
+        ):
+            try:
+                hours = bytes(json.loads(raw or "[]"))
+            except (ValueError, TypeError):
+                hours = b""
+            rows.append((hours, follower_id))
+        with self.db:
+            self.db.execute("ALTER TABLE followers ADD COLUMN active_hours BLOB DEFAULT x''")
+            self.db.executemany("UPDATE followers SET active_hours=? WHERE id=?", rows)
+            self.db.execute("ALTER TABLE followers DROP COLUMN active_hours_json")
+
+    def _backfill_child_tables(self):
+        """Populate the hour/content child tables from legacy JSON columns."""
+        has_children = self.db.execute(
+            "SELECT EXISTS (SELECT 1 FROM follower_active_hours) "
+            "OR EXISTS (SELECT 1 FROM follower_preferred_content)"
+        ).fetchone()[0]
+        if has_children:
+            return
+        self.db.executescript("""
+            INSERT INTO follower_active_hours (follower_id, hour)
+                SELECT f.id, j.value FROM followers f, json_each(f.active_hours_json) j
+                WHERE json_valid(f.active_hours_json);
+            INSERT INTO follower_preferred_content (follower_id, content)
+                SELECT f.id, j.value FROM followers f, json_each(f.preferred_content_json) j
+                WHERE json_valid(f.preferred_content_json);
+        """)
+
     def add_follower(self, profile: FollowerProfile) -> str:
         """Add or update a follower profile."""
-        tier = self._classify_tier(profile)
-        stage = self._classify_lifecycle(profile)
-
-        self.db.execute(
-            "INSERT OR REPLACE INTO followers "
-            "(id, user_id, username, platform, followed_at, last_active, "
-            "total_interactions, likes_given, comments_given, shares_given, saves_given, "
-            "active_hours_json, preferred_content_json, language, country, device, "
-            "engagement_tier, lifecycle_stage, updated_at) "
-            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
-            (
-                f"{profile.platform}_{profile.user_id}",
-                profile.user_id, profile.username, profile.platform,
-                profile.followed_at, profile.last_active,
-                profile.total_interactions, profile.likes_given,
-                profile.comments_given, profile.shares_given, profile.saves_given,
-                json.dumps(profile.active_hours),
-                json.dumps(profile.preferred_content),
-                profile.language, profile.country, profile.device,
-                tier.value, stage.value,
-                datetime.now().isoformat(),
-            )
-        )
-        self.db.commit()
-        return f"✅ {profile.platform} @{profile.username} → {tier.value}"
+        row = self._follower_row(profile, datetime.now().isoformat())
+        with self.db:
+            self.db.execute(_UPSERT_FOLLOWER_SQL, row)
+            self._replace_child_rows([profile])
+        self._insights_cache.pop(profile.platform, None)
+        tier = self.db.execute(
+            "SELECT engagement_tier FROM followers WHERE id=?", (row[0],)
+        ).fetchone()[0]
+        return f"✅ {profile.platform} @{profile.username} → {tier}"
 
     def bulk_add_followers(self, profiles: list[FollowerProfile]) -> str:
-        """Batch add/update followers."""
-        added = 0
-        for p in profiles:
-            self.add_follower(p)
-            added += 1
-        return f"✅ 批量导入 {added} 粉丝"
-
-    def _classify_tier(self, profile: FollowerProfile) -> EngagementTier:
-        """Classify follower into engagement tier."""
-        score = profile.engagement_score
-
-        if profile.days_since_active > 90:
-            return EngagementTier.CHURNED
-        if profile.days_since_active > 30:
-            return EngagementTier.DORMANT
-
-        if score >= 50:
-            return EngagementTier.SUPERFAN
-        if score >= 20:
-            return EngagementTier.ACTIVE
-        if score >= 5:
-            return EngagementTier.CASUAL
-        return EngagementTier.PASSIVE
-
-    def _classify_lifecycle(self, profile: FollowerProfile) -> LifecycleStage:
-        """Classify follower lifecycle stage."""
-        if not profile.followed_at:
-            return LifecycleStage.ESTABLISHED
-
-        try:
-            followed = datetime.fromisoformat(
-                profile.followed_at.replace("Z", "+00:00")
-            ).replace(tzinfo=None)
-            days = (datetime.now() - followed).days
-        except (ValueError, AttributeError):
-            return LifecycleStage.ESTABLISHED
-
-        if days < 7:
-            return LifecycleStage.NEW_FOLLOWER
-        if days < 30:
-            return LifecycleStage.ONBOARDING
-        if days < 180:
-            return LifecycleStage.ESTABLISHED
-
-        # Check if at risk (loyal but declining)
-        if profile.days_since_active > 14:
-            return LifecycleStage.AT_RISK
-
-        return LifecycleStage.LOYAL
+        """Batch add/update followers in a single transaction."""
+        # Last profile per follower id wins, as with INSERT OR REPLACE; the
+        # child-row rewrite would otherwise insert hours/content once per copy
+        profiles = list({f"{p.platform}_{p.user_id}": p for p in profiles}.values())
+        now = datetime.now().isoformat()
+        rows = [self._follower_row(p, now) for p in profiles]
+        rebuild_indexes = len(rows) > _BULK_INDEX_REBUILD_THRESHOLD
+        with self.db:
+            if rebuild_indexes:
+                # Building the secondary indexes once is cheaper than
+                # maintaining them across thousands of upserts
+                self.db.execute("BEGIN")
+                for name in _FOLLOWER_INDEXES:
+                    self.db.execute(f"DROP INDEX IF EXISTS {name}")
+            self.db.executemany(_UPSERT_FOLLOWER_SQL, rows)
+            self._replace_child_rows(profiles)
+            if rebuild_indexes:
+                for sql in _FOLLOWER_INDEXES.values():
+                    self.db.execute(sql)
+        for platform in {p.platform for p in profiles}:
+            self._insights_cache.pop(platform, None)
+        return f"✅ 批量导入 {len(rows)} 粉丝"
+
+    def _replace_child_rows(self, profiles: list[FollowerProfile]):
+        """Rewrite active-hour and content-preference rows for the given profiles."""
+        ids = [(f"{p.platform}_{p.user_id}",) for p in profiles]
+        self.db.executemany(_DELETE_ACTIVE_HOURS_SQL, ids)
+        self.db.executemany(_DELETE_PREFERRED_CONTENT_SQL, ids)
+        self.db.executemany(_INSERT_ACTIVE_HOUR_SQL, [
+            (fid, h) for (fid,), p in zip(ids, profiles) for h in p.active_hours
+        ])
+        self.db.executemany(_INSERT_PREFERRED_CONTENT_SQL, [
+            (fid, ct) for (fid,), p in zip(ids, profiles) for ct in p.preferred_content
+        ])
+
+    def _follower_row(self, profile: FollowerProfile, updated_at: str) -> tuple:
+        """Build the followers-table parameter tuple for a profile."""
+        return (
+            f"{profile.platform}_{profile.user_id}",
+            profile.user_id, profile.username, profile.platform,
+            profile.followed_at, profile.last_active,
+            profile.total_interactions, profile.likes_given,
+            profile.comments_given, profile.shares_given, profile.saves_given,
+            bytes(profile.active_hours),
+            json.dumps(profile.preferred_content),
+            profile.language, profile.country, profile.device,
+            updated_at,
+        )
 
     def get_insights(self, platform: str) -> AudienceInsights:
-        """Generate comprehensive audience insights."""
-        followers = self.db.execute(
-            "SELECT * FROM followers WHERE platform=?", (platform,)
-        ).fetchall()
+        """Generate comprehensive audience insights.
+
+        Results are reused for ``insights_ttl`` seconds, or until followers
+        on the platform are added or updated through this engine.
+        """
+        cached = self._insights_cache.get(platform)
+        if cached and time.monotonic() - cached[0] < self.insights_ttl:
+            return cached[1]
+
+        insights = self._compute_insights(platform)
+        self._insights_cache[platform] = (time.monotonic(), insights)
+        return insights
+
+    def _compute_insights(self, platform: str) -> AudienceInsights:
+        """Aggregate insights from the database and record a snapshot."""
+        # One scan grouped by (tier, country, language), rolled up below
+        total = 0
+        tier_counts: Counter = Counter()
+        tier_interactions: Counter = Counter()
+        country_counts: Counter = Counter()
+        language_counts: Counter = Counter()
+        for tier, country, language, n, interactions in self.db.execute(
+            "SELECT engagement_tier, country, language, COUNT(*), "
+            "TOTAL(total_interactions) FROM followers WHERE platform=? "
+            "GROUP BY engagement_tier, country, language",
+            (platform,)
+        ):
+            total += n
+            tier_counts[tier] += n
+            tier_interactions[tier] += interactions
+            if country:
+                country_counts[country] += n
+            if language:
+                language_counts[language] += n
 
-        total = len(followers)
         if total == 0:
             return AudienceInsights(
                 platform=platform,
@@ -358,59 +622,18 @@ class AudienceEngine:
                 growth_opportunities=["开始导入粉丝数据以获取洞察"],
             )
 
-        # Engagement distribution
-        tier_counts: dict[str, int] = Counter()
-        hourly_engagement: dict[int, list[float]] = defaultdict(list)
-        country_counts: Counter = Counter()
-        language_counts: Counter = Counter()
-        content_scores: dict[str, list[float]] = defaultdict(list)
-
-        for f in followers:
-            tier_counts[f["engagement_tier"]] += 1
-
-            if f["country"]:
-                country_counts[f["country"]] += 1
-            if f["language"]:
-                language_counts[f["language"]] += 1
-
-            try:
-                hours = json.loads(f["active_hours_json"] or "[]")
-                score = f["total_interactions"] or 0
-                for h in hours:
-                    hourly_engagement[h].append(float(score))
-            except (json.JSONDecodeError, TypeError):
-                pass
-
-            try:
-                prefs = json.loads(f["preferred_content_json"] or "[]")
-                score = f["total_interactions"] or 0
-                for ct in prefs:
-                    content_scores[ct].append(float(score))
-            except (json.JSONDecodeError, TypeError):
-                pass
-
         # Top active hours by average engagement
-        top_hours = sorted(
-            [
-                (h, sum(scores) / len(scores))
-                for h, scores in hourly_engagement.items()
-                if scores
-            ],
-            key=lambda x: -x[1],
-        )
+        top_hours = [(h, avg) for h, avg in self.db.execute(
+            _HOURLY_ENGAGEMENT_SQL, (platform, _TOP_N)
+        )]
 
         # Content preferences
-        content_prefs = sorted(
-            [
-                (ct, sum(scores) / len(scores))
-                for ct, scores in content_scores.items()
-                if scores
-            ],
-            key=lambda x: -x[1],
-        )
+        content_prefs = [(ct, avg) for ct, avg in self.db.execute(
+            _CONTENT_ENGAGEMENT_SQL, (platform, _TOP_N)
+        )]
 
         # Build segments
-        segments = self._build_segments(followers, platform)
+        segments = self._build_segments(platform, total, tier_counts, tier_interactions)
 
         # Growth opportunities
         opportunities = self._detect_opportunities(
@@ -425,22 +648,33 @@ class AudienceEngine:
             total_followers=total,
             segments=segments,
             engagement_distribution=dict(tier_counts),
-            top_active_hours=top_hours[:10],
-            top_countries=country_counts.most_common(10),
-            top_languages=language_counts.most_common(10),
-            content_preferences=content_prefs[:10],
+            top_active_hours=top_hours,
+            top_countries=country_counts.most_common(_TOP_N),
+            top_languages=language_counts.most_common(_TOP_N),
+            content_preferences=content_prefs,
             growth_opportunities=opportunities,
         )
 
-    def _build_segments(self, followers: list, platform: str) -> list[AudienceSegment]:
-        """Build audience segments from follower data."""
-        total = len(followers)
+    def _build_segments(
+        self,
+        platform: str,
+        total: int,
+        tier_counts: Counter,
+        tier_interactions: Counter,
+    ) -> list[AudienceSegment]:
+        """Build audience segments from per-tier follower aggregates."""
         segments = []
 
-        # Segment by engagement tier
-        tier_groups: dict[str, list] = defaultdict(list)
-        for f in followers:
-            tier_groups[f["engagement_tier"]].append(f)
+        tier_hours: dict[str, list[int]] = defaultdict(list)
+        for tier, hour, _ in self.db.execute(
+            "SELECT f.engagement_tier, h.hour, COUNT(*) AS cnt "
+            "FROM follower_active_hours h JOIN followers f ON f.id=h.follower_id "
+            "WHERE f.platform=? GROUP BY f.engagement_tier, h.hour "
+            "ORDER BY f.engagement_tier, cnt DESC, MIN(h.rowid)",
+            (platform,)
+        ):
+            if len(tier_hours[tier]) < 3:
+                tier_hours[tier].append(hour)
 
         tier_descriptions = {
             "superfan": "核心粉丝 — 几乎每条内容都互动",
@@ -460,37 +694,17 @@ class AudienceEngine:
             "churned": ["分析流失原因", "考虑再营销广告", "清理无效粉丝提升互动率"],
         }
 
-        for tier, group in tier_groups.items():
-            if not group:
-                continue
-
-            avg_interactions = (
-                sum(f["total_interactions"] or 0 for f in group) / len(group)
-            )
-
-            hours: list[int] = []
-            for f in group:
-                try:
-                    h = json.loads(f["active_hours_json"] or "[]")
-                    hours.extend(h)
-                except (json.JSONDecodeError, TypeError):
-                    pass
-
-            top_hours = [h for h, _ in Counter(hours).most_common(3)]
-
-            import hashlib
-            seg_id = hashlib.md5(f"{platform}_{tier}".encode()).hexdigest()[:10]
-
+        for tier, size in tier_counts.items():
             segments.append(AudienceSegment(
-                id=seg_id,
+                id=_segment_id(platform, tier),
                 name=tier.replace("_", " ").title(),
                 segment_type=SegmentType.ENGAGEMENT,
                 description=tier_descriptions.get(tier, ""),
-                size=len(group),
-                percentage=(len(group) / total) * 100,
-                avg_engagement_rate=avg_interactions,
+                size=size,
+                percentage=(size / total) * 100,
+                avg_engagement_rate=tier_interactions[tier] / size,
                 content_recommendations=tier_recommendations.get(tier, []),
-                top_active_hours=top_hours,
+                top_active_hours=tier_hours[tier],
             ))
 
         segments.sort(key=lambda s: -s.avg_engagement_rate)
@@ -554,28 +768,46 @@ class AudienceEngine:
         return opportunities
 
     def _save_snapshot(self, platform: str, total: int, tier_counts: Counter):
-        """Save audience snapshot for trend tracking."""
-        self.db.execute(
-            "INSERT INTO audience_snapshots "
-            "(platform, total_followers, segment_counts_json, captured_at) "
-            "VALUES (?, ?, ?, ?)",
+        """Queue an audience snapshot for trend tracking.
+
+        Snapshots are flushed once ``snapshot_batch_size`` are pending;
+        call ``flush()`` to force a write.
+        """
+        self._pending_snapshots.append(
             (platform, total, json.dumps(dict(tier_counts)),
+             *(tier_counts.get(tier, 0) for tier in _SNAPSHOT_TIERS),
              datetime.now().isoformat())
         )
-        self.db.commit()
+        if len(self._pending_snapshots) >= self.snapshot_batch_size:
+            self.flush()
+
+    def flush(self) -> int:
+        """Write any buffered audience snapshots to the database."""
+        pending, self._pending_snapshots = self._pending_snapshots, []
+        if pending:
+            with self.db:
+                self.db.executemany(_INSERT_SNAPSHOT_SQL, pending)
+        return len(pending)
 
     def get_growth_trend(self, platform: str, days: int = 30) -> str:
         """Get audience growth trend over time."""
+        self.flush()
         since = (datetime.now() - timedelta(days=days)).isoformat()
+        # Only the first and last snapshot in the window are needed
         rows = self.db.execute(
-            "SELECT total_followers, segment_counts_json, captured_at "
-            "FROM audience_snapshots "
-            "WHERE platform=? AND captured_at>=? ORDER BY captured_at",
+            "SELECT total_followers, superfan_count, active_count, dormant_count, cnt FROM ("
+            "  SELECT total_followers, superfan_count, active_count, dormant_count,"
+            "    ROW_NUMBER() OVER (ORDER BY captured_at, id) AS rn,"
+            "    ROW_NUMBER() OVER (ORDER BY captured_at DESC, id DESC) AS rr,"
+            "    COUNT(*) OVER () AS cnt"
+            "  FROM audience_snapshots WHERE platform=? AND captured_at>=?"
+            ") WHERE rn=1 OR rr=1 ORDER BY rn",
             (platform, since)
         ).fetchall()
 
-        if len(rows) < 2:
-            return f"📈 数据不足 — 需要至少2次快照 (当前: {len(rows)})"
+        count = rows[0]["cnt"] if rows else 0
+        if count < 2:
+            return f"📈 数据不足 — 需要至少2次快照 (当前: {count})"
 
         first = rows[0]
         last = rows[-1]
@@ -585,23 +817,17 @@ class AudienceEngine:
         lines = [
             f"📈 {platform.upper()} {days}天增长趋势",
             f"👥 粉丝: {last['total_followers']:,} ({sign}{growth:,})",
-            f"📅 数据点: {len(rows)}个",
+            f"📅 数据点: {count}个",
         ]
 
         # Segment trend
-        try:
-            first_segs = json.loads(first["segment_counts_json"])
-            last_segs = json.loads(last["segment_counts_json"])
-
-            for tier in ["superfan", "active", "dormant"]:
-                f_cnt = first_segs.get(tier, 0)
-                l_cnt = last_segs.get(tier, 0)
-                diff = l_cnt - f_cnt
-                if diff != 0:
-                    sign = "+" if diff > 0 else ""
-                    lines.append(f"  {tier}: {l_cnt} ({sign}{diff})")
-        except (json.JSONDecodeError, TypeError):
-            pass
+        for tier in ["superfan", "active", "dormant"]:
+            f_cnt = first[f"{tier}_count"] or 0
+            l_cnt = last[f"{tier}_count"] or 0
+            diff = l_cnt - f_cnt
+            if diff != 0:
+                sign = "+" if diff > 0 else ""
+                lines.append(f"  {tier}: {l_cnt} ({sign}{diff})")
 
         return "\n".join(lines)
 
@@ -610,85 +836,80 @@ class AudienceEngine:
     ) -> list[dict]:
         """Find followers similar to a target segment.
 
-        Useful for expanding successful segments.
+        Useful for expanding successful segments. Each result is a follower
+        row as a dict, with ``active_hours`` decoded to a list of hours.
         """
         # Get target segment characteristics
-        target_followers = self.db.execute(
-            "SELECT * FROM followers "
+        target_count, avg_interactions = self.db.execute(
+            "SELECT COUNT(*), AVG(COALESCE(total_interactions, 0)) FROM followers "
             "WHERE platform=? AND engagement_tier=?",
             (platform, target_segment)
-        ).fetchall()
+        ).fetchone()
 
-        if not target_followers:
+        if not target_count:
             return []
 
-        # Calculate average profile of target segment
-        avg_interactions = sum(f["total_interactions"] or 0 for f in target_followers) / len(target_followers)
-
-        # Find non-target followers with similar characteristics
-        candidates = self.db.execute(
-            "SELECT * FROM followers "
-            "WHERE platform=? AND engagement_tier!=? "
-            "ORDER BY ABS(total_interactions - ?) LIMIT ?",
-            (platform, target_segment, avg_interactions, limit)
+        # Walk the interactions index outwards from the target average
+        above = self.db.execute(
+            f"SELECT {_LOOKALIKE_COLUMNS} FROM followers "
+            "WHERE platform=? AND total_interactions>=? AND engagement_tier!=? "
+            "ORDER BY total_interactions ASC LIMIT ?",
+            (platform, avg_interactions, target_segment, limit)
+        ).fetchall()
+        below = self.db.execute(
+            f"SELECT {_LOOKALIKE_COLUMNS} FROM followers "
+            "WHERE platform=? AND total_interactions<? AND engagement_tier!=? "
+            "ORDER BY total_interactions DESC LIMIT ?",
+            (platform, avg_interactions, target_segment, limit)
         ).fetchall()
+        candidates = heapq.nsmallest(
+            limit, above + below,
+            key=lambda c: abs(c["total_interactions"] - avg_interactions),
+        )
 
-        return [dict(c) for c in candidates]
+        results = []
+        for c in candidates:
+            follower = dict(c)
+            follower["active_hours"] = list(c["active_hours"])
+            results.append(follower)
+        return results
 
     def get_segment_content_recs(self, platform: str, tier: str) -> str:
         """Get content recommendations for a specific segment."""
-        count = self.db.execute(
-            "SELECT COUNT(*) as cnt FROM followers "
+        template = _RECS_TEMPLATES.get(tier)
+        if template is None:
+            return f"❓ 未知分层: {tier}"
+
+        n = self.db.execute(
+            "SELECT COUNT(*) FROM followers "
             "WHERE platform=? AND engagement_tier=?",
             (platform, tier)
-        ).fetchone()
-
-        n = count["cnt"] if count else 0
-
-        recs_map = {
-            "superfan": (
-                f"🌟 超级粉丝策略 ({n}人)\n\n"
-                "1. 📌 专属内容 — 提前预览、幕后花絮\n"
-                "2. 🎤 UGC共创 — 邀请参与内容创作\n"
-                "3. 🏆 认可奖励 — 点名感谢、专属称号\n"
-                "4. 💬 深度互动 — 回复每条评论\n"
-                "5. 🎁 专属福利 — 限量商品、提前购"
-            ),
-            "active": (
-                f"🔥 活跃粉丝策略 ({n}人)\n\n"
-                "1. 📊 投票互动 — Story投票、问答\n"
-                "2. 🔄 分享激励 — 分享有奖\n"
-                "3. 📚 系列内容 — 连载型内容保持粘性\n"
-                "4. 🤝 社群感 — 打造归属感\n"
-                "5. 📈 进阶引导 — 向superfan转化"
-            ),
-            "casual": (
-                f"👤 普通粉丝策略 ({n}人)\n\n"
-                "1. 🎣 强Hook — 前3秒/前2行抓住注意力\n"
-                "2. 📱 短内容 — 易消化的快速内容\n"
-                "3. ❓ 提问式 — 降低互动门槛\n"
-                "4. 🎵 趋势跟风 — 追热点、用热门BGM\n"
-                "5. ⏰ 精准时间 — 在其活跃时段发布"
-            ),
-            "passive": (
-                f"😶 潜水粉丝策略 ({n}人)\n\n"
-                "1. 💥 争议观点 — 引发讨论欲望\n"
-                "2. 🎬 视频优先 — 视频比图文更易触达\n"
-                "3. 🏷️ 标签互动 — @提及唤醒\n"
-                "4. 🎯 精准推送 — 根据兴趣定向\n"
-                "5. 📣 付费触达 — 适当广告投放"
-            ),
-            "dormant": (
-                f"💤 沉睡粉丝策略 ({n}人)\n\n"
-                "1. 🔔 唤醒活动 — '好久不见'专题\n"
-                "2. 🎁 限时福利 — 优惠码/抽奖激活\n"
-                "3. 📊 调研问卷 — 了解沉睡原因\n"
-                "4. ✂️ 清理考虑 — 严重影响互动率时清理\n"
-                "5. 🔄 内容转型 — 可能是内容不再匹配"
-            ),
-        }
-
-        return recs_map.get(tier, f"❓ 未知分层: {tier}")
+        ).fetchone()[0]
+        return template.format(n=n)
 
     def close(self):
+        self.flush()
         self.db.close()
+
+
+def _days_since(timestamp: str, now: datetime) -> int:
+    """Whole days between an ISO timestamp and ``now`` (999 if unknown)."""
+    if not timestamp:
+        return 999
+    try:
+        last = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+        return (now - last.replace(tzinfo=None)).days
+    except (ValueError, AttributeError):
+        return 999
+
+
+_SEG_ID_CACHE: dict[tuple[str, str], str] = {}
+
+
+def _segment_id(platform: str, tier: str) -> str:
+    """Stable short segment id for a (platform, tier) pair."""
+    seg_id = _SEG_ID_CACHE.get((platform, tier))
+    if seg_id is None:
+        seg_id = hashlib.md5(f"{platform}_{tier}".encode()).hexdigest()[:10]
+        _SEG_ID_CACHE[(platform, tier)] = seg_id
+    return seg_id
@@ -1,7 +1,8 @@
 """Configuration management with validation."""
 
 import os
-from dataclasses import dataclass, field
+from dataclasses import dataclass
+from functools import cached_property
 
 
 @dataclass
@@ -11,9 +12,12 @@ class TelegramConfig:
 
     def __post_init__(self):
         self.token = os.environ.get("BOT_TOKEN", "")
+        self.validate()
+        self.api_url = f"https://api.telegram.org/bot{self.token}"
+
+    def validate(self):
         if not self.token:
             raise ValueError("BOT_TOKEN environment variable is required")
-        self.api_url = f"https://api.telegram.org/bot{self.token}"
 
 
 @dataclass
@@ -81,11 +85,10 @@ class SchedulerConfig:
 
 @dataclass
 class AppConfig:
-    telegram: TelegramConfig = field(default_factory=TelegramConfig)
-    instagram: InstagramConfig = field(default_factory=InstagramConfig)
-    twitter: TwitterConfig = field(default_factory=TwitterConfig)
-    tiktok: TikTokConfig = field(default_factory=TikTokConfig)
-    scheduler: SchedulerConfig = field(default_factory=SchedulerConfig)
+    """Top-level config; platform sub-configs are built on first access.
+
+    Code that never touches ``telegram`` does not need ``BOT_TOKEN`` set.
+    """
     log_level: str = "INFO"
     data_dir: str = "data"
 
@@ -94,6 +97,26 @@ class AppConfig:
         self.data_dir = os.environ.get("DATA_DIR", "data")
         os.makedirs(self.data_dir, exist_ok=True)
 
+    @cached_property
+    def telegram(self) -> TelegramConfig:
+        return TelegramConfig()
+
+    @cached_property
+    def instagram(self) -> InstagramConfig:
+        return InstagramConfig()
+
+    @cached_property
+    def twitter(self) -> TwitterConfig:
+        return TwitterConfig()
+
+    @cached_property
+    def tiktok(self) -> TikTokConfig:
+        return TikTokConfig()
+
+    @cached_property
+    def scheduler(self) -> SchedulerConfig:
+        return SchedulerConfig()
+
     @property
     def active_platforms(self) -> list[str]:
         platforms = []
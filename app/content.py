@@ -1,6 +1,9 @@
 """Content tools: hashtag research, content ideas, caption generator."""
 
 import random
+import threading
+from functools import lru_cache
+from typing import Optional
 
 
 # Curated hashtag database by niche
@@ -36,6 +39,10 @@ HASHTAG_DB: dict[str, list[str]] = {
     ],
 }
 
+# Flattened tag pool for niches without a direct match
+_ALL_TAGS = [t for tags in HASHTAG_DB.values() for t in tags]
+_NICHE_KEYS = tuple(HASHTAG_DB)
+
 # Content idea templates
 IDEA_TEMPLATES = [
     "📹 「{niche}新手必看的5个坑」",
@@ -74,30 +81,96 @@ CAPTION_TEMPLATES = {
     ],
 }
 
+# Recommended posting windows by platform
+_POSTING_TIMES = {
+    "ig": (
+        "📸 Instagram 最佳发帖时间:\n\n"
+        "🌅 周一-周五: 6:00-9:00, 12:00-14:00\n"
+        "🌆 周六-周日: 9:00-11:00\n"
+        "⭐ 黄金时段: 周三 11:00, 周五 10:00-11:00\n"
+        "💡 Reels最佳: 9:00, 12:00, 19:00"
+    ),
+    "tw": (
+        "🐦 Twitter/X 最佳发帖时间:\n\n"
+        "🌅 周一-周五: 8:00-10:00, 12:00-13:00\n"
+        "🌆 周六: 9:00-11:00\n"
+        "⭐ 黄金时段: 周二-周四 9:00\n"
+        "💡 Thread最佳: 工作日早8:00"
+    ),
+    "tt": (
+        "🎵 TikTok 最佳发帖时间:\n\n"
+        "🌅 周一-周五: 7:00-9:00, 12:00-15:00, 19:00-23:00\n"
+        "🌆 周六-周日: 10:00-14:00, 19:00-23:00\n"
+        "⭐ 黄金时段: 周二 9:00, 周四 12:00, 周五 17:00\n"
+        "💡 提示: 发布后1小时内互动最关键"
+    ),
+}
+
+
+@lru_cache(maxsize=64)
+def _resolve_niche_key(niche_lower: str) -> Optional[str]:
+    """HASHTAG_DB key matching a lower-cased niche, or None."""
+    if niche_lower in HASHTAG_DB:
+        return niche_lower
+    for key in _NICHE_KEYS:
+        if key in niche_lower or niche_lower in key:
+            return key
+    return None
+
+
+_tag_pools = threading.local()
+
+
+def _sample_tags(key: Optional[str], count: int) -> list[str]:
+    """Pick ``count`` random tags from a niche, or from every niche if key is None.
+
+    Runs a partial Fisher-Yates shuffle over a per-thread copy of the pool,
+    so each call makes ``count`` swaps instead of copying the whole pool.
+    """
+    pools = getattr(_tag_pools, "pools", None)
+    if pools is None:
+        pools = _tag_pools.pools = {}
+    pool = pools.get(key)
+    if pool is None:
+        pool = pools[key] = list(_ALL_TAGS if key is None else HASHTAG_DB[key])
+
+    n = len(pool)
+    k = min(count, n)
+    randrange = random.randrange
+    for i in range(k):
+        j = randrange(i, n)
+        pool[i], pool[j] = pool[j], pool[i]
+    return pool[:k]
+
 
 def suggest_hashtags(niche: str, count: int = 15) -> str:
     """Get hashtag suggestions for a niche."""
     niche_lower = niche.lower().strip()
 
     # Direct match
-    for key, tags in HASHTAG_DB.items():
-        if key in niche_lower or niche_lower in key:
-            selected = random.sample(tags, min(count, len(tags)))
-            return f"🏷️ {niche} 推荐标签 ({len(selected)}个):\n\n" + " ".join(selected)
+    key = _resolve_niche_key(niche_lower)
+    if key is not None:
+        selected = _sample_tags(key, count)
+        return f"🏷️ {niche} 推荐标签 ({len(selected)}个):\n\n" + " ".join(selected)
 
     # Mix from all
-    all_tags = [t for tags in HASHTAG_DB.values() for t in tags]
-    selected = random.sample(all_tags, min(count, len(all_tags)))
+    selected = _sample_tags(None, count)
     return "🏷️ 热门标签:\n\n" + " ".join(selected)
 
 
+@lru_cache(maxsize=32)
+def _ideas_for(niche: str) -> tuple[str, ...]:
+    """IDEA_TEMPLATES with the niche filled in."""
+    return tuple(t.replace("{niche}", niche) for t in IDEA_TEMPLATES)
+
+
 def generate_ideas(niche: str, count: int = 7) -> str:
     """Generate content ideas for a niche."""
     niche = niche.strip() or "ecommerce"
-    selected = random.sample(IDEA_TEMPLATES, min(count, len(IDEA_TEMPLATES)))
+    ideas = _ideas_for(niche)
+    selected = random.sample(ideas, min(count, len(ideas)))
     lines = [f"💡 {niche} 内容灵感:\n"]
-    for i, tmpl in enumerate(selected, 1):
-        lines.append(f"{i}. {tmpl.format(niche=niche)}")
+    lines += [f"{i}. {idea}" for i, idea in enumerate(selected, 1)]
     return "\n".join(lines)
 
 
@@ -109,15 +182,7 @@ def generate_caption(platform: str, topic: str, body: str = "",
     template = random.choice(templates)
 
     # Get relevant hashtags
-    niche_lower = niche.lower()
-    hashtags = []
-    for key, tags in HASHTAG_DB.items():
-        if key in niche_lower or niche_lower in key:
-            hashtags = random.sample(tags, min(5, len(tags)))
-            break
-    if not hashtags:
-        all_tags = [t for tags in HASHTAG_DB.values() for t in tags]
-        hashtags = random.sample(all_tags, 5)
+    hashtags = _sample_tags(_resolve_niche_key(niche.lower()), 5)
 
     return template.format(
         topic=topic,
@@ -128,27 +193,4 @@ def generate_caption(platform: str, topic: str, body: str = "",
 
 def get_best_posting_times(platform: str) -> str:
     """Get recommended posting times by platform."""
-    times = {
-        "ig": (
-            "📸 Instagram 最佳发帖时间:\n\n"
-            "🌅 周一-周五: 6:00-9:00, 12:00-14:00\n"
-            "🌆 周六-周日: 9:00-11:00\n"
-            "⭐ 黄金时段: 周三 11:00, 周五 10:00-11:00\n"
-            "💡 Reels最佳: 9:00, 12:00, 19:00"
-        ),
-        "tw": (
-            "🐦 Twitter/X 最佳发帖时间:\n\n"
-            "🌅 周一-周五: 8:00-10:00, 12:00-13:00\n"
-            "🌆 周六: 9:00-11:00\n"
-            "⭐ 黄金时段: 周二-周四 9:00\n"
-            "💡 Thread最佳: 工作日早8:00"
-        ),
-        "tt": (
-            "🎵 TikTok 最佳发帖时间:\n\n"
-            "🌅 周一-周五: 7:00-9:00, 12:00-15:00, 19:00-23:00\n"
-            "🌆 周六-周日: 10:00-14:00, 19:00-23:00\n"
-            "⭐ 黄金时段: 周二 9:00, 周四 12:00, 周五 17:00\n"
-            "💡 提示: 发布后1小时内互动最关键"
-        ),
-    }
-    return times.get(platform.lower(), "📊 请指定平台: ig, tw, tt")
+    return _POSTING_TIMES.get(platform.lower(), "📊 请指定平台: ig, tw, tt")
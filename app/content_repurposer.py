@@ -10,12 +10,25 @@ Supported conversions:
 - Any text → Platform-optimized version
 """
 
+import random
 import re
+from bisect import bisect_left
 from dataclasses import dataclass, field
 from enum import Enum
+from functools import lru_cache
+from typing import NamedTuple
 
 
 class Platform(str, Enum):
+    ordinal: int
+
+    def __new__(cls, value: str):
+        member = str.__new__(cls, value)
+        member._value_ = value
+        # Definition order, used to index the per-platform tuples below
+        member.ordinal = len(cls.__members__)
+        return member
+
     TWITTER = "twitter"
     INSTAGRAM = "instagram"
     TIKTOK = "tiktok"
@@ -25,14 +38,20 @@ class Platform(str, Enum):
     THREADS = "threads"
 
 
-PLATFORM_LIMITS = {
-    Platform.TWITTER: {"chars": 280, "hashtags": 3, "mentions": 5},
-    Platform.INSTAGRAM: {"chars": 2200, "hashtags": 30, "mentions": 20},
-    Platform.TIKTOK: {"chars": 2200, "hashtags": 5, "mentions": 5},
-    Platform.LINKEDIN: {"chars": 3000, "hashtags": 5, "mentions": 10},
-    Platform.FACEBOOK: {"chars": 63206, "hashtags": 5, "mentions": 20},
-    Platform.YOUTUBE: {"chars": 5000, "hashtags": 15, "mentions": 0},
-    Platform.THREADS: {"chars": 500, "hashtags": 5, "mentions": 5},
+class PlatformLimits(NamedTuple):
+    chars: int
+    hashtags: int
+    mentions: int
+
+
+PLATFORM_LIMITS: dict[Platform, PlatformLimits] = {
+    Platform.TWITTER: PlatformLimits(chars=280, hashtags=3, mentions=5),
+    Platform.INSTAGRAM: PlatformLimits(chars=2200, hashtags=30, mentions=20),
+    Platform.TIKTOK: PlatformLimits(chars=2200, hashtags=5, mentions=5),
+    Platform.LINKEDIN: PlatformLimits(chars=3000, hashtags=5, mentions=10),
+    Platform.FACEBOOK: PlatformLimits(chars=63206, hashtags=5, mentions=20),
+    Platform.YOUTUBE: PlatformLimits(chars=5000, hashtags=15, mentions=0),
+    Platform.THREADS: PlatformLimits(chars=500, hashtags=5, mentions=5),
 }
 
 PLATFORM_EMOJI = {
@@ -45,6 +64,15 @@ PLATFORM_EMOJI = {
     Platform.THREADS: "🧵",
 }
 
+_PLATFORM_BY_VALUE = {p.value: p for p in Platform}
+
+# Per-platform tables indexed by Platform.ordinal for the hot paths
+_LIMITS_BY_ORDINAL = tuple(PLATFORM_LIMITS[p] for p in Platform)
+# First line of RepurposedContent.formatted()
+_HEADER_BY_ORDINAL = tuple(
+    f"{PLATFORM_EMOJI[p]} {p.value.upper()} 版本" for p in Platform
+)
+
 # Tone adjustments per platform
 TONE_GUIDE = {
     Platform.TWITTER: "concise, witty, conversational, thread-worthy",
@@ -56,8 +84,35 @@ TONE_GUIDE = {
     Platform.THREADS: "casual, brief, conversation-starting",
 }
 
+_HASHTAG_WITH_WS_RE = re.compile(r"\s*#(\w+)")
+_MENTION_RE = re.compile(r"@(\w+)")
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+")
+_SENTENCE_END_RE = re.compile(r"[.!?] |\n")
+# Break points tried by truncate_smart, in order of preference
+_SENTENCE_ENDS = (". ", "! ", "? ", "\n")
+_MULTI_NL_RE = re.compile(r"\n{2,}")
+_TRIPLE_NL_RE = re.compile(r"\n{3,}")
+
+# Phrase rewrites applied by _adapt_tone, one regex pass per platform
+_TWITTER_VERBOSE_RE = re.compile("|".join(re.escape(p) for p in (
+    "In this post, I'll discuss ",
+    "Today I want to share ",
+    "Let me explain ",
+    "I'd like to talk about ",
+)))
+_TT_MAP = {
+    "Therefore, ": "So ",
+    "Furthermore, ": "Plus, ",
+    "However, ": "But ",
+    "In conclusion, ": "Bottom line: ",
+}
+_TT_SUB_RE = re.compile("|".join(re.escape(k) for k in _TT_MAP))
+
+# Trailer appended after each result in format_repurpose_report()
+_REPORT_SEPARATOR = "\n\n" + "─" * 40 + "\n"
 
-@dataclass
+
+@dataclass(slots=True)
 class RepurposedContent:
     """Result of content repurposing."""
     original_platform: Platform
@@ -76,42 +131,45 @@ class RepurposedContent:
         self.char_count = len(self.adapted_text)
 
     def formatted(self) -> str:
-        emoji = PLATFORM_EMOJI.get(self.target_platform, "📝")
         lines = [
-            f"{emoji} {self.target_platform.value.upper()} 版本",
+            _HEADER_BY_ORDINAL[self.target_platform.ordinal],
             f"({self.char_count} chars)",
             "",
             self.adapted_text,
         ]
         if self.hashtags:
-            lines.append("")
-            lines.append(" ".join(f"#{t}" for t in self.hashtags))
+            lines += ("", " ".join([f"#{t}" for t in self.hashtags]))
         if self.cta:
-            lines.append("")
-            lines.append(f"📢 CTA: {self.cta}")
+            lines += ("", f"📢 CTA: {self.cta}")
         if self.is_thread and self.thread_parts:
-            lines.append("")
-            lines.append(f"🧵 Thread ({len(self.thread_parts)} parts):")
-            for i, part in enumerate(self.thread_parts, 1):
-                lines.append(f"  {i}/{len(self.thread_parts)}: {part[:80]}...")
+            total = len(self.thread_parts)
+            lines += ("", f"🧵 Thread ({total} parts):")
+            lines += [
+                f"  {i}/{total}: {part[:80]}..."
+                for i, part in enumerate(self.thread_parts, 1)
+            ]
         if self.suggestions:
-            lines.append("")
-            lines.append("💡 建议:")
-            for s in self.suggestions:
-                lines.append(f"  • {s}")
+            lines += ("", "💡 建议:")
+            lines += [f"  • {s}" for s in self.suggestions]
         return "\n".join(lines)
 
 
 def extract_hashtags(text: str) -> tuple[str, list[str]]:
     """Extract hashtags from text, return cleaned text and hashtags list."""
-    hashtags = re.findall(r"#(\w+)", text)
-    cleaned = re.sub(r"\s*#\w+", "", text).strip()
-    return cleaned, hashtags
+    out: list[str] = []
+    hashtags: list[str] = []
+    pos = 0
+    for m in _HASHTAG_WITH_WS_RE.finditer(text):
+        out.append(text[pos:m.start()])
+        hashtags.append(m.group(1))
+        pos = m.end()
+    out.append(text[pos:])
+    return "".join(out).strip(), hashtags
 
 
 def extract_mentions(text: str) -> tuple[str, list[str]]:
     """Extract @mentions from text."""
-    mentions = re.findall(r"@(\w+)", text)
+    mentions = _MENTION_RE.findall(text)
     return text, mentions
 
 
@@ -121,11 +179,14 @@ def truncate_smart(text: str, max_chars: int, suffix: str = "...") -> str:
         return text
 
     target = max_chars - len(suffix)
-    # Try to break at sentence
-    for sep in [". ", "! ", "? ", "\n"]:
-        idx = text.rfind(sep, 0, target)
-        if idx > target * 0.5:
-            return text[: idx + 1].rstrip() + suffix
+    # Try to break at sentence: one scan over the back half of the window
+    # records the last position of each break point
+    last: dict[str, int] = {}
+    for m in _SENTENCE_END_RE.finditer(text, max(target // 2 + 1, 0), target):
+        last[m.group()] = m.start()
+    for sep in _SENTENCE_ENDS:
+        if sep in last:
+            return text[: last[sep] + 1].rstrip() + suffix
 
     # Break at word boundary
     idx = text.rfind(" ", 0, target)
@@ -138,21 +199,26 @@ def truncate_smart(text: str, max_chars: int, suffix: str = "...") -> str:
 def split_into_thread(text: str, max_per_part: int = 270) -> list[str]:
     """Split long text into tweet-thread parts."""
     clean, hashtags = extract_hashtags(text)
-    sentences = re.split(r"(?<=[.!?])\s+", clean)
+    sentences = _SENTENCE_SPLIT_RE.split(clean)
 
     parts: list[str] = []
-    current = ""
+    # Sentences of the part being built; joined only when the part closes
+    current: list[str] = []
+    current_len = 0
 
     for sentence in sentences:
-        if len(current) + len(sentence) + 1 > max_per_part:
+        size = len(sentence)
+        if current_len + size + 1 > max_per_part:
             if current:
-                parts.append(current.strip())
-            current = sentence
-        else:
-            current = f"{current} {sentence}".strip() if current else sentence
+                parts.append(" ".join(current))
+            current = [sentence] if sentence else []
+            current_len = size
+        elif sentence:
+            current_len += size + 1 if current else size
+            current.append(sentence)
 
     if current:
-        parts.append(current.strip())
+        parts.append(" ".join(current))
 
     # Add counter prefix
     total = len(parts)
@@ -161,149 +227,101 @@ def split_into_thread(text: str, max_per_part: int = 270) -> list[str]:
 
     # Add hashtags to last part if room
     if hashtags and parts:
-        tag_str = " " + " ".join(f"#{t}" for t in hashtags[:3])
+        tag_str = " " + " ".join([f"#{t}" for t in hashtags[:3]])
         if len(parts[-1]) + len(tag_str) <= max_per_part:
             parts[-1] += tag_str
 
     return parts
 
 
-def _add_hook(text: str, platform: Platform) -> str:
-    """Add a platform-appropriate hook to the beginning."""
-    hooks = {
-        Platform.TWITTER: [
-            "🧵", "Hot take:", "Unpopular opinion:", "This →",
-            "Thread:", "Let's talk about", "PSA:",
-        ],
-        Platform.TIKTOK: [
-            "Wait for it...", "POV:", "Storytime:", "Nobody talks about this but",
-            "This changed everything:", "Life hack:",
-        ],
-        Platform.INSTAGRAM: [
-            "✨", "Save this for later 📌", "Real talk:",
-            "Swipe for more →", "The truth about",
-        ],
-        Platform.LINKEDIN: [
-            "I learned something important:", "Here's what nobody tells you about",
-            "After years in this industry:", "3 lessons:",
-            "A thread on", "Controversial take:",
-        ],
-    }
-    platform_hooks = hooks.get(platform, [])
-    if not platform_hooks:
-        return text
-
-    # Don't add hook if text already starts with an emoji or hook-like text
-    if text and (text[0] in "🧵🔥💡✨📌🎯💰" or text.startswith(("Thread", "Hot take", "POV"))):
-        return text
-
-    return text  # Return as-is; hooks are provided in suggestions
-
-
 def _adapt_tone(text: str, source: Platform, target: Platform) -> str:
     """Adapt text tone for target platform."""
     adapted = text
 
     if target == Platform.TWITTER:
         # Make concise
-        adapted = re.sub(r"\n{2,}", "\n", adapted)
+        adapted = _MULTI_NL_RE.sub("\n", adapted)
         # Remove verbose phrases
-        verbose = [
-            "In this post, I'll discuss ",
-            "Today I want to share ",
-            "Let me explain ",
-            "I'd like to talk about ",
-        ]
-        for phrase in verbose:
-            adapted = adapted.replace(phrase, "")
+        adapted = _TWITTER_VERBOSE_RE.sub("", adapted)
 
     elif target == Platform.LINKEDIN:
         # Add line breaks for readability
-        sentences = re.split(r"(?<=[.!?])\s+", adapted)
+        sentences = _SENTENCE_SPLIT_RE.split(adapted)
         if len(sentences) > 3:
             # LinkedIn loves one-sentence paragraphs
             adapted = "\n\n".join(sentences)
 
     elif target == Platform.TIKTOK:
         # Keep it short and punchy
-        adapted = re.sub(r"\n{2,}", "\n", adapted)
+        adapted = _MULTI_NL_RE.sub("\n", adapted)
         # Remove formal language
-        adapted = adapted.replace("Therefore, ", "So ")
-        adapted = adapted.replace("Furthermore, ", "Plus, ")
-        adapted = adapted.replace("However, ", "But ")
-        adapted = adapted.replace("In conclusion, ", "Bottom line: ")
+        adapted = _TT_SUB_RE.sub(lambda m: _TT_MAP[m.group(0)], adapted)
 
     elif target == Platform.INSTAGRAM:
         # Add emoji spacing
-        adapted = re.sub(r"\n{3,}", "\n\n", adapted)
+        adapted = _TRIPLE_NL_RE.sub("\n\n", adapted)
 
     return adapted.strip()
 
 
+_CTAS = {
+    Platform.TWITTER: (
+        "RT if you agree 🔄",
+        "Like + Follow for more",
+        "Thoughts? 👇",
+        "Drop a 🔥 if this helped",
+    ),
+    Platform.INSTAGRAM: (
+        "Save this for later 📌",
+        "Tag someone who needs this ❤️",
+        "Link in bio 👆",
+        "Double tap if you agree 💛",
+        "Follow for more tips ✨",
+    ),
+    Platform.TIKTOK: (
+        "Follow for Part 2!",
+        "Comment what you want to see next 👇",
+        "Share with someone who needs this",
+        "Like if this helped 🙏",
+    ),
+    Platform.LINKEDIN: (
+        "Follow for more insights",
+        "Agree? Disagree? Let me know below",
+        "♻️ Repost to share with your network",
+        "What would you add to this list?",
+    ),
+    Platform.FACEBOOK: (
+        "Share with someone who needs this!",
+        "What do you think? Comment below 👇",
+        "Like this page for more!",
+    ),
+}
+_CTAS_BY_ORDINAL = tuple(
+    _CTAS.get(p, ("Let me know your thoughts!",)) for p in Platform
+)
+
+
 def _generate_cta(platform: Platform, niche: str = "") -> str:
     """Generate platform-specific call-to-action."""
-    ctas = {
-        Platform.TWITTER: [
-            "RT if you agree 🔄",
-            "Like + Follow for more",
-            "Thoughts? 👇",
-            "Drop a 🔥 if this helped",
-        ],
-        Platform.INSTAGRAM: [
-            "Save this for later 📌",
-            "Tag someone who needs this ❤️",
-            "Link in bio 👆",
-            "Double tap if you agree 💛",
-            "Follow for more tips ✨",
-        ],
-        Platform.TIKTOK: [
-            "Follow for Part 2!",
-            "Comment what you want to see next 👇",
-            "Share with someone who needs this",
-            "Like if this helped 🙏",
-        ],
-        Platform.LINKEDIN: [
-            "Follow for more insights",
-            "Agree? Disagree? Let me know below",
-            "♻️ Repost to share with your network",
-            "What would you add to this list?",
-        ],
-        Platform.FACEBOOK: [
-            "Share with someone who needs this!",
-            "What do you think? Comment below 👇",
-            "Like this page for more!",
-        ],
-    }
-    import random
-    options = ctas.get(platform, ["Let me know your thoughts!"])
-    return random.choice(options)
+    return random.choice(_CTAS_BY_ORDINAL[platform.ordinal])
+
+
+# Platform-specific always-add tags
+_MUST_ADD_TAGS_BY_ORDINAL = tuple(
+    ["fyp", "foryou"] if p == Platform.TIKTOK else [] for p in Platform
+)
 
 
 def _select_hashtags(
     source_tags: list[str], target: Platform, niche: str = ""
 ) -> list[str]:
     """Select and limit hashtags for target platform."""
-    limit = PLATFORM_LIMITS.get(target, {}).get("hashtags", 5)
-
-    # Platform-specific always-add tags
-    platform_tags = {
-        Platform.TIKTOK: ["fyp", "foryou"],
-        Platform.INSTAGRAM: [],
-        Platform.TWITTER: [],
-        Platform.LINKEDIN: [],
-    }
-    must_add = platform_tags.get(target, [])
+    limit = _LIMITS_BY_ORDINAL[target.ordinal].hashtags
+    must_add = _MUST_ADD_TAGS_BY_ORDINAL[target.ordinal]
 
-    # Combine: must-add + source tags (deduplicated)
-    seen = set()
-    result = []
-    for tag in must_add + source_tags:
-        tag_lower = tag.lower().lstrip("#")
-        if tag_lower not in seen:
-            seen.add(tag_lower)
-            result.append(tag_lower)
-
-    return result[:limit]
+    # Combine: must-add + source tags (deduplicated, first occurrence wins)
+    stream = (t.lower().lstrip("#") for t in must_add + source_tags)
+    return list(dict.fromkeys(stream))[:limit]
 
 
 def repurpose(
@@ -323,15 +341,28 @@ def repurpose(
     Returns:
         RepurposedContent with adapted text and metadata
     """
-    # Extract existing hashtags and mentions
     clean_text, source_tags = extract_hashtags(text)
-    _, mentions = extract_mentions(clean_text)
+    return _repurpose_extracted(text, clean_text, source_tags, source, target, niche)
+
+
+def _repurpose_extracted(
+    text: str,
+    clean_text: str,
+    source_tags: list[str],
+    source: Platform,
+    target: Platform,
+    niche: str,
+) -> RepurposedContent:
+    """repurpose() with the hashtag extraction of text already done.
 
+    Callers converting one text to several targets extract once and share
+    clean_text/source_tags across the calls.
+    """
     # Adapt tone
     adapted = _adapt_tone(clean_text, source, target)
 
     # Handle length constraints
-    max_chars = PLATFORM_LIMITS.get(target, {}).get("chars", 2000)
+    max_chars = _LIMITS_BY_ORDINAL[target.ordinal].chars
     is_thread = False
     thread_parts: list[str] = []
 
@@ -369,24 +400,38 @@ def repurpose(
     )
 
 
+# Text lengths at which _build_suggestions() changes its advice
+_SUGGESTION_LENGTHS = (280, 300, 500)
+
+
 def _build_suggestions(source: Platform, target: Platform, text: str) -> list[str]:
     """Generate platform-specific adaptation suggestions."""
+    length_bucket = bisect_left(_SUGGESTION_LENGTHS, len(text))
+    return list(_suggestions_for(source, target, length_bucket))
+
+
+@lru_cache(maxsize=128)
+def _suggestions_for(
+    source: Platform, target: Platform, length_bucket: int
+) -> tuple[str, ...]:
+    """Suggestions for a text longer than the first length_bucket thresholds."""
+    longer_than = _SUGGESTION_LENGTHS[:length_bucket]
     suggestions = []
 
     if target == Platform.INSTAGRAM:
         suggestions.append("添加高质量配图或轮播图提升互动")
-        if len(text) > 500:
+        if 500 in longer_than:
             suggestions.append("考虑做成轮播图(Carousel)，每页一个要点")
         suggestions.append("前125字最重要——'更多'折叠前的hook")
 
     elif target == Platform.TIKTOK:
         suggestions.append("前3秒是关键——用strong hook开场")
         suggestions.append("考虑用画外音+字幕文本叠加")
-        if len(text) > 300:
+        if 300 in longer_than:
             suggestions.append("内容较长，建议拆分为系列(Part 1/2/3)")
 
     elif target == Platform.TWITTER:
-        if len(text) > 280:
+        if 280 in longer_than:
             suggestions.append("内容已自动拆分为Thread")
         suggestions.append("添加一张信息图会提升RT率2-3倍")
         suggestions.append("考虑使用Twitter Poll增加互动")
@@ -407,16 +452,17 @@ def _build_suggestions(source: Platform, target: Platform, text: str) -> list[st
     if source == Platform.INSTAGRAM and target == Platform.TWITTER:
         suggestions.append("提炼Instagram长文的核心观点做精简版")
 
-    return suggestions
+    return tuple(suggestions)
 
 
 def repurpose_to_all(text: str, source: Platform, niche: str = "") -> list[RepurposedContent]:
     """Repurpose content to all other platforms."""
-    results = []
-    for target in Platform:
-        if target != source:
-            results.append(repurpose(text, source, target, niche))
-    return results
+    clean_text, source_tags = extract_hashtags(text)
+    return [
+        _repurpose_extracted(text, clean_text, source_tags, source, target, niche)
+        for target in Platform
+        if target != source
+    ]
 
 
 def batch_repurpose(
@@ -424,14 +470,22 @@ def batch_repurpose(
 ) -> list[RepurposedContent]:
     """Batch repurpose multiple content items.
 
-    Each item should have: {'text': str, 'source': str}
+    Each item should have: {'text': str, 'source': str}. Unknown sources
+    are treated as twitter.
     """
     results = []
+    # Duplicate texts in a batch share one hashtag extraction
+    extracted: dict[str, tuple[str, list[str]]] = {}
     for item in items:
         text = item.get("text", "")
-        source = Platform(item.get("source", "twitter"))
         if text:
-            results.append(repurpose(text, source, target, niche))
+            source = _PLATFORM_BY_VALUE.get(item.get("source", "twitter"), Platform.TWITTER)
+            if text not in extracted:
+                extracted[text] = extract_hashtags(text)
+            clean_text, source_tags = extracted[text]
+            results.append(_repurpose_extracted(
+                text, clean_text, source_tags, source, target, niche
+            ))
     return results
 
 
@@ -440,11 +494,7 @@ def format_repurpose_report(results: list[RepurposedContent]) -> str:
     if not results:
         return "📝 没有内容需要转换"
 
-    lines = [f"🔄 内容复用报告 ({len(results)} 个平台)\n"]
-    for r in results:
-        lines.append(r.formatted())
-        lines.append("")
-        lines.append("─" * 40)
-        lines.append("")
-
-    return "\n".join(lines)
+    header = f"🔄 内容复用报告 ({len(results)} 个平台)\n"
+    return header + "\n" + "\n".join(
+        [r.formatted() + _REPORT_SEPARATOR for r in results]
+    )
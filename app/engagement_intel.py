@@ -12,10 +12,16 @@ Features:
 - Engagement decay analysis
 - Competitor benchmarking
 """
-import statistics
+import heapq
+import sqlite3
+from bisect import bisect_left, bisect_right
 from dataclasses import dataclass, field
 from enum import Enum
 from datetime import datetime
+from functools import lru_cache
+from itertools import accumulate
+from pathlib import Path
+from typing import Optional
 
 
 class ContentType(str, Enum):
@@ -48,7 +54,7 @@ PLATFORM_BENCHMARKS = {
 }
 
 
-@dataclass
+@dataclass(slots=True)
 class PostMetrics:
     """Metrics for a single post."""
     post_id: str = ""
@@ -92,7 +98,19 @@ class PostMetrics:
         return (self.total_engagement / self.reach) * 100
 
 
-@dataclass
+_DAY_NAMES = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+_SUMMARY_TMPL = (
+    "📊 Engagement Report — {platform}\n"
+    "Period: {period_days} days, {total_posts} posts\n"
+    "Avg Engagement: {avg_rate:.2f}%\n"
+    "Performance: {level}\n"
+    "Best content: {content_type}\n"
+    "Best time: {day} at {hour}:00"
+    "{hashtags}{recommendations}"
+)
+
+
+@dataclass(slots=True)
 class EngagementReport:
     """Comprehensive engagement analysis report."""
     platform: str
@@ -110,140 +128,263 @@ class EngagementReport:
     recommendations: list[str] = field(default_factory=list)
 
     def summary(self) -> str:
-        days = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
-        lines = [
-            f"📊 Engagement Report — {self.platform.upper()}",
-            f"Period: {self.period_days} days, {self.total_posts} posts",
-            f"Avg Engagement: {self.avg_engagement_rate:.2f}%",
-            f"Performance: {self.performance_level.value.upper()}",
-            f"Best content: {self.best_content_type.value}",
-            f"Best time: {days[self.best_posting_day]} at {self.best_posting_hour}:00",
-        ]
+        hashtags = ""
         if self.top_hashtags:
-            lines.append("Top hashtags: " + ", ".join(
+            hashtags = "\nTop hashtags: " + ", ".join(
                 f"#{h} ({r:.1f}%)" for h, r in self.top_hashtags[:5]
-            ))
+            )
+        recommendations = ""
         if self.recommendations:
-            lines.append("\n💡 Recommendations:")
-            for r in self.recommendations:
-                lines.append(f"  • {r}")
-        return "\n".join(lines)
+            recommendations = "\n\n💡 Recommendations:\n  • " + "\n  • ".join(self.recommendations)
+        return _SUMMARY_TMPL.format(
+            platform=self.platform.upper(),
+            period_days=self.period_days,
+            total_posts=self.total_posts,
+            avg_rate=self.avg_engagement_rate,
+            level=self.performance_level.value.upper(),
+            content_type=self.best_content_type.value,
+            day=_DAY_NAMES[self.best_posting_day],
+            hour=self.best_posting_hour,
+            hashtags=hashtags,
+            recommendations=recommendations,
+        )
+
+
+# Tier i is reached once the rate is >= the i-th threshold of _tier_thresholds()
+_TIER_LEVELS = (
+    PerformanceLevel.UNDERPERFORMING,
+    PerformanceLevel.LOW,
+    PerformanceLevel.AVERAGE,
+    PerformanceLevel.HIGH,
+    PerformanceLevel.VIRAL,
+)
+_TIER_VIRAL_POINTS = (0, 0, 10, 25, 40)
+
+
+@lru_cache(maxsize=32)
+def _tier_thresholds(platform: str) -> tuple[float, float, float, float]:
+    """Ascending tier thresholds for a platform, defaulting to instagram."""
+    b = PLATFORM_BENCHMARKS.get(platform, PLATFORM_BENCHMARKS["instagram"])
+    return b["avg_rate"] * 0.5, b["avg_rate"], b["good_rate"], b["viral_rate"]
 
 
 def classify_performance(rate: float, platform: str) -> PerformanceLevel:
     """Classify engagement rate against platform benchmarks."""
-    benchmarks = PLATFORM_BENCHMARKS.get(platform, PLATFORM_BENCHMARKS["instagram"])
-    if rate >= benchmarks["viral_rate"]:
-        return PerformanceLevel.VIRAL
-    if rate >= benchmarks["good_rate"]:
-        return PerformanceLevel.HIGH
-    if rate >= benchmarks["avg_rate"]:
-        return PerformanceLevel.AVERAGE
-    if rate >= benchmarks["avg_rate"] * 0.5:
-        return PerformanceLevel.LOW
-    return PerformanceLevel.UNDERPERFORMING
+    return _TIER_LEVELS[bisect_right(_tier_thresholds(platform), rate)]
 
 
 def viral_potential_score(metrics: PostMetrics) -> float:
     """Calculate viral potential score (0-100) based on early engagement signals."""
-    score = 0.0
-
     # High engagement rate
-    er = metrics.engagement_rate
-    benchmarks = PLATFORM_BENCHMARKS.get(metrics.platform, PLATFORM_BENCHMARKS["instagram"])
-    if er >= benchmarks["viral_rate"]:
-        score += 40
-    elif er >= benchmarks["good_rate"]:
-        score += 25
-    elif er >= benchmarks["avg_rate"]:
-        score += 10
-
-    # Share ratio (shares indicate viral spread)
-    if metrics.total_engagement > 0:
-        share_ratio = metrics.shares / metrics.total_engagement
-        score += min(share_ratio * 100, 30)
-
-    # Save ratio (saves indicate value)
-    if metrics.total_engagement > 0:
-        save_ratio = metrics.saves / metrics.total_engagement
-        score += min(save_ratio * 50, 15)
-
-    # Comment ratio (comments indicate discussion)
-    if metrics.total_engagement > 0:
-        comment_ratio = metrics.comments / metrics.total_engagement
-        score += min(comment_ratio * 30, 15)
+    tier = bisect_right(_tier_thresholds(metrics.platform), metrics.engagement_rate)
+    score = float(_TIER_VIRAL_POINTS[tier])
+
+    total = metrics.total_engagement
+    if total > 0:
+        # Share ratio (shares indicate viral spread)
+        score += min(metrics.shares / total * 100, 30)
+        # Save ratio (saves indicate value)
+        score += min(metrics.saves / total * 50, 15)
+        # Comment ratio (comments indicate discussion)
+        score += min(metrics.comments / total * 30, 15)
 
     return min(100.0, max(0.0, score))
 
 
+def _engagement_rates(posts: list[PostMetrics]) -> list[float]:
+    """Engagement rate of each post, computed once and shared by the analyzers."""
+    return [p.engagement_rate for p in posts]
+
+
+def _bucket_averages(sums: list[float], counts: list[int]) -> dict[int, float]:
+    return {i: (s / c) if c else 0.0 for i, (s, c) in enumerate(zip(sums, counts))}
+
+
+@lru_cache(maxsize=4096)
+def _hour_and_weekday(posted_at: str) -> Optional[tuple[int, int]]:
+    """(hour, weekday) of an ISO timestamp, or None if it does not parse.
+
+    Cached because reports are typically re-run over the same post history.
+    """
+    try:
+        dt = datetime.fromisoformat(posted_at.replace("Z", "+00:00"))
+    except (ValueError, AttributeError):
+        return None
+    return dt.hour, dt.weekday()
+
+
 def optimal_posting_times(posts: list[PostMetrics]) -> dict:
     """Analyze posting history to find optimal times.
 
     Returns dict with 'hourly' and 'daily' engagement averages.
     """
-    hourly: dict[int, list[float]] = {h: [] for h in range(24)}
-    daily: dict[int, list[float]] = {d: [] for d in range(7)}
+    return _optimal_posting_times(posts, _engagement_rates(posts))
+
 
-    for post in posts:
+def _optimal_posting_times(posts: list[PostMetrics], rates: list[float]) -> dict:
+    # Running sum and count per hour / weekday bucket
+    hour_sums, hour_counts = [0.0] * 24, [0] * 24
+    day_sums, day_counts = [0.0] * 7, [0] * 7
+
+    for post, rate in zip(posts, rates):
         if not post.posted_at:
             continue
-        try:
-            dt = datetime.fromisoformat(post.posted_at.replace("Z", "+00:00"))
-        except (ValueError, AttributeError):
+        parsed = _hour_and_weekday(post.posted_at)
+        if parsed is None:
             continue
-        hourly[dt.hour].append(post.engagement_rate)
-        daily[dt.weekday()].append(post.engagement_rate)
+        hour, day = parsed
+        hour_sums[hour] += rate
+        hour_counts[hour] += 1
+        day_sums[day] += rate
+        day_counts[day] += 1
 
-    hourly_avg = {
-        h: (sum(rates) / len(rates)) if rates else 0.0
-        for h, rates in hourly.items()
-    }
-    daily_avg = {
-        d: (sum(rates) / len(rates)) if rates else 0.0
-        for d, rates in daily.items()
+    return {
+        "hourly": _bucket_averages(hour_sums, hour_counts),
+        "daily": _bucket_averages(day_sums, day_counts),
     }
 
-    return {"hourly": hourly_avg, "daily": daily_avg}
 
+def hashtag_performance(posts: list[PostMetrics],
+                        top_n: Optional[int] = None) -> list[tuple[str, float]]:
+    """Rank hashtags by average engagement rate when used.
+
+    With top_n, only the best top_n hashtags are returned.
+    """
+    return _hashtag_performance(posts, _engagement_rates(posts), top_n)
 
-def hashtag_performance(posts: list[PostMetrics]) -> list[tuple[str, float]]:
-    """Rank hashtags by average engagement rate when used."""
-    tag_rates: dict[str, list[float]] = {}
-    for post in posts:
+
+def _hashtag_performance(posts: list[PostMetrics], rates: list[float],
+                         top_n: Optional[int] = None) -> list[tuple[str, float]]:
+    # Running [rate sum, use count] per normalized tag
+    tag_stats: dict[str, list] = {}
+    for post, rate in zip(posts, rates):
         for tag in post.hashtags:
-            tag_lower = tag.lower().lstrip("#")
-            if tag_lower not in tag_rates:
-                tag_rates[tag_lower] = []
-            tag_rates[tag_lower].append(post.engagement_rate)
+            key = tag.lower().lstrip("#")
+            stats = tag_stats.get(key)
+            if stats is None:
+                tag_stats[key] = [rate, 1]
+            else:
+                stats[0] += rate
+                stats[1] += 1
 
     # Average engagement per hashtag, sorted descending
     results = [
-        (tag, sum(rates) / len(rates))
-        for tag, rates in tag_rates.items()
-        if len(rates) >= 2  # Minimum 2 uses for reliability
+        (tag, total / count)
+        for tag, (total, count) in tag_stats.items()
+        if count >= 2  # Minimum 2 uses for reliability
     ]
+    if top_n is not None:
+        return heapq.nlargest(top_n, results, key=lambda x: x[1])
     results.sort(key=lambda x: -x[1])
     return results
 
 
+_HASHTAG_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS hashtag_stats (
+        tag TEXT PRIMARY KEY,
+        sum_rate REAL NOT NULL,
+        count INTEGER NOT NULL,
+        last_post_id TEXT
+    );
+    CREATE TABLE IF NOT EXISTS hashtag_ingested (
+        platform TEXT NOT NULL,
+        post_id TEXT NOT NULL,
+        PRIMARY KEY (platform, post_id)
+    ) WITHOUT ROWID;
+"""
+
+_MARK_INGESTED_SQL = "INSERT OR IGNORE INTO hashtag_ingested (platform, post_id) VALUES (?, ?)"
+
+_UPSERT_TAG_SQL = (
+    "INSERT INTO hashtag_stats (tag, sum_rate, count, last_post_id) VALUES (?, ?, 1, ?) "
+    "ON CONFLICT(tag) DO UPDATE SET sum_rate = sum_rate + excluded.sum_rate, "
+    "count = count + 1, last_post_id = excluded.last_post_id"
+)
+
+# LIMIT -1 is SQLite for "no limit"
+_TOP_TAGS_SQL = (
+    "SELECT tag, sum_rate / count FROM hashtag_stats WHERE count >= 2 "
+    "ORDER BY sum_rate / count DESC, tag LIMIT ?"
+)
+
+
+class HashtagIndex:
+    """Per-hashtag engagement totals persisted in SQLite.
+
+    Gives the same ranking as hashtag_performance() for long histories
+    without rescanning them: each post is folded in once by ingest().
+    """
+
+    def __init__(self, db_path: str = "data/hashtags.db"):
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(db_path, cached_statements=256)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(_HASHTAG_SCHEMA)
+        self.db.commit()
+
+    def ingest(self, posts: list[PostMetrics]) -> int:
+        """Add new posts to the totals, skipping ones already ingested.
+
+        Posts without a post_id cannot be recognized again, so they are
+        always added. Returns the number of posts added.
+        """
+        added = 0
+        with self.db:
+            for post in posts:
+                if post.post_id and not self.db.execute(
+                    _MARK_INGESTED_SQL, (post.platform, post.post_id)
+                ).rowcount:
+                    continue
+                added += 1
+                if post.hashtags:
+                    rate = post.engagement_rate
+                    self.db.executemany(_UPSERT_TAG_SQL, [
+                        (tag.lower().lstrip("#"), rate, post.post_id) for tag in post.hashtags
+                    ])
+        return added
+
+    def top(self, top_n: Optional[int] = None) -> list[tuple[str, float]]:
+        """Hashtags used at least twice, best average engagement rate first."""
+        return self.db.execute(_TOP_TAGS_SQL, (-1 if top_n is None else top_n,)).fetchall()
+
+    def close(self):
+        self.db.close()
+
+
 def content_type_analysis(posts: list[PostMetrics]) -> dict[str, dict]:
     """Analyze performance by content type."""
-    type_data: dict[str, list[float]] = {}
-    for post in posts:
-        ct = post.content_type.value
-        if ct not in type_data:
-            type_data[ct] = []
-        type_data[ct].append(post.engagement_rate)
-
-    return {
-        ct: {
-            "count": len(rates),
-            "avg_rate": sum(rates) / len(rates),
-            "median_rate": statistics.median(rates) if rates else 0,
-            "max_rate": max(rates) if rates else 0,
+    return _content_type_analysis(posts, _engagement_rates(posts))
+
+
+def _median_of_sorted(values: list[float]) -> float:
+    mid = len(values) // 2
+    if len(values) % 2:
+        return values[mid]
+    return (values[mid - 1] + values[mid]) / 2
+
+
+def _content_type_analysis(posts: list[PostMetrics], rates: list[float]) -> dict[str, dict]:
+    type_data: dict[ContentType, list[float]] = {}
+    for post, rate in zip(posts, rates):
+        bucket = type_data.get(post.content_type)
+        if bucket is None:
+            type_data[post.content_type] = [rate]
+        else:
+            bucket.append(rate)
+
+    stats = {}
+    for ct, bucket in type_data.items():
+        total = sum(bucket)
+        # One sort per bucket yields both the median and the max
+        bucket.sort()
+        stats[ct.value] = {
+            "count": len(bucket),
+            "avg_rate": total / len(bucket),
+            "median_rate": _median_of_sorted(bucket),
+            "max_rate": bucket[-1],
         }
-        for ct, rates in type_data.items()
-    }
+    return stats
 
 
 def engagement_decay_rate(metrics: PostMetrics, hours_data: dict[int, int]) -> float:
@@ -255,17 +396,16 @@ def engagement_decay_rate(metrics: PostMetrics, hours_data: dict[int, int]) -> f
     if not hours_data or len(hours_data) < 2:
         return 0.0
 
-    total = max(hours_data.values())
+    hours, cumulative = zip(*sorted(hours_data.items()))
+    # Running peak is non-decreasing even if the samples are not, and first
+    # reaches a threshold at the same hour as the raw samples do
+    peaks = list(accumulate(cumulative, max))
+    total = peaks[-1]
     if total <= 0:
         return 0.0
 
-    # Find when 50% of engagement was reached
-    sorted_hours = sorted(hours_data.items())
-    for hours, cumulative in sorted_hours:
-        if cumulative >= total * 0.5:
-            return float(hours)
-
-    return float(sorted_hours[-1][0])
+    # Hour at which 50% of engagement was reached
+    return float(hours[bisect_left(peaks, total * 0.5)])
 
 
 def analyze_engagement(posts: list[PostMetrics], platform: str = "instagram",
@@ -284,21 +424,22 @@ def analyze_engagement(posts: list[PostMetrics], platform: str = "instagram",
             performance_level=PerformanceLevel.UNDERPERFORMING,
         )
 
-    rates = [p.engagement_rate for p in posts]
+    # Each analyzer below reuses these instead of re-deriving them per post
+    rates = _engagement_rates(posts)
     avg_rate = sum(rates) / len(rates)
-    median_rate = statistics.median(rates)
+    median_rate = _median_of_sorted(sorted(rates))
 
     # Best content type
-    ct_analysis = content_type_analysis(posts)
+    ct_analysis = _content_type_analysis(posts, rates)
     best_ct = max(ct_analysis.items(), key=lambda x: x[1]["avg_rate"])[0] if ct_analysis else "image"
 
     # Best posting times
-    timing = optimal_posting_times(posts)
+    timing = _optimal_posting_times(posts, rates)
     best_hour = max(timing["hourly"].items(), key=lambda x: x[1])[0] if timing["hourly"] else 12
     best_day = max(timing["daily"].items(), key=lambda x: x[1])[0] if timing["daily"] else 2
 
     # Top hashtags
-    top_tags = hashtag_performance(posts)
+    top_tags = _hashtag_performance(posts, rates, top_n=10)
 
     # Performance classification
     perf = classify_performance(avg_rate, platform)
@@ -328,7 +469,7 @@ def analyze_engagement(posts: list[PostMetrics], platform: str = "instagram",
         best_posting_hour=best_hour,
         best_posting_day=best_day,
         performance_level=perf,
-        top_hashtags=top_tags[:10],
+        top_hashtags=top_tags,
         content_type_rates=ct_analysis,
         hourly_rates=timing["hourly"],
         recommendations=recs,
@@ -0,0 +1,90 @@
+"""HTTP session factory and response cache shared by the platform clients."""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+import orjson
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# One connection pool for every client, so keep-alive connections to a host
+# are reused across client instances instead of each holding its own pool.
+# Read/status retries only apply to urllib3's idempotent methods (GET, PUT,
+# DELETE, ...), so any call with side effects must be sent as a POST.
+# Retry-After is ignored so a 429 cannot stall a caller for minutes; the short
+# backoff is used instead.
+_ADAPTER = HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=50,
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=(429, 500, 502, 503, 504),
+        respect_retry_after_header=False,
+    ),
+)
+
+
+def new_session() -> requests.Session:
+    """Session with its own headers, backed by the shared connection pool."""
+    session = requests.Session()
+    session.mount("https://", _ADAPTER)
+    session.mount("http://", _ADAPTER)
+    return session
+
+
+class ResponseCache:
+    """GET responses reused for ``ttl`` seconds, keyed by URL and params.
+
+    Expired entries are kept (up to ``maxsize``) so their ETag can be sent as
+    If-None-Match; a 304 reply then renews the entry without a new body.
+    Bodies are stored undecoded, so every caller gets its own payload.
+    A ttl of 0 disables caching.
+    """
+
+    def __init__(self, ttl: float = 60.0, maxsize: int = 256):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        # key -> [expires_at, etag, body], least recently used first
+        self._entries: OrderedDict[tuple, list] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_json(self, session: requests.Session, url: str,
+                 params: Optional[dict] = None, timeout: float = 15,
+                 cached: bool = False) -> Any:
+        """GET url and decode the JSON body.
+
+        Only cached=True requests use the cache; leave it off for anything
+        that may change between calls (listings, search, publish status).
+        Raises like session.get() / raise_for_status() / orjson.loads().
+        """
+        if not cached or self.ttl <= 0:
+            r = session.get(url, params=params, timeout=timeout)
+            r.raise_for_status()
+            return orjson.loads(r.content)
+
+        key = (url, tuple(sorted(params.items())) if params else ())
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                if entry[0] > time.monotonic():
+                    return orjson.loads(entry[2])
+
+        headers = {"If-None-Match": entry[1]} if entry is not None and entry[1] else None
+        r = session.get(url, params=params, headers=headers, timeout=timeout)
+        if r.status_code == 304 and entry is not None:
+            entry[0] = time.monotonic() + self.ttl
+            return orjson.loads(entry[2])
+        r.raise_for_status()
+        payload = orjson.loads(r.content)
+
+        with self._lock:
+            self._entries[key] = [time.monotonic() + self.ttl, r.headers.get("ETag"), r.content]
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return payload
@@ -1,31 +1,55 @@
 """Instagram Graph API client."""
 
 import logging
+import orjson
 import requests
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 
+from ._http import ResponseCache, new_session
+
 logger = logging.getLogger(__name__)
 
+# Container status polling: first wait, doubled per attempt, and overall limit
+_CONTAINER_POLL_DELAY = 0.5
+_CONTAINER_TIMEOUT = 30.0
+
 
 class InstagramClient:
     """Instagram Business API via Facebook Graph API."""
 
     def __init__(self, access_token: str, business_id: str,
-                 base_url: str = "https://graph.facebook.com/v19.0"):
+                 base_url: str = "https://graph.facebook.com/v19.0",
+                 cache_ttl: float = 60.0):
         self.access_token = access_token
         self.business_id = business_id
         self.base_url = base_url
-        self.session = requests.Session()
-
-    def _get(self, endpoint: str, params: Optional[dict] = None) -> Optional[dict]:
+        self.session = new_session()
+        self._responses = ResponseCache(ttl=cache_ttl)
+        # A Session is not guaranteed thread-safe: carousel worker threads each
+        # get their own on the shared pool, the creating thread keeps self.session
+        self._sessions = threading.local()
+        self._sessions.session = self.session
+
+    def _session(self) -> requests.Session:
+        session = getattr(self._sessions, "session", None)
+        if session is None:
+            session = self._sessions.session = new_session()
+        return session
+
+    def _get(self, endpoint: str, params: Optional[dict] = None,
+             cached: bool = False) -> Optional[dict]:
         p = {"access_token": self.access_token}
         if params:
             p.update(params)
         try:
-            r = self.session.get(f"{self.base_url}/{endpoint}", params=p, timeout=15)
-            r.raise_for_status()
-            return r.json()
-        except requests.RequestException as e:
+            return self._responses.get_json(
+                self._session(), f"{self.base_url}/{endpoint}", params=p, timeout=15,
+                cached=cached,
+            )
+        except (requests.RequestException, orjson.JSONDecodeError) as e:
             logger.error("IG API error: %s", e)
             return None
 
@@ -34,17 +58,41 @@ class InstagramClient:
         if data:
             d.update(data)
         try:
-            r = self.session.post(f"{self.base_url}/{endpoint}", data=d, timeout=30)
+            r = self._session().post(f"{self.base_url}/{endpoint}", data=d, timeout=30)
             r.raise_for_status()
-            return r.json()
-        except requests.RequestException as e:
+            return orjson.loads(r.content)
+        except (requests.RequestException, orjson.JSONDecodeError) as e:
             logger.error("IG API error: %s", e)
             return None
 
+    def _wait_for_container(self, container_id: str) -> bool:
+        """Poll a media container until it is ready to publish.
+
+        Returns False if it reports ERROR/EXPIRED or is still processing after
+        _CONTAINER_TIMEOUT seconds. A failed status lookup is not fatal; the
+        publish call then reports the real error.
+        """
+        deadline = time.monotonic() + _CONTAINER_TIMEOUT
+        delay = _CONTAINER_POLL_DELAY
+        while True:
+            data = self._get(container_id, {"fields": "status_code"})
+            status = data.get("status_code") if data else None
+            if status is None or status == "FINISHED":
+                return True
+            if status in ("ERROR", "EXPIRED"):
+                logger.warning("IG container %s status: %s", container_id, status)
+                return False
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                logger.warning("IG container %s not ready after %.0fs", container_id, _CONTAINER_TIMEOUT)
+                return False
+            time.sleep(min(delay, remaining))
+            delay *= 2
+
     def get_profile(self) -> str:
         data = self._get(self.business_id, {
             "fields": "username,followers_count,follows_count,media_count,biography"
-        })
+        }, cached=True)
         if not data:
             return "❌ 无法获取Instagram资料"
         return (
@@ -59,7 +107,7 @@ class InstagramClient:
         data = self._get(f"{self.business_id}/insights", {
             "metric": "impressions,reach,profile_views",
             "period": period,
-        })
+        }, cached=True)
         if not data:
             return "❌ 无法获取Instagram数据"
         metrics = data.get("data", [])
@@ -109,6 +157,8 @@ class InstagramClient:
         })
         if not container or "id" not in container:
             return "❌ 创建媒体容器失败"
+        if not self._wait_for_container(container["id"]):
+            return "❌ 媒体处理失败"
 
         # Step 2: Publish
         result = self._post(f"{self.business_id}/media_publish", {
@@ -123,19 +173,26 @@ class InstagramClient:
         if len(image_urls) < 2:
             return "❌ 轮播至少需要2张图片"
 
-        # Create child containers
-        children = []
-        for url in image_urls[:10]:  # Max 10 images
-            child = self._post(f"{self.business_id}/media", {
-                "image_url": url,
-                "is_carousel_item": True,
-            })
-            if child and "id" in child:
-                children.append(child["id"])
+        # Create child containers concurrently; map() keeps image order
+        urls = image_urls[:10]  # Max 10 images
+        with ThreadPoolExecutor(max_workers=len(urls)) as pool:
+            responses = list(pool.map(
+                lambda url: self._post(f"{self.business_id}/media", {
+                    "image_url": url,
+                    "is_carousel_item": True,
+                }),
+                urls,
+            ))
+        children = [child["id"] for child in responses if child and "id" in child]
 
         if len(children) < 2:
             return "❌ 创建轮播子项失败"
 
+        # Every child must finish processing before the carousel can reference it
+        with ThreadPoolExecutor(max_workers=len(children)) as pool:
+            if not all(pool.map(self._wait_for_container, children)):
+                return "❌ 轮播子项处理失败"
+
         # Create carousel container
         container = self._post(f"{self.business_id}/media", {
             "media_type": "CAROUSEL",
@@ -144,6 +201,8 @@ class InstagramClient:
         })
         if not container or "id" not in container:
             return "❌ 创建轮播容器失败"
+        if not self._wait_for_container(container["id"]):
+            return "❌ 轮播处理失败"
 
         # Publish
         result = self._post(f"{self.business_id}/media_publish", {
@@ -1,9 +1,12 @@
 """TikTok API client for business accounts."""
 
 import logging
+import orjson
 import requests
 from typing import Optional
 
+from ._http import new_session
+
 logger = logging.getLogger(__name__)
 
 
@@ -15,7 +18,7 @@ class TikTokClient:
     def __init__(self, access_token: str, open_id: str = ""):
         self.access_token = access_token
         self.open_id = open_id
-        self.session = requests.Session()
+        self.session = new_session()
         self.session.headers["Authorization"] = f"Bearer {access_token}"
         self.session.headers["Content-Type"] = "application/json"
 
@@ -25,19 +28,21 @@ class TikTokClient:
                 f"{self.BASE_URL}/{endpoint}", params=params, timeout=15
             )
             r.raise_for_status()
-            return r.json()
-        except requests.RequestException as e:
+            return orjson.loads(r.content)
+        except (requests.RequestException, orjson.JSONDecodeError) as e:
             logger.error("TikTok API error: %s", e)
             return None
 
     def _post(self, endpoint: str, json_data: Optional[dict] = None) -> Optional[dict]:
         try:
             r = self.session.post(
-                f"{self.BASE_URL}/{endpoint}", json=json_data, timeout=30
+                f"{self.BASE_URL}/{endpoint}",
+                data=None if json_data is None else orjson.dumps(json_data),
+                timeout=30,
             )
             r.raise_for_status()
-            return r.json()
-        except requests.RequestException as e:
+            return orjson.loads(r.content)
+        except (requests.RequestException, orjson.JSONDecodeError) as e:
             logger.error("TikTok API error: %s", e)
             return None
 
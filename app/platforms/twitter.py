@@ -1,29 +1,37 @@
 """Twitter/X API v2 client."""
 
 import logging
+import orjson
 import requests
+from operator import itemgetter
 from typing import Optional
 
+from ._http import ResponseCache, new_session
+
 logger = logging.getLogger(__name__)
 
+# v1.1 trend objects always carry both keys; tweet_volume is null when unknown
+_TREND_FIELDS = itemgetter("name", "tweet_volume")
+
 
 class TwitterClient:
     """Twitter API v2 client with Bearer token auth."""
 
     BASE_URL = "https://api.twitter.com/2"
 
-    def __init__(self, bearer_token: str):
-        self.session = requests.Session()
+    def __init__(self, bearer_token: str, cache_ttl: float = 60.0):
+        self.session = new_session()
         self.session.headers["Authorization"] = f"Bearer {bearer_token}"
+        self._responses = ResponseCache(ttl=cache_ttl)
 
-    def _get(self, endpoint: str, params: Optional[dict] = None) -> Optional[dict]:
+    def _get(self, endpoint: str, params: Optional[dict] = None,
+             cached: bool = False) -> Optional[dict]:
         try:
-            r = self.session.get(
-                f"{self.BASE_URL}/{endpoint}", params=params, timeout=15
+            return self._responses.get_json(
+                self.session, f"{self.BASE_URL}/{endpoint}", params=params, timeout=15,
+                cached=cached,
             )
-            r.raise_for_status()
-            return r.json()
-        except requests.RequestException as e:
+        except (requests.RequestException, orjson.JSONDecodeError) as e:
             logger.error("Twitter API error: %s", e)
             return None
 
@@ -52,7 +60,7 @@ class TwitterClient:
     def get_user(self, username: str) -> str:
         data = self._get(f"users/by/username/{username}", {
             "user.fields": "public_metrics,description,created_at,verified",
-        })
+        }, cached=True)
         if not data or "data" not in data:
             return f"❌ 未找到用户 @{username}"
         d = data["data"]
@@ -101,12 +109,12 @@ class TwitterClient:
             )
             if not r.ok:
                 return "❌ 趋势获取失败 (需要Elevated权限)"
-            trends = r.json()[0].get("trends", [])[:10]
+            trends = orjson.loads(r.content)[0].get("trends", [])[:10]
             lines = ["🔥 Twitter热门趋势\n"]
             for i, t in enumerate(trends, 1):
-                vol = t.get("tweet_volume")
+                name, vol = _TREND_FIELDS(t)
                 vol_str = f" ({vol:,})" if vol else ""
-                lines.append(f"{i}. {t['name']}{vol_str}")
+                lines.append(f"{i}. {name}{vol_str}")
             return "\n".join(lines)
         except Exception as e:
             logger.error("Trending error: %s", e)
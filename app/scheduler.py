@@ -7,14 +7,51 @@ from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+_INSERT_POST_SQL = (
+    "INSERT INTO scheduled_posts "
+    "(platform, content_type, caption, media_url, scheduled_at, created_at) "
+    "VALUES (?, ?, ?, ?, ?, ?)"
+)
+
+_PENDING_SQL = (
+    "SELECT id, platform, caption, scheduled_at "
+    "FROM scheduled_posts "
+    "WHERE status='pending' ORDER BY scheduled_at LIMIT 20"
+)
+
+_DUE_POSTS_SQL = (
+    "SELECT id, platform, content_type, caption, media_url, scheduled_at "
+    "FROM scheduled_posts "
+    "WHERE status='pending' AND scheduled_at<=? ORDER BY scheduled_at"
+)
+
+_MARK_PUBLISHED_SQL = (
+    "UPDATE scheduled_posts SET status='published', published_at=? WHERE id=?"
+)
+
+_MARK_FAILED_SQL = "UPDATE scheduled_posts SET status='failed', error=? WHERE id=?"
+
+_CANCEL_SQL = (
+    "UPDATE scheduled_posts SET status='cancelled' "
+    "WHERE id=? AND status='pending'"
+)
+
+_STATS_SQL = "SELECT status, COUNT(*) as cnt FROM scheduled_posts GROUP BY status"
+
 
 class Scheduler:
     """Schedule and manage social media posts."""
 
     def __init__(self, db_path: str = "data/scheduler.db"):
         Path(db_path).parent.mkdir(parents=True, exist_ok=True)
-        self.db = sqlite3.connect(db_path)
+        self.db = sqlite3.connect(db_path, cached_statements=256)
         self.db.row_factory = sqlite3.Row
+        # WAL + synchronous=NORMAL: commits no longer fsync the main file
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("PRAGMA temp_store=MEMORY")
+        self.db.execute("PRAGMA cache_size=-65536")
+        self.db.execute("PRAGMA mmap_size=268435456")
         self._init_tables()
 
     def _init_tables(self):
@@ -33,8 +70,18 @@ class Scheduler:
             );
             CREATE INDEX IF NOT EXISTS idx_scheduled_status
                 ON scheduled_posts(status, scheduled_at);
+            -- Pending rows only, carrying every column get_due_posts and
+            -- list_pending read (status included), so both are index-only scans
+            CREATE INDEX IF NOT EXISTS idx_pending_due
+                ON scheduled_posts(scheduled_at, platform, content_type, media_url, caption, status)
+                WHERE status='pending';
         """)
         self.db.commit()
+        # Fresh planner statistics let the pending queries pick idx_pending_due
+        # over idx_scheduled_status; analysis_limit keeps this cheap at startup
+        self.db.execute("PRAGMA analysis_limit=400")
+        self.db.execute("ANALYZE")
+        self.db.commit()
 
     def add_post(self, platform: str, caption: str, media_url: str,
                  scheduled_at: str, content_type: str = "image") -> str:
@@ -42,9 +89,7 @@ class Scheduler:
             # Validate datetime
             dt = datetime.fromisoformat(scheduled_at)
             self.db.execute(
-                "INSERT INTO scheduled_posts "
-                "(platform, content_type, caption, media_url, scheduled_at, created_at) "
-                "VALUES (?, ?, ?, ?, ?, ?)",
+                _INSERT_POST_SQL,
                 (platform, content_type, caption, media_url,
                  dt.isoformat(), datetime.now().isoformat())
             )
@@ -56,10 +101,7 @@ class Scheduler:
             return f"❌ 排期失败: {e}"
 
     def list_pending(self) -> str:
-        rows = self.db.execute(
-            "SELECT id, platform, caption, scheduled_at FROM scheduled_posts "
-            "WHERE status='pending' ORDER BY scheduled_at LIMIT 20"
-        ).fetchall()
+        rows = self.db.execute(_PENDING_SQL).fetchall()
         if not rows:
             return "📅 暂无排期内容\n\n使用 /schedule <平台> <时间> <文案> 添加"
         lines = [f"📅 待发布 ({len(rows)}条)\n"]
@@ -72,44 +114,31 @@ class Scheduler:
             )
         return "\n".join(lines)
 
-    def get_due_posts(self) -> list[dict]:
-        """Get posts that are due for publishing."""
+    def get_due_posts(self) -> list[sqlite3.Row]:
+        """Get posts that are due for publishing, oldest first.
+
+        Rows are read-only and indexed by column name (row["media_url"]).
+        """
         now = datetime.now().isoformat()
-        rows = self.db.execute(
-            "SELECT * FROM scheduled_posts WHERE status='pending' AND scheduled_at<=?",
-            (now,)
-        ).fetchall()
-        return [dict(r) for r in rows]
+        return self.db.execute(_DUE_POSTS_SQL, (now,)).fetchall()
 
     def mark_published(self, post_id: int):
-        self.db.execute(
-            "UPDATE scheduled_posts SET status='published', published_at=? WHERE id=?",
-            (datetime.now().isoformat(), post_id)
-        )
+        self.db.execute(_MARK_PUBLISHED_SQL, (datetime.now().isoformat(), post_id))
         self.db.commit()
 
     def mark_failed(self, post_id: int, error: str):
-        self.db.execute(
-            "UPDATE scheduled_posts SET status='failed', error=? WHERE id=?",
-            (error[:500], post_id)
-        )
+        self.db.execute(_MARK_FAILED_SQL, (error[:500], post_id))
         self.db.commit()
 
     def cancel_post(self, post_id: int) -> str:
-        cur = self.db.execute(
-            "UPDATE scheduled_posts SET status='cancelled' "
-            "WHERE id=? AND status='pending'",
-            (post_id,)
-        )
+        cur = self.db.execute(_CANCEL_SQL, (post_id,))
         self.db.commit()
         if cur.rowcount:
             return f"✅ 已取消排期 #{post_id}"
         return f"⚠️ 未找到待发布的排期 #{post_id}"
 
     def get_stats(self) -> str:
-        rows = self.db.execute(
-            "SELECT status, COUNT(*) as cnt FROM scheduled_posts GROUP BY status"
-        ).fetchall()
+        rows = self.db.execute(_STATS_SQL).fetchall()
         stats = {r["status"]: r["cnt"] for r in rows}
         return (
             f"📊 排期统计\n\n"
@@ -1,5 +1,6 @@
 """Telegram Bot API wrapper with retry and error handling."""
 
+import json
 import logging
 import requests
 from typing import Optional
@@ -37,10 +38,15 @@ class TelegramBot:
     def get_me(self) -> Optional[dict]:
         return self._request("getMe")
 
-    def get_updates(self, offset: Optional[int] = None, timeout: int = 30) -> Optional[dict]:
-        params = {"timeout": timeout}
+    def get_updates(self, offset: Optional[int] = None, timeout: int = 30,
+                    allowed_updates: Optional[list[str]] = None,
+                    limit: int = 100) -> Optional[dict]:
+        params = {"timeout": timeout, "limit": limit}
         if offset is not None:
             params["offset"] = offset
+        if allowed_updates is not None:
+            # Telegram expects a JSON-serialized list, e.g. '["message"]'
+            params["allowed_updates"] = json.dumps(allowed_updates)
         return self._request("getUpdates", params=params)
 
     def send_message(self, chat_id: int, text: str,
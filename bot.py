@@ -6,16 +6,49 @@ Instagram/TikTok/Twitter 社媒自动化工具
 
 import os
 import time
+import queue
 import random
-import requests
+import threading
 from datetime import datetime
 
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
 TOKEN = os.environ.get("BOT_TOKEN", "")
 if not TOKEN:
     raise ValueError("未设置 BOT_TOKEN!")
 
 API_URL = f"https://api.telegram.org/bot{TOKEN}"
 
+# 所有HTTP调用共用连接池，复用Telegram/Graph/Twitter的keep-alive连接。
+# raise_on_status=False：重试用尽后仍返回响应，各处的 r.ok 分支照常提示"❌ 503"；
+# 只有GET会按状态码/读超时重试，所以发送消息一律走POST，避免重复发送
+_ADAPTER = HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=16,
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=(429, 500, 502, 503, 504),
+        raise_on_status=False,
+        respect_retry_after_header=False,
+    ),
+)
+
+# requests.Session本身不保证线程安全，所以每个线程各用一个Session
+_local = threading.local()
+
+
+def _session():
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = _local.session = requests.Session()
+        session.mount("https://", _ADAPTER)
+        session.mount("http://", _ADAPTER)
+    return session
+
+
 # ── Instagram配置 ──
 IG_ACCESS_TOKEN = os.environ.get("IG_ACCESS_TOKEN", "")
 IG_BUSINESS_ID = os.environ.get("IG_BUSINESS_ID", "")
@@ -33,7 +66,17 @@ TW_ACCESS_SECRET = os.environ.get("TW_ACCESS_SECRET", "")
 
 def tg_get(method, params=None):
     try:
-        r = requests.get(f"{API_URL}/{method}", params=params, timeout=35)
+        r = _session().get(f"{API_URL}/{method}", params=params, timeout=35)
+        return r.json()
+    except Exception as e:
+        print(f"[API错误] {method}: {e}")
+        return None
+
+
+def tg_post(method, data=None):
+    """有副作用的调用（如发消息）用POST：失败不会被自动重试而重复执行"""
+    try:
+        r = _session().post(f"{API_URL}/{method}", data=data, timeout=35)
         return r.json()
     except Exception as e:
         print(f"[API错误] {method}: {e}")
@@ -46,15 +89,16 @@ def tg_send(chat_id, text, reply_to=None, parse_mode="Markdown"):
         params["reply_to_message_id"] = reply_to
     if parse_mode:
         params["parse_mode"] = parse_mode
-    result = tg_get("sendMessage", params)
+    result = tg_post("sendMessage", params)
     if not result or not result.get("ok"):
         params.pop("parse_mode", None)
-        result = tg_get("sendMessage", params)
+        result = tg_post("sendMessage", params)
     return result
 
 
 def get_updates(offset=None):
-    params = {"timeout": 30}
+    # handle()只处理message，其它类型的更新无需让Telegram下发
+    params = {"timeout": 30, "limit": 100, "allowed_updates": '["message"]'}
     if offset:
         params["offset"] = offset
     return tg_get("getUpdates", params)
@@ -68,7 +112,7 @@ class Instagram:
     def get_profile():
         if not IG_ACCESS_TOKEN:
             return "⚠️ 未配置 IG_ACCESS_TOKEN"
-        r = requests.get(f"{Instagram.BASE}/{IG_BUSINESS_ID}",
+        r = _session().get(f"{Instagram.BASE}/{IG_BUSINESS_ID}",
             params={"fields": "username,followers_count,media_count,biography",
                     "access_token": IG_ACCESS_TOKEN}, timeout=15)
         if r.ok:
@@ -83,7 +127,7 @@ class Instagram:
     def get_insights():
         if not IG_ACCESS_TOKEN:
             return "⚠️ 未配置 IG_ACCESS_TOKEN"
-        r = requests.get(f"{Instagram.BASE}/{IG_BUSINESS_ID}/insights",
+        r = _session().get(f"{Instagram.BASE}/{IG_BUSINESS_ID}/insights",
             params={"metric": "impressions,reach,profile_views",
                     "period": "day", "access_token": IG_ACCESS_TOKEN}, timeout=15)
         if r.ok:
@@ -99,7 +143,7 @@ class Instagram:
     def get_recent_media(limit=5):
         if not IG_ACCESS_TOKEN:
             return "⚠️ 未配置 IG_ACCESS_TOKEN"
-        r = requests.get(f"{Instagram.BASE}/{IG_BUSINESS_ID}/media",
+        r = _session().get(f"{Instagram.BASE}/{IG_BUSINESS_ID}/media",
             params={"fields": "id,caption,like_count,comments_count,timestamp,permalink",
                     "limit": limit, "access_token": IG_ACCESS_TOKEN}, timeout=15)
         if r.ok:
@@ -116,14 +160,14 @@ class Instagram:
         if not IG_ACCESS_TOKEN:
             return "⚠️ 未配置 IG_ACCESS_TOKEN"
         # Step 1: Create container
-        r1 = requests.post(f"{Instagram.BASE}/{IG_BUSINESS_ID}/media",
+        r1 = _session().post(f"{Instagram.BASE}/{IG_BUSINESS_ID}/media",
             data={"image_url": image_url, "caption": caption,
                   "access_token": IG_ACCESS_TOKEN}, timeout=30)
         if not r1.ok:
             return f"❌ 创建失败: {r1.text[:200]}"
         container_id = r1.json().get("id")
         # Step 2: Publish
-        r2 = requests.post(f"{Instagram.BASE}/{IG_BUSINESS_ID}/media_publish",
+        r2 = _session().post(f"{Instagram.BASE}/{IG_BUSINESS_ID}/media_publish",
             data={"creation_id": container_id, "access_token": IG_ACCESS_TOKEN}, timeout=30)
         if r2.ok:
             return f"✅ 发布成功! ID: {r2.json().get('id')}"
@@ -136,7 +180,7 @@ class Twitter:
     def search(query, max_results=10):
         if not TW_BEARER_TOKEN:
             return "⚠️ 未配置 TW_BEARER_TOKEN"
-        r = requests.get("https://api.twitter.com/2/tweets/search/recent",
+        r = _session().get("https://api.twitter.com/2/tweets/search/recent",
             params={"query": query, "max_results": max_results,
                     "tweet.fields": "public_metrics,created_at"},
             headers={"Authorization": f"Bearer {TW_BEARER_TOKEN}"}, timeout=15)
@@ -153,7 +197,7 @@ class Twitter:
     def get_user(username):
         if not TW_BEARER_TOKEN:
             return "⚠️ 未配置 TW_BEARER_TOKEN"
-        r = requests.get(f"https://api.twitter.com/2/users/by/username/{username}",
+        r = _session().get(f"https://api.twitter.com/2/users/by/username/{username}",
             params={"user.fields": "public_metrics,description"},
             headers={"Authorization": f"Bearer {TW_BEARER_TOKEN}"}, timeout=15)
         if r.ok:
@@ -168,19 +212,24 @@ class Twitter:
 
 # ── 竞品追踪 ──────────────────────────────────────────────
 tracked_accounts = {}
+# handle()在各chat的工作线程里并发执行，读写tracked_accounts需加锁
+_tracked_lock = threading.Lock()
 
 
 def track_account(platform, username):
     key = f"{platform}:{username}"
-    tracked_accounts[key] = {"added": datetime.now().isoformat(), "platform": platform, "username": username}
+    with _tracked_lock:
+        tracked_accounts[key] = {"added": datetime.now().isoformat(), "platform": platform, "username": username}
     return f"✅ 已追踪 {platform} @{username}"
 
 
 def list_tracked():
-    if not tracked_accounts:
+    with _tracked_lock:
+        accounts = list(tracked_accounts.values())
+    if not accounts:
         return "📋 暂无追踪账号"
     lines = ["📋 追踪列表\n"]
-    for k, v in tracked_accounts.items():
+    for v in accounts:
         lines.append(f"  {v['platform']} @{v['username']}")
     return "\n".join(lines)
 
@@ -278,6 +327,39 @@ def handle(chat_id, msg_id, text):
         tg_send(chat_id, "\n".join(ideas), msg_id)
 
 
+# ── 按会话分发 ────────────────────────────────────────────
+# 每个chat一个队列+工作线程：同一chat内按顺序处理，不同chat互不阻塞
+CHAT_IDLE_TIMEOUT = 60
+_chat_queues = {}
+_chat_lock = threading.Lock()
+
+
+def _chat_worker(chat_id, q):
+    while True:
+        try:
+            msg_id, text = q.get(timeout=CHAT_IDLE_TIMEOUT)
+        except queue.Empty:
+            with _chat_lock:
+                # dispatch()在锁内投递，这里确认为空后才能安全退出
+                if q.empty():
+                    del _chat_queues[chat_id]
+                    return
+            continue
+        try:
+            handle(chat_id, msg_id, text)
+        except Exception as e:
+            print(f"[错误] {chat_id}: {e}")
+
+
+def dispatch(chat_id, msg_id, text):
+    with _chat_lock:
+        q = _chat_queues.get(chat_id)
+        if q is None:
+            q = _chat_queues[chat_id] = queue.Queue()
+            threading.Thread(target=_chat_worker, args=(chat_id, q), daemon=True).start()
+        q.put((msg_id, text))
+
+
 def main():
     print(f"\n{'='*50}")
     print("  SocialMedia AutoBot")
@@ -309,7 +391,7 @@ def main():
                     continue
                 text = (msg.get("text") or "").strip()
                 if text:
-                    handle(msg["chat"]["id"], msg["message_id"], text)
+                    dispatch(msg["chat"]["id"], msg["message_id"], text)
         except KeyboardInterrupt:
             print("\n\n👋 已停止!")
             break
@@ -1,8 +1,10 @@
 """Tests for A/B Testing Framework."""
 
+import math
 import os
 import pytest
 import tempfile
+from statistics import NormalDist
 from app.ab_testing import (
     ABTestEngine,
     ExperimentStatus,
@@ -11,12 +13,23 @@ from app.ab_testing import (
     Variant,
     ExperimentResult,
     _calculate_lift,
-    _z_test_confidence,
-    _z_to_confidence,
+    _z_test_confidence_batch,
+    _holm_adjust,
     _generate_recommendations,
 )
 
 
+def _z_confidence(control_rate, control_n, test_rate, test_n):
+    return _z_test_confidence_batch(control_rate, control_n, [(test_rate, test_n)])[0]
+
+
+def _pooled_z(control_rate, control_n, test_rate, test_n):
+    p1, p2 = control_rate / 100, test_rate / 100
+    pool = (p1 * control_n + p2 * test_n) / (control_n + test_n)
+    se = math.sqrt(pool * (1 - pool) * (1 / control_n + 1 / test_n))
+    return abs(p2 - p1) / se
+
+
 @pytest.fixture
 def engine():
     """Create a test engine with temp database."""
@@ -52,6 +65,10 @@ def experiment_with_variants(engine):
 # ─── Experiment CRUD ─────────────────────────────────────────────
 
 class TestExperimentCRUD:
+    def test_wal_enabled(self, engine):
+        mode = engine.db.execute("PRAGMA journal_mode").fetchone()[0]
+        assert mode == "wal"
+
     def test_create_experiment(self, engine):
         exp_id = engine.create_experiment(
             name="Test Experiment",
@@ -97,6 +114,62 @@ class TestExperimentCRUD:
         result = engine.delete_experiment(exp_id)
         assert "已删除" in result
 
+    def test_delete_cascades_to_variants_and_metrics(self, experiment_with_variants, engine):
+        exp_id, control_id, _ = experiment_with_variants
+        engine.record_metric(control_id, MetricType.ENGAGEMENT_RATE, 2.0)
+        engine.delete_experiment(exp_id)
+        assert engine.db.execute("SELECT COUNT(*) FROM variants").fetchone()[0] == 0
+        assert engine.db.execute("SELECT COUNT(*) FROM variant_metrics").fetchone()[0] == 0
+
+    def test_legacy_schema_migrated_to_cascade(self):
+        import sqlite3
+        fd, path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        legacy = sqlite3.connect(path)
+        legacy.executescript("""
+            CREATE TABLE experiments (
+                id TEXT PRIMARY KEY, name TEXT NOT NULL, platform TEXT NOT NULL,
+                primary_metric TEXT DEFAULT 'engagement_rate', status TEXT DEFAULT 'draft',
+                min_sample_size INTEGER DEFAULT 100, confidence_threshold REAL DEFAULT 95.0,
+                created_at TEXT NOT NULL, started_at TEXT, completed_at TEXT,
+                notes TEXT DEFAULT ''
+            );
+            CREATE TABLE variants (
+                id TEXT PRIMARY KEY, experiment_id TEXT NOT NULL, name TEXT NOT NULL,
+                variant_type TEXT NOT NULL, content TEXT DEFAULT '',
+                is_control INTEGER DEFAULT 0, sample_size INTEGER DEFAULT 0,
+                FOREIGN KEY (experiment_id) REFERENCES experiments(id)
+            );
+            CREATE TABLE variant_metrics (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, variant_id TEXT NOT NULL,
+                metric_type TEXT NOT NULL, value REAL NOT NULL, recorded_at TEXT NOT NULL,
+                post_id TEXT DEFAULT '',
+                FOREIGN KEY (variant_id) REFERENCES variants(id)
+            );
+            INSERT INTO experiments (id, name, platform, created_at)
+                VALUES ('e1', 'Old', 'ig', '2026-01-01');
+            INSERT INTO variants (id, experiment_id, name, variant_type)
+                VALUES ('v1', 'e1', 'Control', 'caption');
+            INSERT INTO variant_metrics (variant_id, metric_type, value, recorded_at)
+                VALUES ('v1', 'likes', 5, '2026-01-01');
+        """)
+        legacy.close()
+
+        eng = ABTestEngine(db_path=path)
+        try:
+            assert eng.db.execute("SELECT COUNT(*) FROM variant_metrics").fetchone()[0] == 1
+            recorded_at = eng.db.execute("SELECT recorded_at FROM variant_metrics").fetchone()[0]
+            created_at = eng.db.execute("SELECT created_at FROM experiments").fetchone()[0]
+            assert isinstance(recorded_at, int) and isinstance(created_at, int)
+            # ISO text is read as local time; allow for any UTC offset
+            assert abs(recorded_at - 1767225600000) <= 14 * 3600 * 1000
+            assert "已删除" in eng.delete_experiment("e1")
+            assert eng.db.execute("SELECT COUNT(*) FROM variants").fetchone()[0] == 0
+            assert eng.db.execute("SELECT COUNT(*) FROM variant_metrics").fetchone()[0] == 0
+        finally:
+            eng.close()
+            os.unlink(path)
+
     def test_delete_nonexistent(self, engine):
         result = engine.delete_experiment("nonexistent")
         assert "未找到" in result
@@ -117,6 +190,16 @@ class TestExperimentCRUD:
         result = engine.list_experiments(status=ExperimentStatus.DRAFT)
         assert "Draft Exp" in result
 
+    def test_list_paginated(self, engine):
+        for i in range(5):
+            engine.create_experiment(f"Exp{i}", "ig")
+        first = engine.list_experiments(limit=2)
+        rest = engine.list_experiments(limit=10, offset=2)
+        assert "(2个)" in first
+        assert "(3个)" in rest
+        for i in range(5):
+            assert (f"Exp{i}" in first) != (f"Exp{i}" in rest)
+
     def test_list_running_when_none(self, engine):
         engine.create_experiment("Draft Only", "ig")
         result = engine.list_experiments(status=ExperimentStatus.RUNNING)
@@ -186,6 +269,65 @@ class TestRecordMetrics:
         ).fetchone()
         assert row["post_id"] == "post_123"
 
+    def test_recorded_at_is_epoch_ms(self, experiment_with_variants, engine):
+        import time
+        _, control_id, _ = experiment_with_variants
+        before = int(time.time() * 1000)
+        engine.record_metric(control_id, MetricType.LIKES, 1)
+        recorded_at = engine.db.execute("SELECT recorded_at FROM variant_metrics").fetchone()[0]
+        assert isinstance(recorded_at, int)
+        assert before <= recorded_at <= int(time.time() * 1000) + 1
+
+    def test_record_metrics_bulk(self, experiment_with_variants, engine):
+        _, control_id, variant_id = experiment_with_variants
+        rows = [(control_id, MetricType.ENGAGEMENT_RATE, 2.0, "")] * 3
+        rows += [(variant_id, MetricType.ENGAGEMENT_RATE, 3.0, "p1")] * 2
+        assert engine.record_metrics_bulk(rows) == 5
+
+        ctrl_row = engine.db.execute(
+            "SELECT sample_size FROM variants WHERE id=?", (control_id,)
+        ).fetchone()
+        var_row = engine.db.execute(
+            "SELECT sample_size FROM variants WHERE id=?", (variant_id,)
+        ).fetchone()
+        assert ctrl_row["sample_size"] == 3
+        assert var_row["sample_size"] == 2
+
+    def test_sample_size_trigger(self, experiment_with_variants, engine):
+        _, control_id, _ = experiment_with_variants
+        engine.db.execute(
+            "INSERT INTO variant_metrics (variant_id, metric_type, value, recorded_at) "
+            "VALUES (?, 'likes', 1, 0)", (control_id,)
+        )
+        row = engine.db.execute(
+            "SELECT sample_size FROM variants WHERE id=?", (control_id,)
+        ).fetchone()
+        assert row["sample_size"] == 1
+
+    def test_record_metrics_bulk_empty(self, engine):
+        assert engine.record_metrics_bulk([]) == 0
+
+    def test_buffered_record_flushes_on_results(self):
+        fd, path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        eng = ABTestEngine(db_path=path, metric_batch_size=50)
+        try:
+            exp_id = eng.create_experiment("Buffered", "ig")
+            control_id = eng.add_variant(
+                exp_id, "Control", VariantType.CAPTION, "a", is_control=True
+            )
+            for _ in range(5):
+                eng.record_metric(control_id, MetricType.ENGAGEMENT_RATE, 2.0)
+
+            count = eng.db.execute("SELECT COUNT(*) FROM variant_metrics").fetchone()[0]
+            assert count == 0
+
+            result = eng.get_results(exp_id)
+            assert result.variant_results[0]["sample_size"] == 5
+        finally:
+            eng.close()
+            os.unlink(path)
+
 
 # ─── Get Results ─────────────────────────────────────────────────
 
@@ -202,6 +344,83 @@ class TestGetResults:
         assert result.experiment_name == "Caption Test"
         assert len(result.variant_results) == 2
 
+    def test_results_aggregate_per_variant(self, experiment_with_variants, engine):
+        exp_id, control_id, variant_id = experiment_with_variants
+        engine.add_variant(exp_id, "Silent", VariantType.CAPTION, "c")
+        for value in (1.0, 3.0):
+            engine.record_metric(control_id, MetricType.ENGAGEMENT_RATE, value)
+        engine.record_metric(variant_id, MetricType.ENGAGEMENT_RATE, 4.0)
+        engine.record_metric(variant_id, MetricType.LIKES, 99)
+
+        result = engine.get_results(exp_id)
+        by_name = {v["name"]: v for v in result.variant_results}
+        assert result.variant_results[0]["is_control"]
+        assert by_name["Original Caption"]["metric_value"] == 2.0
+        assert by_name["Original Caption"]["sample_size"] == 2
+        assert by_name["Emoji Caption"]["sample_size"] == 1
+        assert by_name["Silent"]["sample_size"] == 0
+        assert by_name["Silent"]["metric_value"] == 0
+
+    def test_results_memoized_until_new_metrics(self, experiment_with_variants, engine):
+        exp_id, control_id, variant_id = experiment_with_variants
+        engine.record_metric(control_id, MetricType.ENGAGEMENT_RATE, 2.0)
+        first = engine.get_results(exp_id)
+        assert engine.get_results(exp_id) is first
+
+        engine.record_metric(variant_id, MetricType.ENGAGEMENT_RATE, 3.0)
+        second = engine.get_results(exp_id)
+        assert second is not first
+        assert sum(v["sample_size"] for v in second.variant_results) == 2
+
+    def test_results_cache_invalidated_by_new_variant(self, experiment_with_variants, engine):
+        exp_id, _, _ = experiment_with_variants
+        first = engine.get_results(exp_id)
+        engine.add_variant(exp_id, "Third", VariantType.CAPTION, "c")
+        assert len(engine.get_results(exp_id).variant_results) == 3
+        assert len(first.variant_results) == 2
+
+    def test_metric_aggregate_uses_covering_index(self, engine):
+        plan = engine.db.execute(
+            "EXPLAIN QUERY PLAN SELECT AVG(value), COUNT(*) FROM variant_metrics "
+            "WHERE variant_id=? AND metric_type=?", ("v", "likes")
+        ).fetchall()
+        assert any("COVERING INDEX idx_metrics_variant_cov" in row[3] for row in plan)
+
+    def test_results_multi_arm_confidence(self, experiment_with_variants, engine):
+        exp_id, control_id, variant_id = experiment_with_variants
+        weak_id = engine.add_variant(exp_id, "Weak", VariantType.CAPTION, "c")
+        for _ in range(100):
+            engine.record_metric(control_id, MetricType.ENGAGEMENT_RATE, 2.0)
+            engine.record_metric(variant_id, MetricType.ENGAGEMENT_RATE, 10.0)
+            engine.record_metric(weak_id, MetricType.ENGAGEMENT_RATE, 2.1)
+
+        result = engine.get_results(exp_id)
+        by_name = {v["name"]: v for v in result.variant_results}
+        assert "confidence" not in by_name["Original Caption"]
+        assert by_name["Weak"]["confidence"] < by_name["Emoji Caption"]["confidence"]
+        assert result.confidence == by_name["Emoji Caption"]["confidence"]
+        assert result.winner_name == "Emoji Caption"
+
+    def test_scan_significance(self, experiment_with_variants, engine):
+        exp_id, control_id, variant_id = experiment_with_variants
+        engine.start_experiment(exp_id)
+        draft_id = engine.create_experiment("Draft", "ig")
+        engine.add_variant(draft_id, "C", VariantType.CAPTION, "a", is_control=True)
+        engine.add_variant(draft_id, "T", VariantType.CAPTION, "b")
+        for _ in range(100):
+            engine.record_metric(control_id, MetricType.ENGAGEMENT_RATE, 1.0)
+            engine.record_metric(variant_id, MetricType.ENGAGEMENT_RATE, 10.0)
+
+        scan = engine.scan_significance()
+        assert [r["experiment_id"] for r in scan] == [exp_id]
+        result = engine.get_results(exp_id)
+        assert scan[0]["best_variant_id"] == variant_id
+        assert scan[0]["confidence"] == pytest.approx(result.confidence)
+        assert scan[0]["lift_percent"] == pytest.approx(result.lift_percent)
+        assert scan[0]["is_significant"] == result.is_significant
+
+        assert len(engine.scan_significance(status=None)) == 2
+
     def test_results_no_data(self, experiment_with_variants, engine):
         exp_id, _, _ = experiment_with_variants
         result = engine.get_results(exp_id)
@@ -266,30 +485,44 @@ class TestStatistics:
         assert _calculate_lift(3.0, 3.0) == 0.0
 
     def test_z_test_low_sample(self):
-        conf = _z_test_confidence(2.0, 1, 4.0, 1)
-        assert conf == 0.0
+        assert _z_confidence(2.0, 1, 4.0, 1) == 0.0
 
     def test_z_test_similar_rates(self):
-        conf = _z_test_confidence(5.0, 100, 5.1, 100)
-        assert conf < 90
+        assert _z_confidence(5.0, 100, 5.1, 100) < 90
 
     def test_z_test_different_rates(self):
-        conf = _z_test_confidence(2.0, 500, 10.0, 500)
-        assert conf > 50
+        assert _z_confidence(2.0, 500, 10.0, 500) > 50
+
+    def test_z_test_batch_matches_single_arms(self):
+        arms = [(2.5, 300), (10.0, 500), (4.0, 1), (5.0, 0)]
+        batch = _z_test_confidence_batch(2.0, 500, arms)
+        assert batch == [_z_confidence(2.0, 500, r, n) for r, n in arms]
 
-    def test_z_to_confidence_high(self):
-        assert _z_to_confidence(3.5) == 99.9
+    def test_z_test_batch_small_control(self):
+        assert _z_test_confidence_batch(2.0, 1, [(3.0, 100)] * 2) == [0.0, 0.0]
 
-    def test_z_to_confidence_medium(self):
-        conf = _z_to_confidence(1.96)
-        assert conf >= 95.0
+    def test_z_test_exact_cdf(self):
+        for control, test in ((2.0, 3.0), (5.0, 6.5), (10.0, 14.0)):
+            z = _pooled_z(control, 400, test, 300)
+            expected = (2 * NormalDist().cdf(z) - 1) * 100
+            assert _z_confidence(control, 400, test, 300) == pytest.approx(expected, abs=1e-9)
 
-    def test_z_to_confidence_low(self):
-        conf = _z_to_confidence(0.5)
-        assert 0 < conf < 50
+    def test_z_test_capped(self):
+        assert _z_confidence(1.0, 10_000, 50.0, 10_000) == 99.99
 
-    def test_z_to_confidence_zero(self):
-        assert _z_to_confidence(0.0) == 0.0
+    def test_z_test_symmetric(self):
+        assert _z_confidence(5.0, 200, 8.0, 200) == _z_confidence(8.0, 200, 5.0, 200)
+
+    def test_z_test_equal_rates(self):
+        assert _z_confidence(5.0, 200, 5.0, 200) == 0.0
+
+    def test_holm_single_arm_unchanged(self):
+        assert _holm_adjust([96.0]) == [96.0]
+
+    def test_holm_adjust(self):
+        # p-values 0.01, 0.04, 0.03 → Holm: 0.03, 0.06, 0.06
+        adjusted = _holm_adjust([99.0, 96.0, 97.0])
+        assert adjusted == [pytest.approx(97.0), pytest.approx(94.0), pytest.approx(94.0)]
 
 
 # ─── Variant dataclass ───────────────────────────────────────────
@@ -301,6 +534,20 @@ class TestVariant:
         v.add_metric(MetricType.LIKES, 100)
         assert v.get_metric(MetricType.LIKES) == 100
 
+    def test_add_metric_running_mean(self):
+        v = Variant(id="v1", name="Test", variant_type=VariantType.CAPTION, content="text")
+        for n, value in enumerate([2.0, 4.0, 9.0], start=1):
+            v.add_metric(MetricType.LIKES, value, n=n)
+        assert v.get_metric(MetricType.LIKES) == pytest.approx(5.0)
+
+    def test_add_observation(self):
+        v = Variant(id="v1", name="Test", variant_type=VariantType.CAPTION, content="text")
+        v.add_observation({MetricType.LIKES: 10, MetricType.SHARES: 2})
+        v.add_observation({MetricType.LIKES: 20, MetricType.SHARES: 4})
+        assert v.sample_size == 2
+        assert v.get_metric(MetricType.LIKES) == pytest.approx(15.0)
+        assert v.get_metric(MetricType.SHARES) == pytest.approx(3.0)
+
     def test_get_missing_metric(self):
         v = Variant(id="v1", name="Test", variant_type=VariantType.CAPTION, content="text")
         assert v.get_metric(MetricType.SHARES) == 0.0
@@ -345,3 +592,27 @@ class TestRecommendations:
             variant_data, variant_data[0], True, MetricType.ENGAGEMENT_RATE
         )
         assert any("优异" in r or "全量" in r for r in recs)
+
+    def test_zero_control_skips_variant_flags(self):
+        variant_data = [
+            {"id": "c", "name": "Control", "is_control": True,
+             "metric_value": 0.0, "sample_size": 100},
+            {"id": "t", "name": "Test", "is_control": False,
+             "metric_value": 10.0, "sample_size": 100},
+        ]
+        recs = _generate_recommendations(
+            variant_data, variant_data[0], True, MetricType.CLICKS
+        )
+        assert not any("Test" in r for r in recs)
+
+    def test_within_band_not_flagged(self):
+        variant_data = [
+            {"id": "c", "name": "Control", "is_control": True,
+             "metric_value": 10.0, "sample_size": 100},
+            {"id": "t", "name": "Similar", "is_control": False,
+             "metric_value": 12.0, "sample_size": 100},
+        ]
+        recs = _generate_recommendations(
+            variant_data, variant_data[0], True, MetricType.SHARES
+        )
+        assert not any("Similar" in r for r in recs)
@@ -38,6 +38,29 @@ class TestTrack:
         assert "testuser" in listed
 
 
+class TestTrackBulk:
+    def test_track_bulk(self, analytics):
+        added = analytics.track_bulk([
+            ("IG", "Alpha", ""),
+            ("tw", "beta", "竞品"),
+            ("tt", "gamma", ""),
+        ])
+        assert added == 3
+        listed = analytics.list_tracked()
+        assert "3个" in listed
+        assert "ig @alpha" in listed
+        assert "@beta — 竞品" in listed
+
+    def test_track_bulk_ignores_existing(self, analytics):
+        analytics.track("ig", "alpha")
+        added = analytics.track_bulk([("ig", "alpha", ""), ("ig", "beta", "")])
+        assert added == 1
+        assert "2个" in analytics.list_tracked()
+
+    def test_track_bulk_empty(self, analytics):
+        assert analytics.track_bulk([]) == 0
+
+
 class TestUntrack:
     def test_untrack_existing(self, analytics):
         analytics.track("ig", "testuser")
@@ -64,6 +87,18 @@ class TestListTracked:
         assert "user2" in result
         assert "user3" in result
 
+    def test_list_paginated(self, analytics):
+        for name in ("a", "b", "c"):
+            analytics.track("ig", name)
+        result = analytics.list_tracked(limit=2, offset=1)
+        assert "2个" in result
+        assert "@a" not in result
+        assert "@b" in result and "@c" in result
+
+    def test_list_notes(self, analytics):
+        analytics.track("ig", "user1", notes="竞品")
+        assert "@user1 — 竞品" in analytics.list_tracked()
+
     def test_list_emojis(self, analytics):
         analytics.track("ig", "a")
         analytics.track("tw", "b")
@@ -89,6 +124,26 @@ class TestSnapshots:
         assert "bio" in rows[0]["extra_json"]
 
 
+    def test_save_without_extra_stores_empty_json(self, analytics):
+        analytics.save_snapshot("ig", "user")
+        row = analytics.db.execute("SELECT extra_json FROM snapshots").fetchone()
+        assert row["extra_json"] == "{}"
+
+    def test_save_snapshots_bulk(self, analytics):
+        count = analytics.save_snapshots_bulk([
+            ("ig", "user1", 1000, 10, 2.5, None),
+            ("ig", "user1", 1100, 11, 2.7, {"bio": "x"}),
+            ("tw", "user2", 50, 1, 0.0, {}),
+        ])
+        assert count == 3
+        rows = analytics.db.execute(
+            "SELECT username, followers, extra_json FROM snapshots ORDER BY id"
+        ).fetchall()
+        assert [r["followers"] for r in rows] == [1000, 1100, 50]
+        assert rows[1]["extra_json"] == '{"bio":"x"}'
+        assert rows[2]["extra_json"] == "{}"
+
+
 class TestGrowth:
     def test_insufficient_data(self, analytics):
         result = analytics.get_growth("ig", "testuser")
@@ -101,6 +156,26 @@ class TestGrowth:
         assert "+200" in result
         assert "2个" in result
 
+    def test_growth_uses_first_and_last(self, analytics):
+        for followers in (1000, 5000, 900, 1500):
+            analytics.save_snapshot("ig", "user1", followers=followers, posts=1)
+        result = analytics.get_growth("ig", "user1")
+        assert "1,500 (+500)" in result
+        assert "4个" in result
+
+    def test_growth_ignores_other_accounts(self, analytics):
+        analytics.save_snapshot("ig", "user1", followers=100)
+        analytics.save_snapshot("ig", "user2", followers=200)
+        assert "数据不足" in analytics.get_growth("ig", "user1")
+
+    def test_growth_window_uses_covering_index(self, analytics):
+        plan = analytics.db.execute(
+            "EXPLAIN QUERY PLAN SELECT followers, posts FROM snapshots "
+            "WHERE platform=? AND username=? AND captured_at>=? ORDER BY captured_at",
+            ("ig", "user1", 0)
+        ).fetchall()
+        assert any("COVERING INDEX idx_snapshots_pu_time" in row[3] for row in plan)
+
     def test_growth_custom_days(self, analytics):
         analytics.save_snapshot("ig", "user1", followers=500)
         analytics.save_snapshot("ig", "user1", followers=600)
@@ -108,6 +183,57 @@ class TestGrowth:
         assert "30天增长" in result
 
 
+class TestPragmas:
+    def test_wal_enabled(self, analytics):
+        assert analytics.db.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    def test_synchronous_normal(self, analytics):
+        assert analytics.db.execute("PRAGMA synchronous").fetchone()[0] == 1
+
+
+class TestTimestamps:
+    def test_snapshot_captured_at_is_epoch_ms(self, analytics):
+        import time
+        analytics.save_snapshot("ig", "user1", followers=1)
+        captured_at = analytics.db.execute("SELECT captured_at FROM snapshots").fetchone()[0]
+        assert isinstance(captured_at, int)
+        assert abs(captured_at - time.time() * 1000) < 60_000
+
+    def test_legacy_text_timestamps_migrated(self):
+        import sqlite3
+        import time
+        with tempfile.NamedTemporaryFile(suffix=".db", delete=False) as f:
+            db_path = f.name
+        legacy = sqlite3.connect(db_path)
+        legacy.executescript("""
+            CREATE TABLE snapshots (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                platform TEXT NOT NULL, username TEXT NOT NULL,
+                followers INTEGER DEFAULT 0, posts INTEGER DEFAULT 0,
+                engagement_rate REAL DEFAULT 0, extra_json TEXT DEFAULT '{}',
+                captured_at TEXT NOT NULL
+            );
+        """)
+        legacy.execute(
+            "INSERT INTO snapshots (platform, username, followers, captured_at) "
+            "VALUES ('ig', 'user1', 100, ?)",
+            (time.strftime("%Y-%m-%dT%H:%M:%S"),)
+        )
+        legacy.commit()
+        legacy.close()
+
+        a = Analytics(db_path=db_path)
+        try:
+            captured_at = a.db.execute("SELECT captured_at FROM snapshots").fetchone()[0]
+            assert isinstance(captured_at, int)
+            assert abs(captured_at - time.time() * 1000) < 60_000
+            a.save_snapshot("ig", "user1", followers=150)
+            assert "+50" in a.get_growth("ig", "user1")
+        finally:
+            a.close()
+            os.unlink(db_path)
+
+
 class TestClose:
     def test_close(self):
         with tempfile.NamedTemporaryFile(suffix=".db", delete=False) as f:
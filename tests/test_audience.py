@@ -60,6 +60,16 @@ def _make_profile(
     )
 
 
+def _classify(engine, profile):
+    """Store ``profile`` and read back the tier and stage set by the trigger."""
+    engine.add_follower(profile)
+    row = engine.db.execute(
+        "SELECT engagement_tier, lifecycle_stage FROM followers WHERE user_id = ?",
+        (profile.user_id,),
+    ).fetchone()
+    return EngagementTier(row[0]), LifecycleStage(row[1])
+
+
 # ─── FollowerProfile ─────────────────────────────────────────────
 
 class TestFollowerProfile:
@@ -85,10 +95,20 @@ class TestFollowerProfile:
         p = FollowerProfile(user_id="x", last_active="")
         assert p.days_since_active == 999
 
+    def test_slots_reject_unknown_attributes(self):
+        p = _make_profile()
+        assert not hasattr(p, "__dict__")
+        with pytest.raises(AttributeError):
+            p.nickname = "x"
+
 
 # ─── Add Follower ────────────────────────────────────────────────
 
 class TestAddFollower:
+    def test_wal_enabled(self, engine):
+        mode = engine.db.execute("PRAGMA journal_mode").fetchone()[0]
+        assert mode == "wal"
+
     def test_add_single(self, engine):
         p = _make_profile()
         result = engine.add_follower(p)
@@ -119,74 +139,197 @@ class TestAddFollower:
         ).fetchone()
         assert count["cnt"] == 20
 
+    def test_bulk_add_classifies_and_replaces(self, engine):
+        engine.add_follower(_make_profile(user_id="u0", likes=1, comments=0, shares=0, saves=0))
+        engine.bulk_add_followers([
+            _make_profile(user_id="u0", likes=50, comments=30, shares=20, saves=10),
+            _make_profile(user_id="u1", likes=1, comments=0, shares=0, saves=0),
+        ])
+        rows = dict(engine.db.execute(
+            "SELECT user_id, engagement_tier FROM followers"
+        ).fetchall())
+        assert rows == {"u0": "superfan", "u1": "passive"}
+
+    def test_bulk_add_empty(self, engine):
+        assert "0" in engine.bulk_add_followers([])
+
+    def test_large_bulk_add_rebuilds_indexes(self, engine):
+        profiles = [_make_profile(user_id=f"u{i}") for i in range(1001)]
+        engine.bulk_add_followers(profiles)
+        indexes = {r[0] for r in engine.db.execute(
+            "SELECT name FROM sqlite_master WHERE type='index' AND tbl_name='followers'")}
+        assert {"idx_followers_platform", "idx_followers_tier",
+                "idx_followers_interactions",
+                "idx_followers_platform_interactions"} <= indexes
+        assert engine.db.execute("SELECT COUNT(*) FROM followers").fetchone()[0] == 1001
+        assert not engine.db.in_transaction
+
+    def test_child_rows_replaced_on_update(self, engine):
+        engine.add_follower(_make_profile(active_hours=[9, 12], preferred_content=["image"]))
+        engine.bulk_add_followers([
+            _make_profile(active_hours=[20], preferred_content=["reel", "story"]),
+        ])
+        hours = [r[0] for r in engine.db.execute(
+            "SELECT hour FROM follower_active_hours")]
+        content = sorted(r[0] for r in engine.db.execute(
+            "SELECT content FROM follower_preferred_content"))
+        assert hours == [20]
+        assert content == ["reel", "story"]
+
+    def test_bulk_add_duplicate_profiles(self, engine):
+        engine.bulk_add_followers([
+            _make_profile(active_hours=[9, 12], preferred_content=["image"]),
+            _make_profile(active_hours=[20], preferred_content=["reel"]),
+        ])
+        assert engine.db.execute("SELECT COUNT(*) FROM followers").fetchone()[0] == 1
+        hours = [r[0] for r in engine.db.execute("SELECT hour FROM follower_active_hours")]
+        content = [r[0] for r in engine.db.execute(
+            "SELECT content FROM follower_preferred_content")]
+        assert hours == [20]
+        assert content == ["reel"]
+
+    def test_active_hours_stored_as_bytes(self, engine):
+        engine.add_follower(_make_profile(active_hours=[0, 9, 23]))
+        raw = engine.db.execute("SELECT active_hours FROM followers").fetchone()[0]
+        assert raw == bytes([0, 9, 23])
+        assert list(raw) == [0, 9, 23]
+
+    def test_legacy_json_hours_migrated(self):
+        fd, path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        try:
+            eng = AudienceEngine(db_path=path)
+            eng.add_follower(_make_profile(active_hours=[7, 8], preferred_content=["reel"]))
+            # Simulate a database from before the child tables and BLOB column
+            eng.db.executescript("""
+                ALTER TABLE followers DROP COLUMN active_hours;
+                ALTER TABLE followers ADD COLUMN active_hours_json TEXT DEFAULT '[]';
+                UPDATE followers SET active_hours_json='[7, 8]';
+                DELETE FROM follower_active_hours;
+                DELETE FROM follower_preferred_content;
+            """)
+            eng.close()
+
+            eng = AudienceEngine(db_path=path)
+            columns = {c["name"] for c in eng.db.execute("PRAGMA table_info(followers)")}
+            assert "active_hours_json" not in columns
+            raw = eng.db.execute("SELECT active_hours FROM followers").fetchone()[0]
+            assert list(raw) == [7, 8]
+            hours = sorted(r[0] for r in eng.db.execute(
+                "SELECT hour FROM follower_active_hours"))
+            assert hours == [7, 8]
+            assert eng.db.execute(
+                "SELECT content FROM follower_preferred_content").fetchone()[0] == "reel"
+            eng.close()
+        finally:
+            os.unlink(path)
+
 
 # ─── Tier Classification ────────────────────────────────────────
 
 class TestTierClassification:
     def test_superfan(self, engine):
         p = _make_profile(likes=50, comments=30, shares=20, saves=10)
-        tier = engine._classify_tier(p)
+        tier, _ = _classify(engine, p)
         assert tier == EngagementTier.SUPERFAN
 
     def test_active(self, engine):
         p = _make_profile(likes=10, comments=5, shares=2, saves=1)
-        tier = engine._classify_tier(p)
+        tier, _ = _classify(engine, p)
         assert tier == EngagementTier.ACTIVE
 
     def test_casual(self, engine):
         p = _make_profile(likes=3, comments=1, shares=0, saves=0)
-        tier = engine._classify_tier(p)
+        tier, _ = _classify(engine, p)
         assert tier == EngagementTier.CASUAL
 
     def test_passive(self, engine):
         p = _make_profile(likes=1, comments=0, shares=0, saves=0)
-        tier = engine._classify_tier(p)
+        tier, _ = _classify(engine, p)
         assert tier == EngagementTier.PASSIVE
 
     def test_dormant(self, engine):
         p = _make_profile(likes=10, comments=5, days_ago_active=45)
-        tier = engine._classify_tier(p)
+        tier, _ = _classify(engine, p)
         assert tier == EngagementTier.DORMANT
 
     def test_churned(self, engine):
         p = _make_profile(likes=10, comments=5, days_ago_active=100)
-        tier = engine._classify_tier(p)
+        tier, _ = _classify(engine, p)
         assert tier == EngagementTier.CHURNED
 
+    def test_trigger_boundaries(self, engine):
+        cases = {
+            # user_id: (likes, comments, days_ago_active, days_ago_followed, tier, stage)
+            "u1": (50, 0, 1, 200, "superfan", "loyal"),
+            "u2": (49, 0, 1, 200, "active", "loyal"),
+            "u3": (20, 0, 15, 200, "active", "at_risk"),
+            "u4": (19, 0, 1, 60, "casual", "established"),
+            "u5": (5, 0, 1, 15, "casual", "onboarding"),
+            "u6": (2, 1, 1, 3, "casual", "new_follower"),
+            "u7": (4, 0, 1, 3, "passive", "new_follower"),
+            "u8": (200, 1, 31, 60, "dormant", "established"),
+            "u9": (200, 1, 91, 200, "churned", "at_risk"),
+        }
+        profiles = [
+            _make_profile(user_id=uid, likes=likes, comments=comments, shares=0, saves=0,
+                          days_ago_active=active, days_ago_followed=followed)
+            for uid, (likes, comments, active, followed, _, _) in cases.items()
+        ]
+        profiles.append(FollowerProfile(user_id="blank", platform="instagram"))
+        engine.bulk_add_followers(profiles)
+        stored = {
+            r["user_id"]: (r["engagement_tier"], r["lifecycle_stage"])
+            for r in engine.db.execute(
+                "SELECT user_id, engagement_tier, lifecycle_stage FROM followers")
+        }
+        expected = {uid: case[4:] for uid, case in cases.items()}
+        expected["blank"] = ("churned", "established")
+        assert stored == expected
+
 
 # ─── Lifecycle Classification ────────────────────────────────────
 
 class TestLifecycleClassification:
     def test_new_follower(self, engine):
         p = _make_profile(days_ago_followed=3)
-        stage = engine._classify_lifecycle(p)
+        _, stage = _classify(engine, p)
         assert stage == LifecycleStage.NEW_FOLLOWER
 
     def test_onboarding(self, engine):
         p = _make_profile(days_ago_followed=15)
-        stage = engine._classify_lifecycle(p)
+        _, stage = _classify(engine, p)
         assert stage == LifecycleStage.ONBOARDING
 
     def test_established(self, engine):
         p = _make_profile(days_ago_followed=60)
-        stage = engine._classify_lifecycle(p)
+        _, stage = _classify(engine, p)
         assert stage == LifecycleStage.ESTABLISHED
 
     def test_loyal(self, engine):
         p = _make_profile(days_ago_followed=200, days_ago_active=1)
-        stage = engine._classify_lifecycle(p)
+        _, stage = _classify(engine, p)
         assert stage == LifecycleStage.LOYAL
 
     def test_at_risk(self, engine):
         p = _make_profile(days_ago_followed=200, days_ago_active=20)
-        stage = engine._classify_lifecycle(p)
+        _, stage = _classify(engine, p)
         assert stage == LifecycleStage.AT_RISK
 
     def test_no_follow_date(self, engine):
         p = FollowerProfile(user_id="x", followed_at="")
-        stage = engine._classify_lifecycle(p)
+        _, stage = _classify(engine, p)
         assert stage == LifecycleStage.ESTABLISHED
 
+    def test_utc_suffix_ignored(self, engine):
+        now = datetime.now()
+        p = FollowerProfile(
+            user_id="x",
+            followed_at=(now - timedelta(days=3)).isoformat(timespec="seconds") + "Z",
+            last_active=(now - timedelta(days=1)).isoformat(timespec="seconds") + "Z",
+        )
+        assert _classify(engine, p) == (EngagementTier.PASSIVE, LifecycleStage.NEW_FOLLOWER)
+
 
 # ─── Insights ────────────────────────────────────────────────────
 
@@ -242,6 +385,65 @@ class TestInsights:
         insights = engine.get_insights("instagram")
         assert len(insights.top_languages) > 0
 
+    def test_insights_aggregate_counts(self, engine):
+        self._populate(engine)
+        engine.add_follower(_make_profile(
+            user_id="other", platform="tiktok", country="FR", language="fr",
+        ))
+        insights = engine.get_insights("instagram")
+        assert sum(insights.engagement_distribution.values()) == 50
+        assert dict(insights.top_countries) == {c: 10 for c in ("US", "CN", "UK", "DE", "JP")}
+        assert dict(insights.top_languages) == {"en": 20, "zh": 10, "de": 10, "ja": 10}
+
+    def test_hour_and_content_averages(self, engine):
+        engine.bulk_add_followers([
+            _make_profile(user_id="a", likes=10, comments=0, shares=0, saves=0,
+                          active_hours=[9], preferred_content=["reel"]),
+            _make_profile(user_id="b", likes=30, comments=0, shares=0, saves=0,
+                          active_hours=[9, 21], preferred_content=["reel", "image"]),
+        ])
+        insights = engine.get_insights("instagram")
+        assert insights.top_active_hours == [(21, 30.0), (9, 20.0)]
+        assert insights.content_preferences == [("image", 30.0), ("reel", 20.0)]
+
+    def test_ranked_lists_capped_at_ten(self, engine):
+        engine.bulk_add_followers([
+            _make_profile(user_id=f"u{h}", likes=h, active_hours=[h],
+                          preferred_content=[f"fmt{h}"])
+            for h in range(24)
+        ])
+        insights = engine.get_insights("instagram")
+        assert [h for h, _ in insights.top_active_hours] == list(range(23, 13, -1))
+        assert len(insights.content_preferences) == 10
+        assert insights.content_preferences[0][0] == "fmt23"
+
+    def test_segment_ids_stable(self, engine):
+        import hashlib
+        self._populate(engine)
+        first = {s.name: s.id for s in engine.get_insights("instagram").segments}
+        second = {s.name: s.id for s in engine.get_insights("instagram").segments}
+        assert first == second
+        for name, seg_id in first.items():
+            tier = name.lower().replace(" ", "_")
+            assert seg_id == hashlib.md5(f"instagram_{tier}".encode()).hexdigest()[:10]
+
+    def test_segments_aggregate_per_tier(self, engine):
+        self._populate(engine)
+        insights = engine.get_insights("instagram")
+        by_tier = {s.name.lower(): s for s in insights.segments}
+        for tier, count in insights.engagement_distribution.items():
+            rows = engine.db.execute(
+                "SELECT total_interactions FROM followers "
+                "WHERE platform='instagram' AND engagement_tier=?", (tier,)
+            ).fetchall()
+            seg = by_tier[tier.replace("_", " ")]
+            assert seg.size == count
+            assert seg.avg_engagement_rate == pytest.approx(
+                sum(r[0] for r in rows) / len(rows))
+            assert 0 < len(seg.top_active_hours) <= 3
+        rates = [s.avg_engagement_rate for s in insights.segments]
+        assert rates == sorted(rates, reverse=True)
+
     def test_insights_saves_snapshot(self, engine):
         self._populate(engine)
         engine.get_insights("instagram")
@@ -250,6 +452,52 @@ class TestInsights:
         ).fetchone()
         assert snapshots["cnt"] >= 1
 
+    def test_insights_cached_within_ttl(self, engine):
+        self._populate(engine)
+        first = engine.get_insights("instagram")
+        assert engine.get_insights("instagram") is first
+        snapshots = engine.db.execute(
+            "SELECT COUNT(*) FROM audience_snapshots").fetchone()[0]
+        assert snapshots == 1
+
+    def test_insights_cache_invalidated_by_writes(self, engine):
+        self._populate(engine)
+        first = engine.get_insights("instagram")
+        engine.add_follower(_make_profile(user_id="new"))
+        second = engine.get_insights("instagram")
+        assert second is not first
+        assert second.total_followers == 51
+        engine.bulk_add_followers([_make_profile(user_id="newer")])
+        assert engine.get_insights("instagram").total_followers == 52
+
+    def test_insights_cache_expires(self, engine, monkeypatch):
+        import app.audience as audience
+        self._populate(engine)
+        first = engine.get_insights("instagram")
+        now = audience.time.monotonic()
+        monkeypatch.setattr(audience.time, "monotonic", lambda: now + 61)
+        assert engine.get_insights("instagram") is not first
+
+    def test_snapshots_buffered_until_batch_full(self):
+        fd, path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        try:
+            eng = AudienceEngine(db_path=path, snapshot_batch_size=3, insights_ttl=0)
+            eng.add_follower(_make_profile())
+            count = lambda: eng.db.execute(
+                "SELECT COUNT(*) FROM audience_snapshots").fetchone()[0]
+            eng.get_insights("instagram")
+            eng.get_insights("instagram")
+            assert count() == 0
+            eng.get_insights("instagram")
+            assert count() == 3
+            eng.get_insights("instagram")
+            assert "数据不足" not in eng.get_growth_trend("instagram")
+            assert count() == 4
+            eng.close()
+        finally:
+            os.unlink(path)
+
 
 # ─── Growth Trend ────────────────────────────────────────────────
 
@@ -280,6 +528,52 @@ class TestGrowthTrend:
         assert "增长趋势" in result
         assert "150" in result
 
+    def test_tier_deltas_from_snapshot_columns(self, engine):
+        engine.add_follower(_make_profile(user_id="a", likes=60))
+        engine.get_insights("instagram")
+        engine.bulk_add_followers([
+            _make_profile(user_id=f"s{i}", likes=60) for i in range(3)
+        ])
+        engine.get_insights("instagram")
+        row = engine.db.execute(
+            "SELECT superfan_count, casual_count FROM audience_snapshots "
+            "ORDER BY id DESC LIMIT 1"
+        ).fetchone()
+        assert tuple(row) == (4, 0)
+        result = engine.get_growth_trend("instagram")
+        assert "📅 数据点: 2个" in result
+        assert "superfan: 4 (+3)" in result
+
+    def test_legacy_snapshots_backfilled_from_json(self):
+        fd, path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        try:
+            eng = AudienceEngine(db_path=path)
+            eng.db.executescript("""
+                DROP TABLE audience_snapshots;
+                CREATE TABLE audience_snapshots (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    platform TEXT NOT NULL,
+                    total_followers INTEGER NOT NULL,
+                    segment_counts_json TEXT DEFAULT '{}',
+                    insights_json TEXT DEFAULT '{}',
+                    captured_at TEXT NOT NULL
+                );
+                INSERT INTO audience_snapshots
+                    (platform, total_followers, segment_counts_json, captured_at)
+                    VALUES ('instagram', 100, '{"superfan": 5, "dormant": 2}', '2024-01-01');
+            """)
+            eng.close()
+
+            eng = AudienceEngine(db_path=path)
+            row = eng.db.execute(
+                "SELECT superfan_count, active_count, dormant_count FROM audience_snapshots"
+            ).fetchone()
+            assert tuple(row) == (5, 0, 2)
+            eng.close()
+        finally:
+            os.unlink(path)
+
 
 # ─── Lookalikes ──────────────────────────────────────────────────
 
@@ -300,6 +594,21 @@ class TestLookalikes:
         results = engine.find_lookalikes("superfan", "instagram", limit=10)
         assert isinstance(results, list)
 
+    def test_lookalikes_closest_to_target_average(self, engine):
+        engine.bulk_add_followers(
+            [_make_profile(user_id=f"s{i}", likes=60, comments=0, shares=0, saves=0)
+             for i in range(3)]
+            + [_make_profile(user_id=f"c{i}", likes=5 + i, comments=0, shares=0, saves=0)
+               for i in range(15)]
+        )
+        results = engine.find_lookalikes("superfan", "instagram", limit=4)
+        assert [r["user_id"] for r in results] == ["c14", "c13", "c12", "c11"]
+        assert all(r["engagement_tier"] != "superfan" for r in results)
+        assert results[0]["active_hours"] == [9, 12, 18, 21]
+        assert results[0]["username"] == "testuser"
+        for key in ("followed_at", "last_active", "updated_at", "preferred_content_json"):
+            assert key in results[0]
+
     def test_no_target_segment(self, engine):
         results = engine.find_lookalikes("superfan", "instagram")
         assert results == []
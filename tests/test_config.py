@@ -106,3 +106,18 @@ class TestAppConfig:
             from app.config import AppConfig
             cfg = AppConfig()
             assert "Instagram" in cfg.active_platforms
+
+    def test_no_bot_token_needed_until_telegram_used(self):
+        with patch.dict(os.environ, {}, clear=True):
+            from app.config import AppConfig
+            cfg = AppConfig()
+            assert cfg.active_platforms == []
+            with pytest.raises(ValueError, match="BOT_TOKEN"):
+                cfg.telegram
+
+    def test_sub_configs_cached(self):
+        with patch.dict(os.environ, {"BOT_TOKEN": "t"}):
+            from app.config import AppConfig
+            cfg = AppConfig()
+            assert cfg.telegram is cfg.telegram
+            assert cfg.instagram is cfg.instagram
@@ -35,6 +35,28 @@ class TestSuggestHashtags:
             result = suggest_hashtags(niche)
             assert "#" in result
 
+    def test_niche_resolution(self):
+        from app.content import _resolve_niche_key
+        assert _resolve_niche_key("tech startup") == "tech"
+        assert _resolve_niche_key("fin") == "finance"
+        assert _resolve_niche_key("xyznonexistent") is None
+        for niche in HASHTAG_DB:
+            assert _resolve_niche_key(niche) == niche
+
+    def test_sample_tags_distinct_subset(self):
+        from app.content import _sample_tags
+        for _ in range(20):
+            tags = _sample_tags("gaming", 4)
+            assert len(tags) == len(set(tags)) == 4
+            assert set(tags) <= set(HASHTAG_DB["gaming"])
+        assert sorted(_sample_tags("gaming", 100)) == sorted(HASHTAG_DB["gaming"])
+
+    def test_unknown_niche_uses_all_tags(self):
+        tags = suggest_hashtags("xyznonexistent", count=50).split("\n\n")[1].split()
+        pool = {t for niche_tags in HASHTAG_DB.values() for t in niche_tags}
+        assert len(tags) == 50
+        assert set(tags) <= pool
+
 
 class TestGenerateIdeas:
     def test_default_count(self):
@@ -55,6 +77,12 @@ class TestGenerateIdeas:
         result = generate_ideas("finance")
         assert "finance" in result
 
+    def test_ideas_match_format(self):
+        from app.content import _ideas_for
+        assert _ideas_for("tech") == tuple(
+            t.format(niche="tech") for t in IDEA_TEMPLATES
+        )
+
     def test_all_templates_valid(self):
         for tmpl in IDEA_TEMPLATES:
             formatted = tmpl.format(niche="test")
@@ -50,6 +50,11 @@ class TestExtractHashtags:
         clean, tags = extract_hashtags(text)
         assert "coding123" in tags
 
+    def test_cleaned_text_exact(self):
+        clean, tags = extract_hashtags("Ship it  #today\n#now, then rest ##twice #")
+        assert clean == "Ship it, then rest # #"
+        assert tags == ["today", "now", "twice"]
+
 
 # ─── extract_mentions ────────────────────────────────────────────
 
@@ -87,6 +92,10 @@ class TestTruncateSmart:
         assert result.endswith("...")
         assert len(result) <= 35
 
+    def test_period_preferred_over_later_break(self):
+        text = "Alpha beta gamma delta. Eps! Zeta eta theta iota kappa lambda"
+        assert truncate_smart(text, 40) == "Alpha beta gamma delta...."
+
     def test_word_boundary(self):
         text = "word1 word2 word3 word4 word5 word6 word7"
         result = truncate_smart(text, 20)
@@ -134,6 +143,22 @@ class TestSplitIntoThread:
 # ─── repurpose ───────────────────────────────────────────────────
 
 class TestRepurpose:
+    def test_suggestions_follow_length_thresholds(self):
+        from app.content_repurposer import _build_suggestions
+        short = _build_suggestions(Platform.TWITTER, Platform.TIKTOK, "x" * 300)
+        long = _build_suggestions(Platform.TWITTER, Platform.TIKTOK, "x" * 301)
+        assert "内容较长，建议拆分为系列(Part 1/2/3)" not in short
+        assert "内容较长，建议拆分为系列(Part 1/2/3)" in long
+        long.append("mutated")
+        assert "mutated" not in _build_suggestions(
+            Platform.TWITTER, Platform.TIKTOK, "x" * 301
+        )
+
+    def test_result_has_no_instance_dict(self):
+        result = repurpose("Hello world", Platform.TWITTER, Platform.LINKEDIN)
+        assert not hasattr(result, "__dict__")
+        assert result.char_count == len(result.adapted_text)
+
     def test_twitter_to_instagram(self):
         result = repurpose(
             "Quick thoughts on AI #ai #tech",
@@ -197,6 +222,14 @@ class TestRepurpose:
         )
         assert any(t in ["fyp", "foryou"] for t in result.hashtags)
 
+    def test_hashtags_deduplicated_in_order(self):
+        result = repurpose(
+            "Clip #FYP #Python #python #Code #dance",
+            Platform.INSTAGRAM,
+            Platform.TIKTOK,
+        )
+        assert result.hashtags == ["fyp", "foryou", "python", "code", "dance"]
+
     def test_generates_suggestions(self):
         result = repurpose(
             "Some content",
@@ -225,6 +258,16 @@ class TestRepurpose:
         assert "Therefore" not in result.adapted_text
         assert "Furthermore" not in result.adapted_text
 
+    def test_tiktok_tone_rewrites(self):
+        formal = "Therefore, we should. However, consider this. In conclusion, ship it."
+        result = repurpose(formal, Platform.LINKEDIN, Platform.TIKTOK)
+        assert result.adapted_text == "So we should. But consider this. Bottom line: ship it."
+
+    def test_twitter_drops_verbose_phrases(self):
+        text = "Today I want to share a tip. Let me explain why it works."
+        result = repurpose(text, Platform.LINKEDIN, Platform.TWITTER)
+        assert result.adapted_text == "a tip. why it works."
+
     def test_formatted_output(self):
         result = repurpose(
             "Test content",
@@ -243,7 +286,7 @@ class TestRepurpose:
                 target,
             )
             if target != Platform.TWITTER or not result.is_thread:
-                limit = PLATFORM_LIMITS[target]["chars"]
+                limit = PLATFORM_LIMITS[target].chars
                 assert result.char_count <= limit + 10  # small buffer
 
 
@@ -261,6 +304,14 @@ class TestRepurposeToAll:
         assert Platform.TWITTER not in target_platforms
         assert len(results) == len(Platform) - 1
 
+    def test_matches_single_repurpose(self):
+        text = "Therefore, this works. Furthermore, it scales! #python #Dev"
+        for r in repurpose_to_all(text, Platform.INSTAGRAM):
+            single = repurpose(text, Platform.INSTAGRAM, r.target_platform)
+            assert r.adapted_text == single.adapted_text
+            assert r.hashtags == single.hashtags
+            assert r.thread_parts == single.thread_parts
+
     def test_each_result_valid(self):
         results = repurpose_to_all("Hello world", Platform.INSTAGRAM)
         for r in results:
@@ -281,6 +332,24 @@ class TestBatchRepurpose:
         assert len(results) == 2
         assert all(r.target_platform == Platform.LINKEDIN for r in results)
 
+    def test_unknown_source_defaults_to_twitter(self):
+        results = batch_repurpose(
+            [{"text": "Some post", "source": "myspace"}, {"text": "Other post"}],
+            Platform.LINKEDIN,
+        )
+        assert [r.original_platform for r in results] == [Platform.TWITTER] * 2
+
+    def test_duplicate_texts(self):
+        items = [
+            {"text": "Same post #coding", "source": "twitter"},
+            {"text": "Same post #coding", "source": "instagram"},
+        ]
+        results = batch_repurpose(items, Platform.TIKTOK)
+        assert [r.original_platform for r in results] == [
+            Platform.TWITTER, Platform.INSTAGRAM
+        ]
+        assert results[0].hashtags == results[1].hashtags == ["fyp", "foryou", "coding"]
+
     def test_empty_batch(self):
         results = batch_repurpose([], Platform.TWITTER)
         assert results == []
@@ -314,8 +383,11 @@ class TestConstants:
     def test_all_platforms_have_limits(self):
         for p in Platform:
             assert p in PLATFORM_LIMITS
-            assert "chars" in PLATFORM_LIMITS[p]
-            assert "hashtags" in PLATFORM_LIMITS[p]
+            assert PLATFORM_LIMITS[p].chars > 0
+            assert PLATFORM_LIMITS[p].hashtags > 0
+
+    def test_platform_ordinal_follows_definition_order(self):
+        assert [p.ordinal for p in Platform] == list(range(len(Platform)))
 
     def test_all_platforms_have_emoji(self):
         for p in Platform:
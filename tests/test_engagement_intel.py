@@ -0,0 +1,215 @@
+"""Tests for Engagement Intelligence module."""
+
+from dataclasses import asdict
+
+from app.engagement_intel import (
+    ContentType,
+    HashtagIndex,
+    PerformanceLevel,
+    PostMetrics,
+    analyze_engagement,
+    classify_performance,
+    content_type_analysis,
+    engagement_decay_rate,
+    hashtag_performance,
+    optimal_posting_times,
+    viral_potential_score,
+)
+
+
+def _post(**kwargs) -> PostMetrics:
+    defaults = dict(
+        post_id="p1", platform="instagram", posted_at="2024-03-04T09:30:00Z",
+        likes=80, comments=10, shares=5, saves=5, followers_at_time=1000,
+    )
+    defaults.update(kwargs)
+    return PostMetrics(**defaults)
+
+
+# ─── PostMetrics ─────────────────────────────────────────────────
+
+class TestPostMetrics:
+    def test_engagement_rate(self):
+        p = _post()
+        assert p.total_engagement == 100
+        assert p.engagement_rate == 10.0
+
+    def test_slots_and_fields(self):
+        p = _post()
+        assert not hasattr(p, "__dict__")
+        assert not any(name.startswith("_") for name in asdict(p))
+
+    def test_rate_follows_mutation(self):
+        p = _post()
+        assert p.engagement_rate == 10.0
+        p.likes = 180
+        assert p.engagement_rate == 20.0
+
+    def test_zero_followers(self):
+        assert _post(followers_at_time=0).engagement_rate == 0.0
+
+
+# ─── classify_performance ────────────────────────────────────────
+
+class TestClassifyPerformance:
+    def test_levels(self):
+        assert classify_performance(12.0, "instagram") == PerformanceLevel.VIRAL
+        assert classify_performance(4.0, "instagram") == PerformanceLevel.HIGH
+        assert classify_performance(2.0, "instagram") == PerformanceLevel.AVERAGE
+        assert classify_performance(1.0, "instagram") == PerformanceLevel.LOW
+        assert classify_performance(0.1, "instagram") == PerformanceLevel.UNDERPERFORMING
+
+    def test_thresholds_are_inclusive(self):
+        assert classify_performance(10.0, "instagram") == PerformanceLevel.VIRAL
+        assert classify_performance(3.5, "instagram") == PerformanceLevel.HIGH
+        assert classify_performance(1.6, "instagram") == PerformanceLevel.AVERAGE
+        assert classify_performance(0.8, "instagram") == PerformanceLevel.LOW
+
+    def test_unknown_platform_uses_instagram(self):
+        assert classify_performance(4.0, "myspace") == PerformanceLevel.HIGH
+
+
+# ─── viral_potential_score ───────────────────────────────────────
+
+class TestViralPotential:
+    def test_score_in_range(self):
+        score = viral_potential_score(_post(shares=60, saves=30))
+        assert 0 <= score <= 100
+
+    def test_no_engagement(self):
+        p = _post(likes=0, comments=0, shares=0, saves=0)
+        assert viral_potential_score(p) == 0.0
+
+
+# ─── Analyzers ───────────────────────────────────────────────────
+
+class TestAnalyzers:
+    def test_optimal_posting_times(self):
+        posts = [
+            _post(posted_at="2024-03-04T09:00:00Z", likes=100),  # Monday
+            _post(posted_at="2024-03-04T09:45:00Z", likes=300),
+            _post(posted_at="2024-03-05T18:00:00Z", likes=10),  # Tuesday
+            _post(posted_at="", likes=999),
+            _post(posted_at="not a date", likes=999),
+        ]
+        timing = optimal_posting_times(posts)
+        assert len(timing["hourly"]) == 24
+        assert len(timing["daily"]) == 7
+        assert timing["hourly"][9] == (posts[0].engagement_rate + posts[1].engagement_rate) / 2
+        assert timing["daily"][1] == posts[2].engagement_rate
+        assert timing["hourly"][0] == 0.0
+
+    def test_hashtag_performance(self):
+        posts = [
+            _post(hashtags=["#AI", "food"], likes=100),
+            _post(hashtags=["ai", "#Food"], likes=300),
+            _post(hashtags=["once"], likes=900),
+        ]
+        ranked = hashtag_performance(posts)
+        assert dict(ranked) == {"ai": 22.0, "food": 22.0}
+
+    def test_hashtag_performance_top_n(self):
+        posts = [
+            _post(hashtags=[f"#t{i}" for i in range(12)], likes=10 * i)
+            for i in range(1, 4)
+        ] + [_post(hashtags=["#best"], likes=500)] * 2
+        ranked = hashtag_performance(posts)
+        assert hashtag_performance(posts, top_n=3) == ranked[:3]
+        assert ranked[0][0] == "best"
+
+    def test_content_type_analysis(self):
+        posts = [
+            _post(content_type=ContentType.REEL, likes=100),
+            _post(content_type=ContentType.REEL, likes=300),
+            _post(content_type=ContentType.IMAGE, likes=10),
+        ]
+        stats = content_type_analysis(posts)
+        assert stats["reel"]["count"] == 2
+        assert stats["reel"]["max_rate"] == posts[1].engagement_rate
+        assert stats["image"]["avg_rate"] == posts[2].engagement_rate
+
+    def test_decay_half_life(self):
+        assert engagement_decay_rate(_post(), {1: 10, 2: 40, 6: 60, 24: 100}) == 6.0
+        assert engagement_decay_rate(_post(), {1: 10}) == 0.0
+
+    def test_decay_unsorted_and_non_monotonic(self):
+        assert engagement_decay_rate(_post(), {24: 80, 1: 10, 3: 70, 2: 30}) == 3.0
+        assert engagement_decay_rate(_post(), {1: 0, 2: 0}) == 0.0
+
+
+# ─── HashtagIndex ────────────────────────────────────────────────
+
+class TestHashtagIndex:
+    def _posts(self):
+        return [
+            _post(post_id=f"p{i}", hashtags=[f"#t{i % 4}", "Common", f"#T{i % 3}"],
+                  likes=17 * i)
+            for i in range(20)
+        ]
+
+    def test_matches_hashtag_performance(self, tmp_path):
+        index = HashtagIndex(str(tmp_path / "tags.db"))
+        posts = self._posts()
+        assert index.ingest(posts) == 20
+        assert index.top() == hashtag_performance(posts)
+        assert index.top(3) == hashtag_performance(posts, top_n=3)
+        index.close()
+
+    def test_ingest_is_incremental(self, tmp_path):
+        db_path = str(tmp_path / "tags.db")
+        posts = self._posts()
+        index = HashtagIndex(db_path)
+        index.ingest(posts[:12])
+        index.close()
+
+        index = HashtagIndex(db_path)
+        assert index.ingest(posts) == 8  # the first 12 are already counted
+        assert index.top() == hashtag_performance(posts)
+        index.close()
+
+    def test_posts_without_id_are_all_counted(self, tmp_path):
+        index = HashtagIndex(str(tmp_path / "tags.db"))
+        posts = [_post(post_id="", hashtags=["#ai"], likes=10 * i) for i in range(5)]
+        assert index.ingest(posts) == 5
+        assert index.top() == hashtag_performance(posts)
+        index.close()
+
+
+# ─── analyze_engagement ──────────────────────────────────────────
+
+class TestAnalyzeEngagement:
+    def test_empty(self):
+        report = analyze_engagement([])
+        assert report.total_posts == 0
+        assert report.performance_level == PerformanceLevel.UNDERPERFORMING
+
+    def test_report_matches_analyzers(self):
+        posts = [
+            _post(content_type=ContentType.REEL, hashtags=["#ai"], likes=300,
+                  posted_at="2024-03-06T20:00:00Z"),
+            _post(content_type=ContentType.IMAGE, hashtags=["#ai"], likes=50),
+            _post(content_type=ContentType.VIDEO, likes=20),
+        ]
+        report = analyze_engagement(posts, platform="instagram")
+        assert report.total_posts == 3
+        assert report.best_content_type == ContentType.REEL
+        assert report.best_posting_hour == 20
+        assert report.best_posting_day == 2
+        assert report.top_hashtags == hashtag_performance(posts)
+        assert report.content_type_rates == content_type_analysis(posts)
+        assert report.hourly_rates == optimal_posting_times(posts)["hourly"]
+        assert "Engagement Report — INSTAGRAM" in report.summary()
+
+    def test_median_rate(self):
+        posts = [_post(likes=v) for v in (380, 80, 180, 30)]
+        assert analyze_engagement(posts).median_engagement_rate == 15.0
+        assert analyze_engagement(posts[:3]).median_engagement_rate == 20.0
+
+    def test_summary_layout(self):
+        report = analyze_engagement([_post(hashtags=["#ai"])] * 2, platform="tiktok")
+        report.recommendations = ["first", "second"]
+        lines = report.summary().split("\n")
+        assert lines[0] == "📊 Engagement Report — TIKTOK"
+        assert lines[5] == "Best time: Mon at 9:00"
+        assert lines[6] == "Top hashtags: #ai (10.0%)"
+        assert lines[-3:] == ["💡 Recommendations:", "  • first", "  • second"]
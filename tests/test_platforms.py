@@ -1,5 +1,6 @@
 """Tests for app.platforms module."""
 
+import orjson
 import pytest
 import requests
 from unittest.mock import patch, MagicMock
@@ -8,6 +9,16 @@ from app.platforms.twitter import TwitterClient
 from app.platforms.tiktok import TikTokClient
 
 
+def _responses(*payloads) -> list[MagicMock]:
+    """Mock responses returning each JSON payload in turn."""
+    responses = []
+    for payload in payloads:
+        resp = MagicMock()
+        resp.content = orjson.dumps(payload)
+        responses.append(resp)
+    return responses
+
+
 # ===== Instagram Tests =====
 
 class TestInstagramClient:
@@ -21,13 +32,13 @@ class TestInstagramClient:
 
     @patch("app.platforms.instagram.requests.Session.get")
     def test_get_profile_success(self, mock_get, ig):
-        mock_get.return_value.json.return_value = {
+        mock_get.return_value.content = orjson.dumps({
             "username": "testaccount",
             "followers_count": 5000,
             "follows_count": 300,
             "media_count": 120,
             "biography": "Test bio"
-        }
+        })
         mock_get.return_value.raise_for_status = MagicMock()
         result = ig.get_profile()
         assert "testaccount" in result
@@ -41,14 +52,14 @@ class TestInstagramClient:
 
     @patch("app.platforms.instagram.requests.Session.get")
     def test_get_recent_media(self, mock_get, ig):
-        mock_get.return_value.json.return_value = {
+        mock_get.return_value.content = orjson.dumps({
             "data": [
                 {"id": "1", "caption": "Test post", "like_count": 100,
                  "comments_count": 10, "media_type": "IMAGE"},
                 {"id": "2", "caption": "Video", "like_count": 200,
                  "comments_count": 20, "media_type": "VIDEO"},
             ]
-        }
+        })
         mock_get.return_value.raise_for_status = MagicMock()
         result = ig.get_recent_media()
         assert "Test post" in result
@@ -57,48 +68,139 @@ class TestInstagramClient:
 
     @patch("app.platforms.instagram.requests.Session.get")
     def test_get_recent_media_empty(self, mock_get, ig):
-        mock_get.return_value.json.return_value = {"data": []}
+        mock_get.return_value.content = orjson.dumps({"data": []})
         mock_get.return_value.raise_for_status = MagicMock()
         result = ig.get_recent_media()
         assert "暂无帖子" in result
 
     @patch("app.platforms.instagram.requests.Session.get")
     def test_get_stories(self, mock_get, ig):
-        mock_get.return_value.json.return_value = {
+        mock_get.return_value.content = orjson.dumps({
             "data": [{"id": "s1"}, {"id": "s2"}]
-        }
+        })
         mock_get.return_value.raise_for_status = MagicMock()
         result = ig.get_stories()
         assert "2条" in result
 
+    @patch("app.platforms.instagram.requests.Session.get")
     @patch("app.platforms.instagram.requests.Session.post")
-    def test_publish_photo(self, mock_post, ig):
-        mock_post.return_value.json.side_effect = [
+    def test_publish_photo(self, mock_post, mock_get, ig):
+        mock_get.return_value.content = orjson.dumps({"status_code": "FINISHED"})
+        mock_post.side_effect = _responses(
             {"id": "container1"},  # Create container
             {"id": "post1"},  # Publish
-        ]
+        )
         mock_post.return_value.raise_for_status = MagicMock()
         result = ig.publish_photo("https://img.com/1.jpg", "Test")
         assert "发布成功" in result
 
+    @patch("app.platforms.instagram.requests.Session.get")
     @patch("app.platforms.instagram.requests.Session.post")
-    def test_publish_carousel(self, mock_post, ig):
-        mock_post.return_value.json.side_effect = [
+    def test_publish_carousel(self, mock_post, mock_get, ig):
+        mock_get.return_value.content = orjson.dumps({"status_code": "FINISHED"})
+        mock_post.side_effect = _responses(
             {"id": "child1"}, {"id": "child2"},  # Children
             {"id": "carousel1"},  # Container
             {"id": "published1"},  # Publish
-        ]
+        )
         mock_post.return_value.raise_for_status = MagicMock()
         result = ig.publish_carousel(
             ["https://img.com/1.jpg", "https://img.com/2.jpg"], "Multi"
         )
         assert "轮播发布成功" in result
 
+    @patch("app.platforms.instagram.requests.Session.get")
+    @patch("app.platforms.instagram.requests.Session.post")
+    def test_publish_carousel_keeps_image_order(self, mock_post, mock_get, ig):
+        mock_get.return_value.content = orjson.dumps({"status_code": "FINISHED"})
+        def respond(url, data=None, **kwargs):
+            resp = MagicMock()
+            if "image_url" in data:
+                resp.content = orjson.dumps({"id": "c-" + data["image_url"]})
+            else:
+                resp.content = orjson.dumps({"id": "done"})
+            return resp
+
+        mock_post.side_effect = respond
+        urls = [f"u{i}" for i in range(12)]
+        result = ig.publish_carousel(urls, "Multi")
+        assert "10张图片" in result
+        container_call = mock_post.call_args_list[-2]
+        assert container_call.kwargs["data"]["children"] == ",".join(
+            f"c-u{i}" for i in range(10)
+        )
+
+    def test_carousel_workers_get_own_sessions(self, ig):
+        used = []
+
+        def respond(session, url, **kwargs):
+            used.append(session)
+            resp = MagicMock()
+            resp.content = orjson.dumps({"id": "x", "status_code": "FINISHED"})
+            return resp
+
+        with patch.object(requests.Session, "post", autospec=True, side_effect=respond), \
+                patch.object(requests.Session, "get", autospec=True, side_effect=respond):
+            assert "轮播发布成功" in ig.publish_carousel(["u1", "u2", "u3"], "Multi")
+        workers = [s for s in used if s is not ig.session]
+        assert workers  # child creation and status checks ran off-thread
+        assert all(
+            s.get_adapter("https://x") is ig.session.get_adapter("https://x") for s in workers
+        )
+
     @patch("app.platforms.instagram.requests.Session.post")
     def test_publish_carousel_too_few(self, mock_post, ig):
         result = ig.publish_carousel(["single"], "Test")
         assert "至少需要2张" in result
 
+    @patch("app.platforms.instagram.time.sleep")
+    @patch("app.platforms.instagram.requests.Session.get")
+    @patch("app.platforms.instagram.requests.Session.post")
+    def test_publish_photo_waits_for_container(self, mock_post, mock_get, mock_sleep, ig):
+        mock_post.side_effect = _responses({"id": "container1"}, {"id": "post1"})
+        mock_get.side_effect = _responses(
+            {"status_code": "IN_PROGRESS"},
+            {"status_code": "IN_PROGRESS"},
+            {"status_code": "FINISHED"},
+        )
+        assert "发布成功" in ig.publish_photo("https://img.com/1.jpg", "Test")
+        assert [c.args[0] for c in mock_sleep.call_args_list] == [0.5, 1.0]
+        assert mock_get.call_args.kwargs["params"]["fields"] == "status_code"
+
+    @patch("app.platforms.instagram.time.sleep")
+    @patch("app.platforms.instagram.requests.Session.get")
+    @patch("app.platforms.instagram.requests.Session.post")
+    def test_publish_photo_container_error(self, mock_post, mock_get, mock_sleep, ig):
+        mock_post.side_effect = _responses({"id": "container1"})
+        mock_get.side_effect = _responses({"status_code": "ERROR"})
+        assert "媒体处理失败" in ig.publish_photo("https://img.com/1.jpg", "Test")
+        assert mock_post.call_count == 1  # never attempted media_publish
+        mock_sleep.assert_not_called()
+
+    @patch("app.platforms.instagram._CONTAINER_TIMEOUT", 0)
+    @patch("app.platforms.instagram.requests.Session.get")
+    @patch("app.platforms.instagram.requests.Session.post")
+    def test_publish_photo_container_timeout(self, mock_post, mock_get, ig):
+        mock_post.side_effect = _responses({"id": "container1"})
+        mock_get.return_value.content = orjson.dumps({"status_code": "IN_PROGRESS"})
+        assert "媒体处理失败" in ig.publish_photo("https://img.com/1.jpg", "Test")
+
+    @patch("app.platforms.instagram.requests.Session.get")
+    @patch("app.platforms.instagram.requests.Session.post")
+    def test_publish_carousel_child_error(self, mock_post, mock_get, ig):
+        mock_post.side_effect = _responses({"id": "child1"}, {"id": "child2"})
+
+        def respond(url, **kwargs):
+            resp = MagicMock()
+            status = "ERROR" if url.endswith("child2") else "FINISHED"
+            resp.content = orjson.dumps({"status_code": status})
+            return resp
+
+        mock_get.side_effect = respond
+        result = ig.publish_carousel(["https://img.com/1.jpg", "https://img.com/2.jpg"], "Multi")
+        assert "轮播子项处理失败" in result
+        assert mock_post.call_count == 2
+
 
 # ===== Twitter Tests =====
 
@@ -112,27 +214,27 @@ class TestTwitterClient:
 
     @patch("app.platforms.twitter.requests.Session.get")
     def test_search_recent(self, mock_get, tw):
-        mock_get.return_value.json.return_value = {
+        mock_get.return_value.content = orjson.dumps({
             "data": [
                 {"text": "Hello world", "public_metrics": {
                     "like_count": 10, "retweet_count": 5, "reply_count": 2
                 }},
             ]
-        }
+        })
         mock_get.return_value.raise_for_status = MagicMock()
         result = tw.search_recent("test")
         assert "Hello world" in result
 
     @patch("app.platforms.twitter.requests.Session.get")
     def test_search_empty(self, mock_get, tw):
-        mock_get.return_value.json.return_value = {"data": []}
+        mock_get.return_value.content = orjson.dumps({"data": []})
         mock_get.return_value.raise_for_status = MagicMock()
         result = tw.search_recent("noresults")
         assert "未找到" in result
 
     @patch("app.platforms.twitter.requests.Session.get")
     def test_get_user(self, mock_get, tw):
-        mock_get.return_value.json.return_value = {
+        mock_get.return_value.content = orjson.dumps({
             "data": {
                 "username": "elonmusk",
                 "verified": True,
@@ -143,7 +245,7 @@ class TestTwitterClient:
                     "tweet_count": 50000,
                 }
             }
-        }
+        })
         mock_get.return_value.raise_for_status = MagicMock()
         result = tw.get_user("elonmusk")
         assert "elonmusk" in result
@@ -152,23 +254,37 @@ class TestTwitterClient:
 
     @patch("app.platforms.twitter.requests.Session.get")
     def test_get_user_not_found(self, mock_get, tw):
-        mock_get.return_value.json.return_value = {"errors": [{"message": "not found"}]}
+        mock_get.return_value.content = orjson.dumps({"errors": [{"message": "not found"}]})
         mock_get.return_value.raise_for_status = MagicMock()
         result = tw.get_user("nobody")
         assert "未找到" in result
 
     @patch("app.platforms.twitter.requests.Session.get")
     def test_get_user_tweets(self, mock_get, tw):
-        mock_get.return_value.json.side_effect = [
+        mock_get.side_effect = _responses(
             {"data": {"id": "123", "username": "user"}},
             {"data": [{"text": "Tweet 1", "public_metrics": {
                 "like_count": 5, "retweet_count": 1
             }}]},
-        ]
+        )
         mock_get.return_value.raise_for_status = MagicMock()
         result = tw.get_user_tweets("user")
         assert "Tweet 1" in result
 
+    @patch("app.platforms.twitter.requests.Session.get")
+    def test_get_trending(self, mock_get, tw):
+        trends = [{"name": f"#t{i}", "tweet_volume": 1000 * i or None} for i in range(12)]
+        mock_get.return_value.content = orjson.dumps([{"trends": trends}])
+        result = tw.get_trending()
+        assert "1. #t0\n" in result
+        assert "2. #t1 (1,000)" in result
+        assert "#t10" not in result
+
+    @patch("app.platforms.twitter.requests.Session.get")
+    def test_get_trending_not_ok(self, mock_get, tw):
+        mock_get.return_value.ok = False
+        assert "Elevated" in tw.get_trending()
+
 
 # ===== TikTok Tests =====
 
@@ -183,7 +299,7 @@ class TestTikTokClient:
 
     @patch("app.platforms.tiktok.requests.Session.get")
     def test_get_user_info(self, mock_get, tt):
-        mock_get.return_value.json.return_value = {
+        mock_get.return_value.content = orjson.dumps({
             "data": {"user": {
                 "display_name": "TestUser",
                 "follower_count": 10000,
@@ -191,7 +307,7 @@ class TestTikTokClient:
                 "likes_count": 500000,
                 "video_count": 200,
             }}
-        }
+        })
         mock_get.return_value.raise_for_status = MagicMock()
         result = tt.get_user_info()
         assert "TestUser" in result
@@ -205,12 +321,12 @@ class TestTikTokClient:
 
     @patch("app.platforms.tiktok.requests.Session.post")
     def test_get_videos(self, mock_post, tt):
-        mock_post.return_value.json.return_value = {
+        mock_post.return_value.content = orjson.dumps({
             "data": {"videos": [
                 {"title": "Dance video", "view_count": 50000,
                  "like_count": 3000, "comment_count": 100},
             ]}
-        }
+        })
         mock_post.return_value.raise_for_status = MagicMock()
         result = tt.get_videos()
         assert "Dance video" in result
@@ -218,28 +334,28 @@ class TestTikTokClient:
 
     @patch("app.platforms.tiktok.requests.Session.post")
     def test_get_videos_empty(self, mock_post, tt):
-        mock_post.return_value.json.return_value = {"data": {"videos": []}}
+        mock_post.return_value.content = orjson.dumps({"data": {"videos": []}})
         mock_post.return_value.raise_for_status = MagicMock()
         result = tt.get_videos()
         assert "暂无视频" in result
 
     @patch("app.platforms.tiktok.requests.Session.post")
     def test_search_videos(self, mock_post, tt):
-        mock_post.return_value.json.return_value = {
+        mock_post.return_value.content = orjson.dumps({
             "data": {"videos": [
                 {"video_description": "trending", "view_count": 1000000,
                  "like_count": 50000},
             ]}
-        }
+        })
         mock_post.return_value.raise_for_status = MagicMock()
         result = tt.search_videos("dance")
         assert "trending" in result
 
     @patch("app.platforms.tiktok.requests.Session.post")
     def test_init_video_upload(self, mock_post, tt):
-        mock_post.return_value.json.return_value = {
+        mock_post.return_value.content = orjson.dumps({
             "data": {"publish_id": "pub123"}
-        }
+        })
         mock_post.return_value.raise_for_status = MagicMock()
         result = tt.init_video_upload(50_000_000, title="Test")
         assert result == "pub123"
@@ -249,3 +365,100 @@ class TestTikTokClient:
         mock_post.side_effect = requests.RequestException("upload failed")
         result = tt.init_video_upload(50_000_000)
         assert result is None
+
+    @patch("app.platforms.tiktok.requests.Session.post")
+    def test_post_body_is_serialized_json(self, mock_post, tt):
+        mock_post.return_value.content = orjson.dumps({"data": {"publish_id": "p"}})
+        tt.init_video_upload(1000, title="标题")
+        body = mock_post.call_args.kwargs["data"]
+        assert orjson.loads(body)["post_info"]["title"] == "标题"
+
+    @patch("app.platforms.tiktok.requests.Session.get")
+    def test_malformed_json_is_an_error(self, mock_get, tt):
+        mock_get.return_value.content = b"<html>gateway timeout</html>"
+        assert tt._get("user/info/") is None
+
+
+# ===== Shared Session Tests =====
+
+class TestSharedConnectionPool:
+    def test_clients_share_adapter(self):
+        ig = InstagramClient("t", "1")
+        tw = TwitterClient("b")
+        tt = TikTokClient("t")
+        adapters = {
+            id(c.session.get_adapter("https://example.com")) for c in (ig, tw, tt)
+        }
+        assert len(adapters) == 1
+
+    def test_retries_ignore_retry_after(self):
+        retry = TwitterClient("b").session.get_adapter("https://example.com").max_retries
+        assert retry.respect_retry_after_header is False
+        assert "POST" not in retry.allowed_methods
+
+    def test_headers_stay_per_client(self):
+        a, b = TwitterClient("first"), TwitterClient("second")
+        assert a.session.headers["Authorization"] == "Bearer first"
+        assert b.session.headers["Authorization"] == "Bearer second"
+
+
+# ===== Response Cache Tests =====
+
+class TestResponseCache:
+    @patch("app.platforms.twitter.requests.Session.get")
+    def test_user_lookup_served_from_cache(self, mock_get):
+        tw = TwitterClient("b")
+        mock_get.return_value.content = orjson.dumps({"data": {"username": "x"}})
+        assert tw.get_user("x") == tw.get_user("x")
+        assert mock_get.call_count == 1
+
+    @patch("app.platforms.instagram.requests.Session.get")
+    def test_listings_not_cached(self, mock_get):
+        ig = InstagramClient("t", "1")
+        mock_get.side_effect = _responses({"data": []}, {"data": [{"id": "new"}]})
+        ig.get_recent_media()
+        assert "最近1条" in ig.get_recent_media()
+        assert mock_get.call_count == 2
+
+    @patch("app.platforms.twitter.requests.Session.get")
+    def test_params_are_part_of_key(self, mock_get):
+        tw = TwitterClient("b")
+        mock_get.side_effect = _responses({"page": 1}, {"page": 2})
+        assert tw._get("tweets", {"page": 1}, cached=True) == {"page": 1}
+        assert tw._get("tweets", {"page": 2}, cached=True) == {"page": 2}
+
+    @patch("app.platforms.twitter.requests.Session.get")
+    def test_zero_ttl_disables_cache(self, mock_get):
+        tw = TwitterClient("b", cache_ttl=0)
+        mock_get.return_value.content = orjson.dumps({"ok": True})
+        tw._get("users/me", cached=True)
+        tw._get("users/me", cached=True)
+        assert mock_get.call_count == 2
+
+    @patch("app.platforms.twitter.requests.Session.get")
+    def test_cached_payload_is_a_copy(self, mock_get):
+        tw = TwitterClient("b")
+        mock_get.return_value.content = orjson.dumps({"data": {"id": "1"}})
+        tw._get("users/me", cached=True)["data"]["id"] = "changed"
+        assert tw._get("users/me", cached=True) == {"data": {"id": "1"}}
+
+    @patch("app.platforms.twitter.requests.Session.get")
+    def test_not_modified_reuses_payload(self, mock_get):
+        tw = TwitterClient("b")
+        fresh = MagicMock(status_code=200, content=orjson.dumps({"n": 1}),
+                          headers={"ETag": '"v1"'})
+        not_modified = MagicMock(status_code=304, content=b"")
+        mock_get.side_effect = [fresh, not_modified]
+        assert tw._get("users/me", cached=True) == {"n": 1}
+        key = next(iter(tw._responses._entries))
+        tw._responses._entries[key][0] = 0  # expire it
+        assert tw._get("users/me", cached=True) == {"n": 1}
+        assert mock_get.call_args.kwargs["headers"] == {"If-None-Match": '"v1"'}
+
+    @patch("app.platforms.instagram.requests.Session.get")
+    def test_errors_not_cached(self, mock_get):
+        ig = InstagramClient("t", "1")
+        mock_get.side_effect = [requests.RequestException("down"),
+                                *_responses({"id": "1"})]
+        assert ig._get("me", cached=True) is None
+        assert ig._get("me", cached=True) == {"id": "1"}
@@ -4,7 +4,7 @@ import os
 import tempfile
 from datetime import datetime, timedelta
 import pytest
-from app.scheduler import Scheduler
+from app.scheduler import Scheduler, _DUE_POSTS_SQL
 
 
 @pytest.fixture
@@ -61,6 +61,32 @@ class TestDuePosts:
         due = scheduler.get_due_posts()
         assert len(due) == 1
         assert due[0]["caption"] == "Past"
+        assert due[0].keys() == [
+            "id", "platform", "content_type", "caption", "media_url", "scheduled_at"
+        ]
+
+    def test_due_posts_oldest_first(self, scheduler):
+        for minutes, caption in ((5, "newer"), (30, "older")):
+            dt = (datetime.now() - timedelta(minutes=minutes)).isoformat()
+            scheduler.add_post("ig", caption, "url", dt)
+        assert [p["caption"] for p in scheduler.get_due_posts()] == ["older", "newer"]
+
+    def test_due_query_uses_pending_index(self, tmp_path):
+        db_path = str(tmp_path / "scheduler.db")
+        s = Scheduler(db_path=db_path)
+        past = (datetime.now() - timedelta(minutes=5)).isoformat()
+        for i in range(50):
+            s.add_post("ig", f"post {i}", "url", past)
+        for row in s.get_due_posts()[:40]:
+            s.mark_published(row["id"])
+        s.close()
+
+        s = Scheduler(db_path=db_path)  # statistics are refreshed on open
+        plan = s.db.execute(
+            "EXPLAIN QUERY PLAN " + _DUE_POSTS_SQL, (past,)
+        ).fetchall()
+        s.close()
+        assert any("idx_pending_due" in r["detail"] for r in plan)
 
 
 class TestMarkPublished:
@@ -131,3 +157,11 @@ class TestStats:
         result = scheduler.get_stats()
         assert "待发布: 1" in result
         assert "已发布: 1" in result
+
+
+class TestPragmas:
+    def test_wal_enabled(self, scheduler):
+        assert scheduler.db.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    def test_synchronous_normal(self, scheduler):
+        assert scheduler.db.execute("PRAGMA synchronous").fetchone()[0] == 1
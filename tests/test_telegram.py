@@ -54,6 +54,20 @@ class TestGetUpdates:
         call_params = mock_get.call_args[1].get("params", mock_get.call_args[0][0] if mock_get.call_args[0] else {})
         # Verify offset was passed
 
+    @patch("app.telegram.requests.Session.get")
+    def test_get_updates_allowed_updates(self, mock_get, bot):
+        mock_get.return_value.json.return_value = {"ok": True, "result": []}
+        bot.get_updates(allowed_updates=["message", "callback_query"])
+        params = mock_get.call_args.kwargs["params"]
+        assert params["allowed_updates"] == '["message", "callback_query"]'
+        assert params["limit"] == 100
+
+    @patch("app.telegram.requests.Session.get")
+    def test_get_updates_all_types_by_default(self, mock_get, bot):
+        mock_get.return_value.json.return_value = {"ok": True, "result": []}
+        bot.get_updates()
+        assert "allowed_updates" not in mock_get.call_args.kwargs["params"]
+
 
 class TestSendMessage:
     @patch("app.telegram.requests.Session.get")